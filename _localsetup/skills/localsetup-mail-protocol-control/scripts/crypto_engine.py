@@ -1,14 +1,16 @@
 #!/usr/bin/env python3
 # Purpose: Full-envelope encryption and decryption for mail payloads.
 # Created: 2026-03-07
-# Last updated: 2026-03-07
+# Last updated: 2026-10-17
 
 from __future__ import annotations
 
 import base64
+import hashlib
 import json
 import os
 import sys
+import threading
 from pathlib import Path
 from typing import Any
 
@@ -42,8 +44,33 @@ class CryptoError(RuntimeError):
 
 
 class CryptoEngine:
+    # Parsed OpenPGP keys kept per engine (keyed by armored-text digest), each with a lock:
+    # PGPKey.unlock() wipes the secret material on exit, so one parsed key must not be
+    # unlocked/used by two threads at once (controller sweeps and the MCP server share engines).
+    _PGP_KEY_CACHE_MAX = 32
+
     def __init__(self, pbkdf2_iterations: int = 390000):
         self.pbkdf2_iterations = pbkdf2_iterations
+        self._pgp_keys: dict[str, tuple[Any, threading.Lock]] = {}
+        self._pgp_keys_lock = threading.Lock()
+
+    def _pgp_entry(self, key_ascii: str) -> tuple[Any, threading.Lock]:
+        """PGPKey.from_blob once per distinct armored key; later calls reuse the parsed key."""
+        digest = hashlib.sha256(key_ascii.encode("utf-8", errors="replace")).hexdigest()
+        with self._pgp_keys_lock:
+            entry = self._pgp_keys.get(digest)
+        if entry is None:
+            key, _ = pgpy.PGPKey.from_blob(key_ascii)
+            with self._pgp_keys_lock:
+                entry = self._pgp_keys.get(digest)
+                if entry is None:
+                    if len(self._pgp_keys) >= self._PGP_KEY_CACHE_MAX:
+                        self._pgp_keys.pop(next(iter(self._pgp_keys)))
+                    entry = self._pgp_keys[digest] = (key, threading.Lock())
+        return entry
+
+    def _pgp_key(self, key_ascii: str) -> Any:
+        return self._pgp_entry(key_ascii)[0]
 
     def _serialize_envelope(self, envelope: dict[str, Any]) -> bytes:
         try:
@@ -166,18 +193,39 @@ class CryptoEngine:
     def encrypt_openpgp(
         self, envelope: dict[str, Any], public_key_ascii: str
     ) -> dict[str, Any]:
+        if not public_key_ascii:
+            raise CryptoError("KEY_MATERIAL_NOT_FOUND", "Missing OpenPGP public key.")
+        return self.encrypt_openpgp_multi(envelope, [public_key_ascii])
+
+    def encrypt_openpgp_multi(
+        self, envelope: dict[str, Any], public_keys_ascii: list[str]
+    ) -> dict[str, Any]:
+        """
+        One OpenPGP message readable by every key: the body is encrypted once under a single
+        session key, which is wrapped in one PKESK packet per recipient.
+        """
         if pgpy is None:
             raise CryptoError(
                 "ENCRYPTION_MODE_UNSUPPORTED", "OpenPGP dependency not installed."
             )
-        if not public_key_ascii:
+        if not public_keys_ascii or not all(public_keys_ascii):
             raise CryptoError("KEY_MATERIAL_NOT_FOUND", "Missing OpenPGP public key.")
         try:
-            pubkey, _ = pgpy.PGPKey.from_blob(public_key_ascii)
+            pubkeys = [self._pgp_key(k) for k in public_keys_ascii]
             msg = pgpy.PGPMessage.new(
                 self._serialize_envelope(envelope).decode("utf-8", errors="replace")
             )
-            encrypted_msg = pubkey.encrypt(msg)
+            if len(pubkeys) == 1:
+                encrypted_msg = pubkeys[0].encrypt(msg)
+            else:
+                cipher = pgpy.constants.SymmetricKeyAlgorithm.AES256
+                sessionkey = cipher.gen_key()
+                encrypted_msg = msg
+                for pubkey in pubkeys:
+                    encrypted_msg = pubkey.encrypt(
+                        encrypted_msg, cipher=cipher, sessionkey=sessionkey
+                    )
+                del sessionkey
             armored = str(encrypted_msg)
         except Exception as exc:  # noqa: BLE001
             raise CryptoError(
@@ -189,17 +237,44 @@ class CryptoEngine:
             "ciphertext_b64": base64.b64encode(armored.encode("utf-8")).decode("utf-8"),
         }
 
-    def decrypt_openpgp(
-        self, encrypted: dict[str, Any], private_key_ascii: str, passphrase: str = ""
-    ) -> dict[str, Any]:
+    def decrypt_openpgp_raw(
+        self,
+        message_blob: str | bytes | bytearray,
+        private_key_ascii: str,
+        passphrase: str = "",
+    ) -> bytes:
+        """Decrypt an armored or binary (de-armored) OpenPGP message; return plaintext bytes."""
         if pgpy is None:
             raise CryptoError(
                 "ENCRYPTION_MODE_UNSUPPORTED", "OpenPGP dependency not installed."
             )
         if not private_key_ascii:
             raise CryptoError("KEY_MATERIAL_NOT_FOUND", "Missing OpenPGP private key.")
+        try:
+            privkey, key_lock = self._pgp_entry(private_key_ascii)
+            message = pgpy.PGPMessage.from_blob(message_blob)
+            del message_blob
+            with key_lock:
+                if privkey.is_protected:
+                    with privkey.unlock(passphrase):
+                        decrypted = privkey.decrypt(message)
+                else:
+                    decrypted = privkey.decrypt(message)
+            del message
+            out = decrypted.message
+        except Exception as exc:  # noqa: BLE001
+            raise CryptoError(
+                "DECRYPTION_FAILED", f"OpenPGP decrypt failure: {exc}"
+            ) from exc
+        if isinstance(out, str):
+            return out.encode("utf-8", errors="replace")
+        return bytes(out)
+
+    def decrypt_openpgp(
+        self, encrypted: dict[str, Any], private_key_ascii: str, passphrase: str = ""
+    ) -> dict[str, Any]:
         armored = str(encrypted.get("armored", "")).strip()
-        if not armored:
+        if not armored and pgpy is not None and private_key_ascii:
             try:
                 armored = base64.b64decode(
                     str(encrypted["ciphertext_b64"]), validate=True
@@ -208,21 +283,9 @@ class CryptoEngine:
                 raise CryptoError(
                     "DECRYPTION_FAILED", f"Invalid OpenPGP payload: {exc}"
                 ) from exc
-        try:
-            privkey, _ = pgpy.PGPKey.from_blob(private_key_ascii)
-            if privkey.is_protected:
-                with privkey.unlock(passphrase):
-                    message = pgpy.PGPMessage.from_blob(armored)
-                    decrypted = privkey.decrypt(message)
-            else:
-                message = pgpy.PGPMessage.from_blob(armored)
-                decrypted = privkey.decrypt(message)
-            text = str(decrypted.message)
-        except Exception as exc:  # noqa: BLE001
-            raise CryptoError(
-                "DECRYPTION_FAILED", f"OpenPGP decrypt failure: {exc}"
-            ) from exc
-        return self._deserialize_envelope(text.encode("utf-8", errors="replace"))
+        return self._deserialize_envelope(
+            self.decrypt_openpgp_raw(armored, private_key_ascii, passphrase)
+        )
 
     def encrypt(
         self, mode: str, envelope: dict[str, Any], secrets: dict[str, str]
@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+# Purpose: Asyncio sweep engine: concurrent dispatch across accounts with per-account limits.
+# Created: 2026-10-17
+# Last updated: 2026-10-17
+
+"""
+Calls run on the controller's pooled (blocking) adapters in a bounded thread pool, so network
+waits overlap across accounts and mailboxes while each call keeps its existing policy,
+confirmation and error handling. sweep() groups calls by account and gives each account its
+own per_account workers: an account only ever waits on its own earlier calls, never on a slow
+neighbour. Backpressure is per account (at most per_account calls in flight each) and global
+(max_workers blocking calls across all accounts).
+"""
+
+from __future__ import annotations
+
+import asyncio
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Iterable, Protocol
+
+
+class Dispatcher(Protocol):
+    def dispatch(self, tool: str, payload: dict[str, Any]) -> dict[str, Any]: ...
+
+
+def _account_key(payload: dict[str, Any]) -> str:
+    return str(payload.get("acct") or "") if isinstance(payload, dict) else ""
+
+
+class AsyncMailEngine:
+    """
+    per_account: concurrent calls per account (keep at or below the IMAP pool's idle sessions
+    per key so sessions are reused, not reopened). max_workers: blocking calls in flight across
+    all accounts.
+    """
+
+    def __init__(
+        self,
+        controller: Dispatcher,
+        per_account: int = 2,
+        max_workers: int = 16,
+    ):
+        self.controller = controller
+        self.per_account = max(1, int(per_account))
+        self.max_workers = max(1, int(max_workers))
+        self._executor: ThreadPoolExecutor | None = None
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._limits: dict[str, asyncio.Semaphore] = {}
+
+    def _pool(self) -> ThreadPoolExecutor:
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(
+                max_workers=self.max_workers, thread_name_prefix="mail-engine"
+            )
+        return self._executor
+
+    def _limit(self, account_id: str) -> asyncio.Semaphore:
+        loop = asyncio.get_running_loop()
+        if loop is not self._loop:
+            # Semaphores bind to the loop that first waits on them; each asyncio.run starts fresh.
+            self._loop = loop
+            self._limits = {}
+        sem = self._limits.get(account_id)
+        if sem is None:
+            sem = self._limits[account_id] = asyncio.Semaphore(self.per_account)
+        return sem
+
+    async def dispatch(self, tool: str, payload: dict[str, Any]) -> dict[str, Any]:
+        """controller.dispatch off the event loop, within the account's concurrency limit."""
+        async with self._limit(_account_key(payload)):
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(
+                self._pool(), self.controller.dispatch, tool, payload
+            )
+
+    async def sweep(self, calls: Iterable[tuple[str, dict[str, Any]]]) -> list[dict[str, Any]]:
+        """Run (tool, payload) calls concurrently; results come back in input order."""
+        pending: dict[str, deque[tuple[int, str, dict[str, Any]]]] = {}
+        n = 0
+        for tool, payload in calls:
+            pending.setdefault(_account_key(payload), deque()).append((n, tool, payload))
+            n += 1
+        results: dict[int, dict[str, Any]] = {}
+
+        async def _drain(queue: deque[tuple[int, str, dict[str, Any]]]) -> None:
+            while queue:
+                i, tool, payload = queue.popleft()
+                try:
+                    results[i] = await self.dispatch(tool, payload)
+                except Exception as exc:  # noqa: BLE001
+                    results[i] = {"ok": False, "code": "UNHANDLED_ERROR", "message": str(exc)}
+
+        await asyncio.gather(
+            *(
+                _drain(queue)
+                for queue in pending.values()
+                for _ in range(min(self.per_account, len(queue)))
+            )
+        )
+        return [results[i] for i in range(n)]
+
+    def run_sweep(self, calls: Iterable[tuple[str, dict[str, Any]]]) -> list[dict[str, Any]]:
+        """Blocking entry point for synchronous callers (not from inside a running loop)."""
+        return asyncio.run(self.sweep(calls))
+
+    def close(self) -> None:
+        """Stop the worker threads; the controller (and its pooled sessions) is left open."""
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
@@ -1,27 +1,36 @@
 #!/usr/bin/env python3
 # Purpose: Policy-gated SMTP and IMAP control layer for delegated mail accounts.
 # Created: 2026-03-07
-# Last updated: 2026-03-07
+# Last updated: 2026-10-17
 
 from __future__ import annotations
 
 import base64
 import email
+import hashlib
 import json
 import imaplib
+import os
+import re
 import smtplib
+import sqlite3
 import ssl
 import sys
+import tempfile
+import threading
 import time
 import uuid
+from collections import OrderedDict
+from contextlib import contextmanager
 from dataclasses import asdict
 from email.message import EmailMessage
 from pathlib import Path
-from typing import Any, Protocol
+from typing import Any, Callable, Iterator, Protocol
 
 if __package__ in (None, ""):
     sys.path.insert(0, str(Path(__file__).resolve().parent))
     from crypto_engine import CryptoEngine, CryptoError  # type: ignore
+    from mail_engine import AsyncMailEngine  # type: ignore
     from mail_types import AccountConfig, AttachmentItem, MailResult, MessageEnvelope  # type: ignore
     from mail_utils import (
         as_bool,
@@ -35,6 +44,7 @@ if __package__ in (None, ""):
     from policy_engine import PolicyError, evaluate_action, load_policy  # type: ignore
 else:
     from .crypto_engine import CryptoEngine, CryptoError
+    from .mail_engine import AsyncMailEngine
     from .mail_types import AccountConfig, AttachmentItem, MailResult, MessageEnvelope
     from .mail_utils import (
         as_bool,
@@ -138,9 +148,185 @@ class EnvCredentialProvider:
         return out
 
 
+class ExpiringStore:
+    """
+    Bounded (namespace, key) -> JSON record table in one SQLite file (WAL), shared by every
+    process using the same state dir. Rows past their TTL are never returned; prune() deletes
+    them and then the least recently used rows past max_entries per namespace. Writes prune
+    every prune_every calls, so memory and file size stay flat under sustained load. Lookups
+    are primary-key reads. path None keeps the table in process memory.
+    """
+
+    def __init__(self, path: Path | None = None, max_entries: int = 10000, prune_every: int = 64):
+        self.path = Path(path) if path else None
+        self.max_entries = max(1, int(max_entries))
+        self.prune_every = max(1, int(prune_every))
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._memory: sqlite3.Connection | None = None
+        self._conns: dict[threading.Thread, sqlite3.Connection] = {}
+        self._generation = 0
+        self._writes = 0
+
+    def _connect(self, target: str) -> sqlite3.Connection:
+        # Used by one thread at a time; close() may run on another.
+        conn = sqlite3.connect(target, timeout=10.0, isolation_level=None, check_same_thread=False)
+        if target != ":memory:":
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS entries (ns TEXT NOT NULL, key TEXT NOT NULL, "
+            "value TEXT NOT NULL, expires_at REAL NOT NULL, last_used REAL NOT NULL, "
+            "PRIMARY KEY (ns, key)) WITHOUT ROWID"
+        )
+        conn.execute("CREATE INDEX IF NOT EXISTS entries_expiry ON entries (expires_at)")
+        conn.execute("CREATE INDEX IF NOT EXISTS entries_lru ON entries (ns, last_used)")
+        return conn
+
+    def _open_file(self) -> sqlite3.Connection:
+        """This thread's connection; registered so close() can reach it from any thread."""
+        assert self.path is not None
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        # SQLite creates -wal/-shm with the database file's mode, so create it 0600 first.
+        os.close(os.open(self.path, os.O_RDWR | os.O_CREAT, 0o600))
+        conn = self._connect(str(self.path))
+        for suffix in ("", "-wal", "-shm"):
+            try:
+                os.chmod(f"{self.path}{suffix}", 0o600)
+            except OSError:
+                pass
+        me = threading.current_thread()
+        with self._lock:
+            self._local.generation = self._generation
+            dead = [t for t in self._conns if t is not me and not t.is_alive()]
+            stale = [self._conns.pop(t) for t in dead]
+            old = self._conns.pop(me, None)
+            self._conns[me] = conn
+        for c in stale + ([old] if old is not None else []):
+            c.close()
+        return conn
+
+    @contextmanager
+    def _tx(self) -> Iterator[sqlite3.Connection]:
+        """One IMMEDIATE transaction: read-check-write is atomic across threads and processes."""
+        if self.path is None:
+            with self._lock:
+                if self._memory is None:
+                    self._memory = self._connect(":memory:")
+                conn = self._memory
+                conn.execute("BEGIN IMMEDIATE")
+                try:
+                    yield conn
+                except BaseException:
+                    conn.execute("ROLLBACK")
+                    raise
+                conn.execute("COMMIT")
+            return
+        conn = getattr(self._local, "conn", None)
+        if conn is None or self._local.generation != self._generation:
+            conn = self._local.conn = self._open_file()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield conn
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        conn.execute("COMMIT")
+
+    def get(self, ns: str, key: str) -> dict[str, Any] | None:
+        return self.update(ns, key, lambda record: None)
+
+    def put(self, ns: str, key: str, value: dict[str, Any], ttl_seconds: float) -> None:
+        now = time.time()
+        with self._tx() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO entries VALUES (?, ?, ?, ?, ?)",
+                (ns, key, json.dumps(value, separators=(",", ":")), now + ttl_seconds, now),
+            )
+        self._wrote()
+
+    def update(
+        self,
+        ns: str,
+        key: str,
+        fn: Callable[[dict[str, Any] | None], dict[str, Any] | None],
+    ) -> dict[str, Any] | None:
+        """
+        fn(current record or None) runs inside the transaction; a dict it returns replaces the
+        record (TTL unchanged), an exception leaves it untouched. Returns the record fn saw.
+        """
+        now = time.time()
+        with self._tx() as conn:
+            row = conn.execute(
+                "SELECT value FROM entries WHERE ns = ? AND key = ? AND expires_at > ?",
+                (ns, key, now),
+            ).fetchone()
+            record = json.loads(row[0]) if row else None
+            replacement = fn(record)
+            if row is not None:
+                if replacement is not None:
+                    conn.execute(
+                        "UPDATE entries SET value = ?, last_used = ? WHERE ns = ? AND key = ?",
+                        (json.dumps(replacement, separators=(",", ":")), now, ns, key),
+                    )
+                else:
+                    conn.execute(
+                        "UPDATE entries SET last_used = ? WHERE ns = ? AND key = ?",
+                        (now, ns, key),
+                    )
+        return record
+
+    def _wrote(self) -> None:
+        with self._lock:
+            self._writes += 1
+            due = self._writes % self.prune_every == 1 or self.prune_every == 1
+        if due:
+            self.prune()
+
+    def prune(self) -> int:
+        """Drop expired rows, then LRU rows past max_entries per namespace; returns rows removed."""
+        with self._tx() as conn:
+            removed = conn.execute(
+                "DELETE FROM entries WHERE expires_at <= ?", (time.time(),)
+            ).rowcount
+            for (ns,) in conn.execute("SELECT DISTINCT ns FROM entries").fetchall():
+                removed += conn.execute(
+                    "DELETE FROM entries WHERE ns = ? AND key IN (SELECT key FROM entries "
+                    "WHERE ns = ? ORDER BY last_used DESC LIMIT -1 OFFSET ?)",
+                    (ns, ns, self.max_entries),
+                ).rowcount
+        return removed
+
+    def count(self, ns: str) -> int:
+        with self._tx() as conn:
+            return int(
+                conn.execute(
+                    "SELECT COUNT(*) FROM entries WHERE ns = ? AND expires_at > ?",
+                    (ns, time.time()),
+                ).fetchone()[0]
+            )
+
+    def close(self) -> None:
+        """
+        Close every thread's connection (and the in-memory one). Call once other threads are
+        done with the store; a later call from any thread reopens its own connection.
+        """
+        with self._lock:
+            conns = list(self._conns.values())
+            self._conns.clear()
+            self._generation += 1
+            memory, self._memory = self._memory, None
+        for conn in conns + ([memory] if memory is not None else []):
+            conn.close()
+        self._local.conn = None
+
+
 class ConfirmationStore:
-    def __init__(self) -> None:
-        self._tokens: dict[str, dict[str, Any]] = {}
+    # Spent and expired tokens stay this long so a late retry gets REPLAY/EXPIRED, not INVALID.
+    RETAIN_SECONDS = 3600
+
+    def __init__(self, store: ExpiringStore | None = None) -> None:
+        self.store = store or ExpiringStore()
 
     def issue(
         self, account_id: str, action: str, scope_hash: str, ttl_seconds: int = 300
@@ -155,43 +341,152 @@ class ConfirmationStore:
             "expires_at": now + ttl_seconds,
             "used": False,
         }
-        self._tokens[token] = record
+        self.store.put("confirm", token, record, ttl_seconds + self.RETAIN_SECONDS)
         return {"token": token, **record}
 
     def consume(
         self, token: str, account_id: str, action: str, scope_hash: str
     ) -> None:
         now = int(time.time())
-        record = self._tokens.get(token)
-        if not isinstance(record, dict):
-            raise MailControlError(
-                "CONFIRMATION_INVALID", "Confirmation token is invalid."
-            )
-        if record["used"]:
-            raise MailControlError(
-                "CONFIRMATION_REPLAY_BLOCKED", "Confirmation token already used."
-            )
-        if now > int(record["expires_at"]):
-            raise MailControlError(
-                "CONFIRMATION_EXPIRED", "Confirmation token expired."
-            )
-        if (
-            record["account_id"] != account_id
-            or record["action"] != action
-            or record["scope_hash"] != scope_hash
-        ):
-            raise MailControlError(
-                "CONFIRMATION_SCOPE_MISMATCH",
-                "Confirmation token does not match request scope.",
-            )
-        record["used"] = True
+
+        def _spend(record: dict[str, Any] | None) -> dict[str, Any]:
+            if not isinstance(record, dict):
+                raise MailControlError(
+                    "CONFIRMATION_INVALID", "Confirmation token is invalid."
+                )
+            if record["used"]:
+                raise MailControlError(
+                    "CONFIRMATION_REPLAY_BLOCKED", "Confirmation token already used."
+                )
+            if now > int(record["expires_at"]):
+                raise MailControlError(
+                    "CONFIRMATION_EXPIRED", "Confirmation token expired."
+                )
+            if (
+                record["account_id"] != account_id
+                or record["action"] != action
+                or record["scope_hash"] != scope_hash
+            ):
+                raise MailControlError(
+                    "CONFIRMATION_SCOPE_MISMATCH",
+                    "Confirmation token does not match request scope.",
+                )
+            return {**record, "used": True}
+
+        self.store.update("confirm", token, _spend)
 
 
 def _scope_hash(account_id: str, action: str, params: dict[str, Any]) -> str:
-    stable = f"{account_id}|{action}|{repr(sorted(params.items(), key=lambda i: i[0]))}"
+    # The token itself is not part of the scope: the confirmed retry adds it to the payload.
+    scoped = sorted(
+        (i for i in params.items() if i[0] != "confirm_token"), key=lambda i: i[0]
+    )
+    stable = f"{account_id}|{action}|{repr(scoped)}"
     return hash_text(stable, 24)
 
 
+IDEMPOTENCY_TTL_SECONDS = 24 * 3600
+
+_STATUS_FIELD_RE = re.compile(rb"\b(UIDVALIDITY|UIDNEXT|HIGHESTMODSEQ) (\d+)")
+
+
+def _encode_sync_cursor(account_id: str, mailbox: str, state: dict[str, int]) -> str:
+    raw = json.dumps(
+        {
+            "v": 1,
+            "acct": account_id,
+            "mbox": mailbox,
+            "uv": int(state["uidvalidity"]),
+            "un": int(state["uidnext"]),
+            "ms": int(state.get("highestmodseq") or 0),
+        },
+        separators=(",", ":"),
+    )
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii")
+
+
+def _decode_sync_cursor(cursor: str, account_id: str, mailbox: str) -> dict[str, int] | None:
+    """Cursor -> sync state; None for legacy (account:timestamp) or foreign cursors."""
+    try:
+        row = json.loads(base64.urlsafe_b64decode(cursor.encode("ascii")))
+    except Exception:  # noqa: BLE001
+        return None
+    if not isinstance(row, dict) or row.get("v") != 1:
+        return None
+    if row.get("acct") != account_id or row.get("mbox") != mailbox:
+        raise MailControlError(
+            "INVALID_ARGUMENT", "Sync cursor belongs to another account or mailbox."
+        )
+    try:
+        return {
+            "uidvalidity": int(row["uv"]),
+            "uidnext": int(row["un"]),
+            "highestmodseq": int(row.get("ms") or 0),
+        }
+    except (KeyError, TypeError, ValueError):
+        return None
+
+
+class SyncStateStore:
+    """
+    Per (account, mailbox) sync state in one JSON file, rewritten atomically under an
+    exclusive lock so concurrent CLI runs do not lose each other's cursors.
+    """
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+
+    @contextmanager
+    def _locked(self) -> Iterator[None]:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with open(self.path.with_suffix(".lock"), "a+") as lock:
+            try:
+                import fcntl
+
+                fcntl.flock(lock.fileno(), fcntl.LOCK_EX)
+            except ImportError:
+                pass
+            yield
+
+    def _read(self) -> dict[str, Any]:
+        try:
+            data = json.loads(self.path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return {}
+        return data if isinstance(data, dict) else {}
+
+    @staticmethod
+    def _key(account_id: str, mailbox: str) -> str:
+        return f"{account_id}\n{mailbox}"
+
+    def get(self, account_id: str, mailbox: str) -> dict[str, int] | None:
+        row = self._read().get(self._key(account_id, mailbox))
+        return row if isinstance(row, dict) else None
+
+    def put(self, account_id: str, mailbox: str, state: dict[str, int]) -> None:
+        with self._locked():
+            data = self._read()
+            data[self._key(account_id, mailbox)] = {
+                "uidvalidity": int(state["uidvalidity"]),
+                "uidnext": int(state["uidnext"]),
+                "highestmodseq": int(state.get("highestmodseq") or 0),
+                "updated_at": int(time.time()),
+            }
+            tmp = self.path.with_suffix(f".{uuid.uuid4().hex}.tmp")
+            tmp.write_text(json.dumps(data, indent=1, sort_keys=True), encoding="utf-8")
+            tmp.replace(self.path)
+
+
+def default_state_dir() -> Path:
+    import os
+
+    env = os.getenv("MAIL_PROTOCOL_STATE_DIR")
+    if env:
+        return Path(env).expanduser()
+    base = os.getenv("XDG_STATE_HOME") or str(Path.home() / ".local" / "state")
+    return Path(base) / "localsetup-mail"
+
+
 def _split_content_type(value: str) -> tuple[str, str]:
     raw = sanitize_text(value, 128).lower()
     if "/" not in raw:
@@ -268,64 +563,189 @@ def _parse_attachment_inputs(payload: dict[str, Any]) -> list[dict[str, Any]]:
     return decoded_rows
 
 
+class _TrackedSmtpMixin:
+    """Records whether DATA was issued, i.e. whether a failed send may have been delivered."""
+
+    data_started = False
+
+    def data(self, msg: Any) -> tuple[int, bytes]:
+        self.data_started = True
+        return super().data(msg)  # type: ignore[misc]
+
+
+class _TrackedSMTP(_TrackedSmtpMixin, smtplib.SMTP):
+    pass
+
+
+class _TrackedSMTP_SSL(_TrackedSmtpMixin, smtplib.SMTP_SSL):
+    pass
+
+
+def _smtp_retryable(exc: BaseException) -> bool:
+    """Dead or closing session (disconnect, 421, socket timeout/reset): worth one fresh try."""
+    if isinstance(exc, smtplib.SMTPServerDisconnected):
+        return True
+    if isinstance(exc, smtplib.SMTPResponseException):
+        return exc.smtp_code == 421
+    if isinstance(exc, smtplib.SMTPRecipientsRefused):
+        codes = [row[0] for row in exc.recipients.values()]
+        return bool(codes) and all(code == 421 for code in codes)
+    if isinstance(exc, smtplib.SMTPException):
+        return False
+    return isinstance(exc, OSError)
+
+
 class SmtpAdapter:
-    def __init__(self, timeout_seconds: int = 20):
+    def __init__(
+        self, timeout_seconds: int = 20, pool: SmtpConnectionPool | None = None
+    ):
         self.timeout_seconds = timeout_seconds
-
-    def verify_connectivity(
-        self, account: AccountConfig, creds: dict[str, str]
-    ) -> dict[str, Any]:
+        self.pool = pool or SmtpConnectionPool()
+        self._ssl_context: ssl.SSLContext | None = None
+        self._ssl_lock = threading.Lock()
+
+    def _tls_context(self) -> ssl.SSLContext:
+        # Building a default context loads the CA bundle; do it once per adapter.
+        with self._ssl_lock:
+            if self._ssl_context is None:
+                self._ssl_context = ssl.create_default_context()
+            return self._ssl_context
+
+    def _connect(self, account: AccountConfig, creds: dict[str, str]) -> smtplib.SMTP:
         mode = sanitize_text(account.smtp_tls_mode, 16).lower() or "starttls"
         if mode == "ssl":
-            with smtplib.SMTP_SSL(
+            client: smtplib.SMTP = _TrackedSMTP_SSL(
+                account.smtp_host,
+                account.smtp_port,
+                timeout=self.timeout_seconds,
+                context=self._tls_context(),
+            )
+        else:
+            client = _TrackedSMTP(
                 account.smtp_host, account.smtp_port, timeout=self.timeout_seconds
-            ) as client:
-                client.login(creds["username"], creds["password"])
-                return {"mode": "ssl", "features": list(client.esmtp_features.keys())}
-        with smtplib.SMTP(
-            account.smtp_host, account.smtp_port, timeout=self.timeout_seconds
-        ) as client:
-            client.ehlo()
-            if mode == "starttls":
-                ctx = ssl.create_default_context()
-                code, _ = client.starttls(context=ctx)
-                if code != 220:
-                    raise MailControlError(
-                        "TLS_NEGOTIATION_FAILED", "SMTP STARTTLS negotiation failed."
-                    )
+            )
+        try:
+            if mode != "ssl":
                 client.ehlo()
+                if mode == "starttls":
+                    code, _ = client.starttls(context=self._tls_context())
+                    if code != 220:
+                        raise MailControlError(
+                            "TLS_NEGOTIATION_FAILED", "SMTP STARTTLS negotiation failed."
+                        )
+                    client.ehlo()
             client.login(creds["username"], creds["password"])
-            return {"mode": mode, "features": list(client.esmtp_features.keys())}
+        except BaseException:
+            client.close()
+            raise
+        return client
+
+    def _key(self, account: AccountConfig, creds: dict[str, str]) -> tuple[Any, ...]:
+        return (
+            account.account_id,
+            account.smtp_host,
+            account.smtp_port,
+            sanitize_text(account.smtp_tls_mode, 16).lower() or "starttls",
+            creds.get("username", ""),
+            hash_text(creds.get("password", ""), 16),
+        )
+
+    def _finish(self, entry: _PooledSession, exc: BaseException | None = None) -> None:
+        # Refusals (5xx, smtplib has sent RSET) leave the session usable; anything else may
+        # have left it mid-transaction.
+        if exc is None or (
+            isinstance(exc, smtplib.SMTPException)
+            and not _smtp_retryable(exc)
+            and getattr(entry.client, "sock", None) is not None
+        ):
+            self.pool.release(entry)
+        else:
+            self.pool.discard(entry)
+
+    def close(self) -> None:
+        self.pool.close_all()
+
+    def verify_connectivity(
+        self, account: AccountConfig, creds: dict[str, str]
+    ) -> dict[str, Any]:
+        mode = sanitize_text(account.smtp_tls_mode, 16).lower() or "starttls"
+        entry = self.pool.acquire(
+            self._key(account, creds), lambda: self._connect(account, creds)
+        )
+        try:
+            features = list(entry.client.esmtp_features.keys())
+        except BaseException as exc:
+            self._finish(entry, exc)
+            raise
+        self._finish(entry)
+        return {"mode": mode, "features": features}
 
     def _send_prebuilt(
         self, account: AccountConfig, creds: dict[str, str], message: EmailMessage
     ) -> None:
-        mode = sanitize_text(account.smtp_tls_mode, 16).lower() or "starttls"
-        if mode == "ssl":
-            with smtplib.SMTP_SSL(
-                account.smtp_host, account.smtp_port, timeout=self.timeout_seconds
-            ) as client:
-                client.login(creds["username"], creds["password"])
+        """
+        Send over the pooled session for this account. A session found dead (disconnect,
+        421, timeout) before DATA is replaced and the send retried once; after DATA the
+        error is raised, since the relay may already have accepted the message.
+        """
+        key = self._key(account, creds)
+        for attempt in (1, 2):
+            entry = self.pool.acquire(key, lambda: self._connect(account, creds))
+            client = entry.client
+            client.data_started = False  # type: ignore[attr-defined]
+            try:
                 client.send_message(message)
+            except BaseException as exc:
+                self._finish(entry, exc)
+                if (
+                    attempt == 1
+                    and _smtp_retryable(exc)
+                    and not getattr(client, "data_started", True)
+                ):
+                    continue
+                raise
+            self._finish(entry)
             return
-        with smtplib.SMTP(
-            account.smtp_host, account.smtp_port, timeout=self.timeout_seconds
-        ) as client:
-            client.ehlo()
-            if mode == "starttls":
-                ctx = ssl.create_default_context()
-                code, _ = client.starttls(context=ctx)
-                if code != 220:
-                    raise MailControlError(
-                        "TLS_NEGOTIATION_FAILED", "SMTP STARTTLS negotiation failed."
-                    )
-                client.ehlo()
-            client.login(creds["username"], creds["password"])
-            client.send_message(message)
 
     def send_message(
         self, account: AccountConfig, creds: dict[str, str], payload: dict[str, Any]
     ) -> dict[str, Any]:
+        msg, result = self._build_message(payload)
+        self._send_prebuilt(account, creds, msg)
+        return result
+
+    def send_batch(
+        self,
+        account: AccountConfig,
+        creds: dict[str, str],
+        messages: list[dict[str, Any]],
+        stop_on_error: bool = False,
+    ) -> dict[str, Any]:
+        """Send each payload over the account's pooled session; per-message results in order."""
+        results: list[dict[str, Any]] = []
+        for index, payload in enumerate(messages):
+            try:
+                msg, row = self._build_message(payload)
+                self._send_prebuilt(account, creds, msg)
+                results.append({"index": index, "ok": True, **row})
+                continue
+            except MailControlError as exc:
+                results.append({"index": index, "ok": False, "code": exc.code, "message": exc.message})
+            except (smtplib.SMTPException, OSError) as exc:
+                results.append(
+                    {"index": index, "ok": False, "code": "SMTP_SEND_FAILED", "message": str(exc)[:500]}
+                )
+            if stop_on_error:
+                break
+        sent = sum(1 for row in results if row["ok"])
+        return {
+            "results": results,
+            "sent": sent,
+            "failed": len(results) - sent,
+            "skipped": len(messages) - len(results),
+        }
+
+    def _build_message(self, payload: dict[str, Any]) -> tuple[EmailMessage, dict[str, Any]]:
         missing = require_fields(payload, ["from", "to", "subject"])
         if missing:
             raise MailControlError(
@@ -367,8 +787,7 @@ class SmtpAdapter:
                 subtype=subtype,
                 filename=row["filename"],
             )
-        self._send_prebuilt(account, creds, msg)
-        return {"accepted": recipients, "attachment_count": len(parsed_attachments)}
+        return msg, {"accepted": recipients, "attachment_count": len(parsed_attachments)}
 
     def send_encrypted_payload(
         self,
@@ -401,9 +820,495 @@ class SmtpAdapter:
         return {"accepted": recipients, "encryption_mode": mode}
 
 
+_FETCH_UID_RE = re.compile(rb"\bUID (\d+)")
+
+
+def _parse_uid_fetch(data: list[Any]) -> dict[str, bytes]:
+    """
+    One UID FETCH response -> {uid: literal bytes}. imaplib yields (header, literal) tuples
+    followed by b")" closers; UID usually sits in the header but may trail the literal.
+    """
+    out: dict[str, bytes] = {}
+    pending: bytes | None = None
+    for part in data or []:
+        if isinstance(part, tuple) and len(part) > 1:
+            head = bytes(part[0] or b"")
+            literal = bytes(part[1] or b"")
+            match = _FETCH_UID_RE.search(head)
+            if match:
+                uid = match.group(1).decode("ascii")
+                out[uid] = out.get(uid, b"") + literal
+                pending = None
+            else:
+                pending = literal
+        elif isinstance(part, (bytes, bytearray)) and pending is not None:
+            match = _FETCH_UID_RE.search(bytes(part))
+            if match:
+                uid = match.group(1).decode("ascii")
+                out[uid] = out.get(uid, b"") + pending
+            pending = None
+    return out
+
+
+def _imap_caps(client: imaplib.IMAP4) -> set[str]:
+    """Upper-cased capability names (imaplib stores str; tolerate bytes)."""
+    return {
+        (c.decode("ascii", errors="replace") if isinstance(c, (bytes, bytearray)) else str(c)).upper()
+        for c in (client.capabilities or ())
+    }
+
+
+_SEXP_TOKEN_RE = re.compile(
+    rb'\s*(?:(\()|(\))|"((?:[^"\\]|\\.)*)"|\{\d+\}\s*$|([^\s()"{]+))'
+)
+_BINARY_SIZE_RE = re.compile(rb"\bBINARY\.SIZE\[[0-9.]*\] (\d+)")
+_IDENTITY_CTE = frozenset({"7bit", "8bit", "binary"})
+
+
+def _parse_fetch_sexp(data: list[Any]) -> list[Any]:
+    """
+    FETCH response lines -> nested lists. Quoted strings, literals (imaplib's (head, literal)
+    tuples) and atoms become str; NIL becomes None.
+    """
+    root: list[Any] = []
+    stack = [root]
+
+    def _feed(buf: bytes) -> None:
+        pos = 0
+        while True:
+            match = _SEXP_TOKEN_RE.match(buf, pos)
+            if not match or match.end() == pos:
+                return
+            pos = match.end()
+            if match.group(1):
+                node: list[Any] = []
+                stack[-1].append(node)
+                stack.append(node)
+            elif match.group(2):
+                if len(stack) > 1:
+                    stack.pop()
+            elif match.group(3) is not None:
+                text = re.sub(rb"\\(.)", rb"\1", match.group(3))
+                stack[-1].append(text.decode("utf-8", errors="replace"))
+            elif match.group(4):
+                atom = match.group(4).decode("utf-8", errors="replace")
+                stack[-1].append(None if atom.upper() == "NIL" else atom)
+
+    for part in data or []:
+        if isinstance(part, tuple) and len(part) > 1:
+            _feed(bytes(part[0] or b""))
+            stack[-1].append(bytes(part[1] or b"").decode("utf-8", errors="replace"))
+        elif isinstance(part, (bytes, bytearray)):
+            _feed(bytes(part))
+    return root
+
+
+def _sexp_pairs(node: Any) -> dict[str, str]:
+    if not isinstance(node, list):
+        return {}
+    return {
+        str(node[i]).lower(): str(node[i + 1] or "")
+        for i in range(0, len(node) - 1, 2)
+        if isinstance(node[i], str)
+    }
+
+
+def _bodystructure_attachments(node: list[Any], prefix: str = "") -> list[dict[str, Any]]:
+    """
+    Attachment leaves of a BODYSTRUCTURE in walk order, the same candidates get_attachment
+    picks from a parsed message: {part, content_type, encoding, size, filename}. Raises
+    ValueError for shapes resolved differently by the email package (message/rfc822 parts,
+    RFC 2231 parameters) so the caller can fall back to the whole message.
+    """
+    if node and isinstance(node[0], list):
+        # Leading lists are the children; the subtype and extension data follow.
+        out: list[dict[str, Any]] = []
+        for i, child in enumerate(node):
+            if not isinstance(child, list):
+                break
+            number = f"{prefix}.{i + 1}" if prefix else str(i + 1)
+            out.extend(_bodystructure_attachments(child, number))
+        return out
+    maintype = str(node[0] or "").lower()
+    subtype = str(node[1] or "").lower()
+    if maintype == "message" and subtype in ("rfc822", "global"):
+        raise ValueError("embedded message")
+    params = _sexp_pairs(node[2])
+    ext = 8 if maintype == "text" else 7
+    disposition = node[ext + 1] if len(node) > ext + 1 else None
+    disp_type = ""
+    disp_params: dict[str, str] = {}
+    if isinstance(disposition, list) and disposition:
+        disp_type = str(disposition[0] or "").lower()
+        disp_params = _sexp_pairs(disposition[1] if len(disposition) > 1 else None)
+    if any("*" in k for k in (*params, *disp_params)):
+        raise ValueError("RFC 2231 parameter")
+    filename = disp_params.get("filename") or params.get("name") or ""
+    if not filename and disp_type != "attachment":
+        return []
+    return [
+        {
+            "part": prefix or "1",
+            "content_type": f"{maintype}/{subtype}",
+            "encoding": str(node[5] or "7bit").lower(),
+            "size": int(node[6] or 0),
+            "filename": filename,
+        }
+    ]
+
+
+_IDLE_EVENT_RE = re.compile(r"^\* (\d+) (EXISTS|EXPUNGE|FETCH)\b", re.IGNORECASE)
+
+
+def _imap_idle(client: imaplib.IMAP4, timeout: float) -> list[str]:
+    """
+    RFC 2177 IDLE on an authenticated, selected client (imaplib < 3.14 has no idle()).
+    Returns untagged EXISTS/EXPUNGE/FETCH lines seen before timeout; stops at the first
+    burst. The reply stream is read unbuffered while idling so select() on the socket
+    (plus SSL pending()) is an exact readiness test; imaplib's file is restored after DONE.
+    """
+    import select
+
+    sock = client.sock
+    buffered = client.file
+    raw = sock.makefile("rb", buffering=0)
+    client.file = raw
+    tag = client._new_tag()  # noqa: SLF001 - imaplib has no public tag API
+
+    def _ready(wait: float) -> bool:
+        pending = getattr(sock, "pending", None)
+        if callable(pending) and pending() > 0:
+            return True
+        return bool(select.select([sock], [], [], max(0.0, wait))[0])
+
+    def _line() -> str:
+        line = raw.readline()
+        if not line:
+            raise imaplib.IMAP4.abort("connection closed during IDLE")
+        return line.decode("utf-8", errors="replace").rstrip("\r\n")
+
+    events: list[str] = []
+    try:
+        client.send(tag + b" IDLE\r\n")
+        first = _line()
+        if not first.startswith("+"):
+            raise MailControlError("IMAP_IDLE_FAILED", f"IDLE refused: {first[:200]}")
+        deadline = time.monotonic() + timeout
+        while True:
+            # After the first event only linger briefly to pick up the rest of the burst.
+            wait = 0.2 if events else deadline - time.monotonic()
+            if wait <= 0 or not _ready(wait):
+                break
+            text = _line()
+            if text.upper().startswith("* BYE"):
+                raise imaplib.IMAP4.abort(text)
+            if _IDLE_EVENT_RE.match(text):
+                events.append(text[2:])
+        client.send(b"DONE\r\n")
+        while True:
+            text = _line()
+            if text.startswith(tag.decode("ascii")):
+                if " OK" not in text.upper():
+                    raise MailControlError("IMAP_IDLE_FAILED", text[:200])
+                break
+            if _IDLE_EVENT_RE.match(text):
+                events.append(text[2:])
+    finally:
+        client.file = buffered
+        raw.close()
+    return events
+
+
+class _PooledSession:
+    __slots__ = ("client", "key", "selected", "uidvalidity", "last_used", "reused")
+
+    def __init__(self, client: imaplib.IMAP4, key: tuple[Any, ...]):
+        self.client = client
+        self.key = key
+        self.selected: tuple[str, bool] | None = None
+        self.uidvalidity = 0
+        self.last_used = time.monotonic()
+        self.reused = False
+
+
+class ImapConnectionPool:
+    """
+    Authenticated IMAP sessions kept per (account, host, port, user) across calls. A session
+    idle longer than keepalive_seconds is NOOP-probed before reuse and replaced if dead; idle
+    longer than max_idle_seconds it is logged out (servers drop idle clients after ~30 min).
+    The selected mailbox is remembered so repeated calls on one folder skip SELECT.
+    """
+
+    def __init__(
+        self,
+        max_idle_per_key: int = 2,
+        keepalive_seconds: float = 30.0,
+        max_idle_seconds: float = 600.0,
+    ):
+        self.max_idle_per_key = max_idle_per_key
+        self.keepalive_seconds = keepalive_seconds
+        self.max_idle_seconds = max_idle_seconds
+        self._lock = threading.Lock()
+        self._idle: dict[tuple[Any, ...], list[_PooledSession]] = {}
+
+    @staticmethod
+    def _logout(client: imaplib.IMAP4) -> None:
+        try:
+            client.logout()
+        except Exception:  # noqa: BLE001
+            pass
+
+    @staticmethod
+    def _alive(client: imaplib.IMAP4) -> bool:
+        try:
+            status, _ = client.noop()
+        except (imaplib.IMAP4.error, OSError, EOFError):
+            return False
+        return status == "OK"
+
+    @staticmethod
+    def _reset(client: imaplib.IMAP4) -> None:
+        client.untagged_responses.clear()
+
+    def acquire(
+        self, key: tuple[Any, ...], connect: Callable[[], imaplib.IMAP4]
+    ) -> _PooledSession:
+        while True:
+            with self._lock:
+                idle = self._idle.get(key) or []
+                entry = idle.pop() if idle else None
+            if entry is None:
+                return _PooledSession(connect(), key)
+            age = time.monotonic() - entry.last_used
+            if age > self.max_idle_seconds:
+                self._logout(entry.client)
+                continue
+            if age > self.keepalive_seconds and not self._alive(entry.client):
+                self._logout(entry.client)
+                continue
+            entry.reused = True
+            return entry
+
+    def release(self, entry: _PooledSession) -> None:
+        entry.last_used = time.monotonic()
+        self._reset(entry.client)
+        with self._lock:
+            idle = self._idle.setdefault(entry.key, [])
+            if len(idle) < self.max_idle_per_key:
+                idle.append(entry)
+                return
+        self._logout(entry.client)
+
+    def discard(self, entry: _PooledSession) -> None:
+        self._logout(entry.client)
+
+    def close_all(self) -> None:
+        with self._lock:
+            entries = [e for rows in self._idle.values() for e in rows]
+            self._idle.clear()
+        for entry in entries:
+            self._logout(entry.client)
+
+
+class SmtpConnectionPool(ImapConnectionPool):
+    """
+    Authenticated SMTP sessions per (account, host, port, user). Relays commonly drop idle
+    clients after 5 min, so the idle cap is lower than for IMAP; NOOP is the liveness probe.
+    """
+
+    def __init__(
+        self,
+        max_idle_per_key: int = 1,
+        keepalive_seconds: float = 30.0,
+        max_idle_seconds: float = 240.0,
+    ):
+        super().__init__(max_idle_per_key, keepalive_seconds, max_idle_seconds)
+
+    @staticmethod
+    def _logout(client: smtplib.SMTP) -> None:  # type: ignore[override]
+        try:
+            client.quit()
+        except Exception:  # noqa: BLE001
+            client.close()
+
+    @staticmethod
+    def _alive(client: smtplib.SMTP) -> bool:  # type: ignore[override]
+        try:
+            code, _ = client.noop()
+        except (smtplib.SMTPException, OSError):
+            return False
+        return code == 250
+
+    @staticmethod
+    def _reset(client: smtplib.SMTP) -> None:  # type: ignore[override]
+        pass
+
+
+class AttachmentPartCache:
+    """
+    Decoded attachment parts keyed by (account, mailbox, UIDVALIDITY, UID, part), plus each
+    message's attachment part list. UIDVALIDITY in the key keeps a reset mailbox from serving
+    stale bytes. With path=None this is a small in-process LRU; with a path, one 0600 file per
+    entry that survives restarts, least recently read evicted once past max_bytes.
+
+    Parts larger than max_bytes // 4 (the ones that matter most: a 50 MB base64 part is costly
+    to re-download per chunk) spill to 0600 files in a separate directory bounded by
+    spill_max_bytes: <path>/large when persistent, else a private temp dir removed on close().
+    Only a part larger than spill_max_bytes itself is not cached.
+    """
+
+    def __init__(
+        self,
+        path: Path | None = None,
+        max_bytes: int = 64 * 1024 * 1024,
+        spill_max_bytes: int = 1024 * 1024 * 1024,
+    ):
+        self.path = Path(path) if path else None
+        self.max_bytes = max_bytes
+        self.spill_max_bytes = spill_max_bytes
+        self._lock = threading.Lock()
+        self._mem: OrderedDict[str, bytes] = OrderedDict()
+        self._mem_bytes = 0
+        self._spill_tmp: tempfile.TemporaryDirectory[str] | None = None
+
+    @property
+    def persistent(self) -> bool:
+        return self.path is not None
+
+    @staticmethod
+    def _name(key: tuple[Any, ...], kind: str) -> str:
+        raw = "\0".join(str(k) for k in key).encode("utf-8", errors="surrogateescape")
+        return f"{hashlib.sha256(raw).hexdigest()}.{kind}"
+
+    def _spill_dir(self, create: bool) -> Path | None:
+        if self.path is not None:
+            return self.path / "large"
+        with self._lock:
+            if self._spill_tmp is None and create:
+                self._spill_tmp = tempfile.TemporaryDirectory(prefix="mail-parts-")
+            return Path(self._spill_tmp.name) if self._spill_tmp else None
+
+    @staticmethod
+    def _load_file(target: Path, offset: int, length: int) -> tuple[bytes, int] | None:
+        try:
+            with open(target, "rb") as f:
+                size = os.fstat(f.fileno()).st_size
+                f.seek(offset)
+                data = f.read() if length < 0 else f.read(length)
+            os.utime(target)
+        except OSError:
+            return None
+        return data, size
+
+    def _load(self, name: str, offset: int = 0, length: int = -1) -> tuple[bytes, int] | None:
+        """(bytes[offset:offset+length], total size) or None on a miss."""
+        if self.path is None:
+            with self._lock:
+                blob = self._mem.get(name)
+                if blob is not None:
+                    self._mem.move_to_end(name)
+            if blob is not None:
+                end = len(blob) if length < 0 else offset + length
+                return blob[offset:end], len(blob)
+        else:
+            hit = self._load_file(self.path / name, offset, length)
+            if hit is not None:
+                return hit
+        spill = self._spill_dir(create=False)
+        return self._load_file(spill / name, offset, length) if spill else None
+
+    def _store(self, name: str, blob: bytes) -> None:
+        if len(blob) > self.max_bytes // 4:
+            if len(blob) <= self.spill_max_bytes:
+                spill = self._spill_dir(create=True)
+                if spill is not None:
+                    self._write_file(spill, name, blob, self.spill_max_bytes)
+            return
+        if self.path is None:
+            with self._lock:
+                old = self._mem.pop(name, None)
+                self._mem_bytes -= len(old) if old is not None else 0
+                self._mem[name] = blob
+                self._mem_bytes += len(blob)
+                while self._mem_bytes > self.max_bytes and self._mem:
+                    _, dropped = self._mem.popitem(last=False)
+                    self._mem_bytes -= len(dropped)
+            return
+        self._write_file(self.path, name, blob, self.max_bytes)
+
+    def _write_file(self, directory: Path, name: str, blob: bytes, limit: int) -> None:
+        try:
+            directory.mkdir(mode=0o700, parents=True, exist_ok=True)
+            tmp = directory / f".{name}.{uuid.uuid4().hex}.tmp"
+            fd = os.open(tmp, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+            with os.fdopen(fd, "wb") as f:
+                f.write(blob)
+            os.replace(tmp, directory / name)
+            self._evict(directory, limit)
+        except OSError:
+            pass
+
+    @staticmethod
+    def _evict(directory: Path, limit: int) -> None:
+        rows: list[tuple[float, int, str]] = []
+        with os.scandir(directory) as it:
+            for e in it:
+                try:
+                    if not e.is_file(follow_symlinks=False):
+                        continue
+                    st = e.stat(follow_symlinks=False)
+                except OSError:
+                    continue
+                rows.append((st.st_mtime, st.st_size, e.path))
+        total = sum(r[1] for r in rows)
+        for _mtime, size, path in sorted(rows):
+            if total <= limit:
+                break
+            try:
+                os.unlink(path)
+                total -= size
+            except OSError:
+                pass
+
+    def close(self) -> None:
+        """Drop the in-process tiers (memory LRU and temp spill dir); persistent files stay."""
+        with self._lock:
+            self._mem.clear()
+            self._mem_bytes = 0
+            spill, self._spill_tmp = self._spill_tmp, None
+        if spill is not None:
+            spill.cleanup()
+
+    def get_parts(self, key: tuple[Any, ...]) -> list[dict[str, Any]] | None:
+        hit = self._load(self._name(key, "parts"))
+        if hit is None:
+            return None
+        try:
+            rows = json.loads(hit[0])
+        except ValueError:
+            return None
+        return rows if isinstance(rows, list) else None
+
+    def put_parts(self, key: tuple[Any, ...], rows: list[dict[str, Any]]) -> None:
+        self._store(self._name(key, "parts"), json.dumps(rows).encode("utf-8"))
+
+    def read(self, key: tuple[Any, ...], offset: int, length: int) -> tuple[bytes, int] | None:
+        return self._load(self._name(key, "part"), offset, length)
+
+    def put(self, key: tuple[Any, ...], data: bytes) -> None:
+        self._store(self._name(key, "part"), data)
+
+
 class ImapAdapter:
-    def __init__(self, timeout_seconds: int = 30):
+    def __init__(
+        self,
+        timeout_seconds: int = 30,
+        pool: ImapConnectionPool | None = None,
+        part_cache: AttachmentPartCache | None = None,
+    ):
         self.timeout_seconds = timeout_seconds
+        self.pool = pool or ImapConnectionPool()
+        self.part_cache = part_cache or AttachmentPartCache()
 
     def _connect(self, account: AccountConfig, creds: dict[str, str]) -> imaplib.IMAP4:
         if account.imap_tls:
@@ -419,6 +1324,111 @@ class ImapAdapter:
             raise MailControlError("AUTH_FAILED", "IMAP authentication failed.")
         return client
 
+    @contextmanager
+    def _session(
+        self,
+        account: AccountConfig,
+        creds: dict[str, str],
+        mailbox: str | None = None,
+        readonly: bool = True,
+        keep_selected: bool = True,
+    ) -> Iterator[imaplib.IMAP4]:
+        with self._pooled(account, creds, mailbox, readonly, keep_selected) as entry:
+            yield entry.client
+
+    @contextmanager
+    def _pooled(
+        self,
+        account: AccountConfig,
+        creds: dict[str, str],
+        mailbox: str | None = None,
+        readonly: bool = True,
+        keep_selected: bool = True,
+    ) -> Iterator[_PooledSession]:
+        """
+        Pooled client, logged in and (when mailbox is given) with mailbox selected. A reused
+        session that turns out dead at SELECT is replaced once; a connection error inside the
+        block drops the session (the operation is not replayed). keep_selected=False forgets
+        the selection afterwards (mailbox renamed/deleted).
+        """
+        key = (
+            account.account_id,
+            account.imap_host,
+            account.imap_port,
+            account.imap_tls,
+            creds.get("username", ""),
+            hash_text(creds.get("password", ""), 16),
+        )
+        entry = self.pool.acquire(key, lambda: self._connect(account, creds))
+        if mailbox is not None:
+            try:
+                self._select(entry, mailbox, readonly)
+            except (imaplib.IMAP4.abort, OSError, EOFError):
+                self.pool.discard(entry)
+                if not entry.reused:
+                    raise
+                entry = _PooledSession(self._connect(account, creds), key)
+                try:
+                    self._select(entry, mailbox, readonly)
+                except BaseException:
+                    self.pool.release(entry)
+                    raise
+            except BaseException:
+                self.pool.release(entry)
+                raise
+        try:
+            yield entry
+        except (imaplib.IMAP4.abort, OSError, EOFError):
+            self.pool.discard(entry)
+            raise
+        except BaseException:
+            self.pool.release(entry)
+            raise
+        else:
+            if not keep_selected:
+                entry.selected = None
+            self.pool.release(entry)
+
+    @staticmethod
+    def _select(entry: _PooledSession, mailbox: str, readonly: bool) -> None:
+        if entry.selected == (mailbox, readonly):
+            return
+        entry.selected = None
+        status, _ = entry.client.select(mailbox, readonly=readonly)
+        if status != "OK":
+            raise MailControlError(
+                "IMAP_SELECT_FAILED", f"Cannot select mailbox: {mailbox}"
+            )
+        uidvalidity = entry.client.untagged_responses.get("UIDVALIDITY") or [b"0"]
+        try:
+            entry.uidvalidity = int(uidvalidity[-1])
+        except (TypeError, ValueError):
+            entry.uidvalidity = 0
+        entry.selected = (mailbox, readonly)
+
+    def _reselect_status(self, entry: _PooledSession) -> dict[str, int]:
+        """UIDVALIDITY/UIDNEXT/HIGHESTMODSEQ for the mailbox entry already has selected."""
+        mailbox, readonly = entry.selected or ("INBOX", True)
+        client = entry.client
+        client.untagged_responses.clear()
+        status, _ = client.noop()
+        if status != "OK":
+            raise MailControlError("IMAP_STATUS_FAILED", f"NOOP failed: {mailbox}")
+        # UIDNEXT/HIGHESTMODSEQ are only reported as SELECT/EXAMINE response codes.
+        entry.selected = None
+        self._select(entry, mailbox, readonly)
+        found: dict[str, int] = {}
+        for name in ("UIDVALIDITY", "UIDNEXT", "HIGHESTMODSEQ"):
+            try:
+                found[name] = int((client.untagged_responses.get(name) or [])[-1])
+            except (IndexError, TypeError, ValueError):
+                continue
+        return found
+
+    def close(self) -> None:
+        self.pool.close_all()
+        self.part_cache.close()
+
     def _fetch_message_object(
         self, client: imaplib.IMAP4, uid: str, fetch_spec: str = "(BODY.PEEK[] FLAGS)"
     ) -> email.message.Message:
@@ -438,19 +1448,13 @@ class ImapAdapter:
     def get_capabilities(
         self, account: AccountConfig, creds: dict[str, str]
     ) -> dict[str, Any]:
-        with self._connect(account, creds) as client:
-            caps = sorted(
-                [
-                    c.decode("utf-8", errors="replace")
-                    for c in (client.capabilities or [])
-                ]
-            )
-            return {"capabilities": caps}
+        with self._session(account, creds) as client:
+            return {"capabilities": sorted(_imap_caps(client))}
 
     def list_mailboxes(
         self, account: AccountConfig, creds: dict[str, str]
     ) -> dict[str, Any]:
-        with self._connect(account, creds) as client:
+        with self._session(account, creds) as client:
             status, data = client.list()
             if status != "OK":
                 raise MailControlError("IMAP_LIST_FAILED", "Unable to list mailboxes.")
@@ -466,22 +1470,27 @@ class ImapAdapter:
         query = sanitize_text(payload.get("query", "ALL"), 256)
         lim = clamp_int(payload.get("lim"), 25, 1, 100)
         offset = clamp_int(payload.get("offset"), 0, 0, 1_000_000)
-        with self._connect(account, creds) as client:
-            status, _ = client.select(mailbox, readonly=True)
-            if status != "OK":
-                raise MailControlError(
-                    "IMAP_SELECT_FAILED", f"Cannot select mailbox: {mailbox}"
-                )
+        with self._session(account, creds, mailbox) as client:
             status, data = client.uid("SEARCH", None, query)
             if status != "OK":
                 raise MailControlError("IMAP_SEARCH_FAILED", "Search failed.")
             uids = (data[0] or b"").decode("utf-8", errors="replace").split()
             window = uids[offset : offset + lim]
+            raw_by_uid: dict[str, bytes] = {}
+            if window:
+                f_status, f_data = client.uid(
+                    "FETCH",
+                    ",".join(window),
+                    "(UID BODY.PEEK[HEADER.FIELDS (FROM SUBJECT DATE)] FLAGS)",
+                )
+                if f_status != "OK":
+                    raise MailControlError(
+                        "IMAP_FETCH_FAILED", f"Unable to fetch {len(window)} headers."
+                    )
+                raw_by_uid = _parse_uid_fetch(f_data)
             items: list[dict[str, Any]] = []
             for uid in window:
-                msg = self._fetch_message_object(
-                    client, uid, "(BODY.PEEK[HEADER.FIELDS (FROM SUBJECT DATE)] FLAGS)"
-                )
+                msg = email.message_from_bytes(raw_by_uid.get(uid, b""))
                 items.append(
                     {
                         "id": uid,
@@ -514,12 +1523,7 @@ class ImapAdapter:
         )
         if not uid:
             raise MailControlError("INVALID_ARGUMENT", "Message id is required.")
-        with self._connect(account, creds) as client:
-            status, _ = client.select(mailbox, readonly=True)
-            if status != "OK":
-                raise MailControlError(
-                    "IMAP_SELECT_FAILED", f"Cannot select mailbox: {mailbox}"
-                )
+        with self._session(account, creds, mailbox) as client:
             fetch_spec = (
                 "(BODY.PEEK[] FLAGS)"
                 if detail
@@ -586,6 +1590,12 @@ class ImapAdapter:
     def get_attachment(
         self, account: AccountConfig, creds: dict[str, str], payload: dict[str, Any]
     ) -> dict[str, Any]:
+        """
+        One chunk of one attachment. The part is located from BODYSTRUCTURE and only its bytes
+        are fetched: a BODY.PEEK[part]<offset.len> range when the transfer encoding is identity,
+        a BINARY.PEEK range (RFC 3516) when the server decodes, otherwise the whole encoded part
+        once into part_cache. Shapes BODYSTRUCTURE cannot address fall back to the full message.
+        """
         mailbox = sanitize_text(payload.get("mailbox", "INBOX"), 128)
         uid = sanitize_text(payload.get("id"), 64)
         attachment_index = clamp_int(payload.get("attachment_index"), -1, -1, 10_000)
@@ -595,46 +1605,273 @@ class ImapAdapter:
             raise MailControlError("INVALID_ARGUMENT", "attachment_index is required.")
         chunk_size = clamp_int(payload.get("chunk_size"), 256 * 1024, 1024, 1024 * 1024)
         offset = clamp_int(payload.get("offset"), 0, 0, 1_000_000_000)
-        with self._connect(account, creds) as client:
-            status, _ = client.select(mailbox, readonly=True)
-            if status != "OK":
-                raise MailControlError(
-                    "IMAP_SELECT_FAILED", f"Cannot select mailbox: {mailbox}"
-                )
-            msg = self._fetch_message_object(
-                client, uid, fetch_spec="(BODY.PEEK[] FLAGS)"
+        with self._pooled(account, creds, mailbox) as entry:
+            client = entry.client
+            msg_key = (
+                (account.account_id, mailbox, entry.uidvalidity, uid)
+                if entry.uidvalidity
+                else None
             )
-            candidates: list[email.message.Message] = []
-            for part in msg.walk():
-                if part.is_multipart():
-                    continue
-                disp = str(part.get("Content-Disposition", "")).lower()
-                filename = part.get_filename()
-                if filename or "attachment" in disp:
-                    candidates.append(part)
-            if attachment_index >= len(candidates):
+            parts = self.part_cache.get_parts(msg_key) if msg_key else None
+            if parts is None:
+                parts = self._attachment_parts(client, uid)
+                if parts is not None and msg_key:
+                    self.part_cache.put_parts(msg_key, parts)
+            if parts is None:
+                return self._attachment_from_message(
+                    client, uid, attachment_index, offset, chunk_size
+                )
+            if attachment_index >= len(parts):
                 raise MailControlError(
                     "ATTACHMENT_NOT_FOUND", "attachment_index out of range."
                 )
-            target = candidates[attachment_index]
-            content = target.get_payload(decode=True) or b""
-            end = min(len(content), offset + chunk_size)
-            chunk = content[offset:end]
-            filename = sanitize_text(
-                target.get_filename() or f"attachment-{attachment_index}", 256
+            target = parts[attachment_index]
+            chunk, size = self._read_part(client, msg_key, uid, target, offset, chunk_size)
+        end = offset + len(chunk)
+        return {
+            "id": uid,
+            "attachment_index": attachment_index,
+            "filename": sanitize_text(
+                target["filename"] or f"attachment-{attachment_index}", 256
+            ),
+            "content_type": target["content_type"],
+            "size": size,
+            "offset": offset,
+            "chunk_size": len(chunk),
+            "content_bytes_base64": base64.b64encode(chunk).decode("utf-8"),
+            "next_offset": end if end < size else None,
+            "done": end >= size,
+        }
+
+    @staticmethod
+    def _attachment_parts(client: imaplib.IMAP4, uid: str) -> list[dict[str, Any]] | None:
+        f_status, f_data = client.uid("FETCH", uid, "(UID BODYSTRUCTURE)")
+        if f_status != "OK":
+            raise MailControlError("IMAP_FETCH_FAILED", f"Unable to fetch uid={uid}")
+        try:
+            for row in _parse_fetch_sexp(f_data):
+                if not isinstance(row, list):
+                    continue
+                for i, item in enumerate(row[:-1]):
+                    if isinstance(item, str) and item.upper() == "BODYSTRUCTURE":
+                        return _bodystructure_attachments(row[i + 1])
+        except (IndexError, TypeError, ValueError):
+            return None
+        return None
+
+    @staticmethod
+    def _fetch_section(client: imaplib.IMAP4, uid: str, spec: str) -> tuple[bytes, list[Any]]:
+        f_status, f_data = client.uid("FETCH", uid, spec)
+        if f_status != "OK":
+            raise MailControlError("IMAP_FETCH_FAILED", f"Unable to fetch uid={uid}")
+        return _parse_uid_fetch(f_data).get(uid, b""), f_data or []
+
+    def _read_part(
+        self,
+        client: imaplib.IMAP4,
+        msg_key: tuple[Any, ...] | None,
+        uid: str,
+        target: dict[str, Any],
+        offset: int,
+        length: int,
+    ) -> tuple[bytes, int]:
+        """(decoded bytes[offset:offset+length], decoded part size)."""
+        part = target["part"]
+        key = (*msg_key, part) if msg_key else None
+        if key:
+            hit = self.part_cache.read(key, offset, length)
+            if hit is not None:
+                return hit
+        # A persistent cache is filled whole on first touch so later chunks and re-downloads
+        # never go back to the server; otherwise fetch just the requested range when possible.
+        ranged = not (key and self.part_cache.persistent)
+        if ranged and target["encoding"] in _IDENTITY_CTE:
+            data, _ = self._fetch_section(
+                client, uid, f"(UID BODY.PEEK[{part}]<{offset}.{length}>)"
             )
-            return {
-                "id": uid,
-                "attachment_index": attachment_index,
-                "filename": filename,
-                "content_type": target.get_content_type(),
-                "size": len(content),
-                "offset": offset,
-                "chunk_size": len(chunk),
-                "content_bytes_base64": base64.b64encode(chunk).decode("utf-8"),
-                "next_offset": end if end < len(content) else None,
-                "done": end >= len(content),
-            }
+            return data, int(target["size"])
+        if ranged and "BINARY" in _imap_caps(client):
+            try:
+                data, f_data = self._fetch_section(
+                    client, uid, f"(UID BINARY.PEEK[{part}]<{offset}.{length}> BINARY.SIZE[{part}])"
+                )
+            except MailControlError:
+                data, f_data = b"", []  # e.g. UNKNOWN-CTE; decode locally instead
+            for line in f_data:
+                head = line[0] if isinstance(line, tuple) else line
+                match = _BINARY_SIZE_RE.search(bytes(head or b""))
+                if match:
+                    return data, int(match.group(1))
+        raw, _ = self._fetch_section(client, uid, f"(UID BODY.PEEK[{part}])")
+        if target["encoding"] in _IDENTITY_CTE:
+            decoded = raw
+        else:
+            holder = email.message_from_bytes(
+                f"Content-Transfer-Encoding: {target['encoding']}\r\n\r\n".encode("ascii", "replace")
+                + raw
+            )
+            decoded = holder.get_payload(decode=True) or b""
+        if key:
+            self.part_cache.put(key, decoded)
+        return decoded[offset : offset + length], len(decoded)
+
+    def _attachment_from_message(
+        self,
+        client: imaplib.IMAP4,
+        uid: str,
+        attachment_index: int,
+        offset: int,
+        chunk_size: int,
+    ) -> dict[str, Any]:
+        msg = self._fetch_message_object(client, uid, fetch_spec="(BODY.PEEK[] FLAGS)")
+        candidates: list[email.message.Message] = []
+        for part in msg.walk():
+            if part.is_multipart():
+                continue
+            disp = str(part.get("Content-Disposition", "")).lower()
+            filename = part.get_filename()
+            if filename or "attachment" in disp:
+                candidates.append(part)
+        if attachment_index >= len(candidates):
+            raise MailControlError(
+                "ATTACHMENT_NOT_FOUND", "attachment_index out of range."
+            )
+        target = candidates[attachment_index]
+        content = target.get_payload(decode=True) or b""
+        end = min(len(content), offset + chunk_size)
+        chunk = content[offset:end]
+        filename = sanitize_text(
+            target.get_filename() or f"attachment-{attachment_index}", 256
+        )
+        return {
+            "id": uid,
+            "attachment_index": attachment_index,
+            "filename": filename,
+            "content_type": target.get_content_type(),
+            "size": len(content),
+            "offset": offset,
+            "chunk_size": len(chunk),
+            "content_bytes_base64": base64.b64encode(chunk).decode("utf-8"),
+            "next_offset": end if end < len(content) else None,
+            "done": end >= len(content),
+        }
+
+    def sync_changes(
+        self, account: AccountConfig, creds: dict[str, str], payload: dict[str, Any]
+    ) -> dict[str, Any]:
+        """
+        Delta since payload["since"] ({uidvalidity, uidnext, highestmodseq} or None).
+        One STATUS answers "nothing changed"; otherwise new UIDs come from UID SEARCH over
+        uidnext:* and, with CONDSTORE, flag changes on older UIDs from SEARCH MODSEQ.
+        STATUS must not target the selected mailbox (RFC 3501 6.3.10), so when the pooled
+        session still has it selected the cursor comes from NOOP + a fresh SELECT/EXAMINE.
+        A UIDVALIDITY change (or no cursor) restarts from UID 1 with full_resync=True;
+        baseline=true skips listing existing mail and just returns the current cursor.
+        new is capped at lim (more=True); the cursor then only advances past what was returned.
+        """
+        mailbox = sanitize_text(payload.get("mailbox", "INBOX"), 128)
+        since = payload.get("since") if isinstance(payload.get("since"), dict) else None
+        lim = clamp_int(payload.get("lim"), 500, 1, 5000)
+        baseline = as_bool(payload.get("baseline"), False)
+        with self._pooled(account, creds) as entry:
+            client = entry.client
+            caps = _imap_caps(client)
+            condstore = "CONDSTORE" in caps or "QRESYNC" in caps
+            if entry.selected is not None and entry.selected[0] == mailbox:
+                found = self._reselect_status(entry)
+            else:
+                fields = (
+                    "(UIDVALIDITY UIDNEXT HIGHESTMODSEQ)" if condstore else "(UIDVALIDITY UIDNEXT)"
+                )
+                status, data = client.status(mailbox, fields)
+                if status != "OK":
+                    raise MailControlError("IMAP_STATUS_FAILED", f"STATUS failed: {mailbox}")
+                found = {
+                    k.decode("ascii"): int(v)
+                    for k, v in _STATUS_FIELD_RE.findall(
+                        b" ".join(
+                            bytes(d) for d in (data or []) if isinstance(d, (bytes, bytearray))
+                        )
+                    )
+                }
+        if "UIDVALIDITY" not in found or "UIDNEXT" not in found:
+            raise MailControlError("IMAP_STATUS_FAILED", "STATUS missing UIDVALIDITY/UIDNEXT.")
+        current = {
+            "uidvalidity": found["UIDVALIDITY"],
+            "uidnext": found["UIDNEXT"],
+            "highestmodseq": found.get("HIGHESTMODSEQ", 0),
+        }
+        reset = since is None or int(since.get("uidvalidity", -1)) != current["uidvalidity"]
+        if "HIGHESTMODSEQ" not in found and not reset:
+            # A plain SELECT/EXAMINE reply may omit it; a 0 in the cursor would switch
+            # change tracking off for good, so keep the last known value instead.
+            current["highestmodseq"] = int(since.get("highestmodseq") or 0)
+        result: dict[str, Any] = {
+            "mailbox": mailbox,
+            "full_resync": reset,
+            "condstore": condstore,
+            "new": [],
+            "changed": [],
+            "more": False,
+            "state": current,
+        }
+        if reset and baseline:
+            return result
+        from_uid = 1 if reset else max(1, int(since.get("uidnext", 1)))
+        old_modseq = 0 if reset else int(since.get("highestmodseq") or 0)
+        track_changes = condstore and not reset and old_modseq > 0 and from_uid > 1
+        if from_uid >= current["uidnext"] and (
+            not track_changes or current["highestmodseq"] <= old_modseq
+        ):
+            result["state"] = {**current, "uidnext": max(from_uid, current["uidnext"])}
+            return result
+        with self._session(account, creds, mailbox) as client:
+            new: list[int] = []
+            if from_uid < current["uidnext"]:
+                s_status, s_data = client.uid("SEARCH", None, f"UID {from_uid}:*")
+                if s_status != "OK":
+                    raise MailControlError("IMAP_SEARCH_FAILED", "Search failed.")
+                # n:* always matches the highest UID, even when it is below n.
+                new = sorted(
+                    u
+                    for u in (int(x) for x in (s_data[0] or b"").split() if x.isdigit())
+                    if u >= from_uid
+                )
+            changed: list[int] = []
+            if track_changes and current["highestmodseq"] > old_modseq:
+                c_status, c_data = client.uid(
+                    "SEARCH", None, f"UID 1:{from_uid - 1} MODSEQ {old_modseq + 1}"
+                )
+                if c_status != "OK":
+                    raise MailControlError("IMAP_SEARCH_FAILED", "MODSEQ search failed.")
+                changed = sorted(
+                    int(x)
+                    for x in (c_data[0] or b"").split()
+                    if x.isdigit() and int(x) < from_uid
+                )
+        state = dict(current)
+        if len(new) > lim:
+            new = new[:lim]
+            result["more"] = True
+            # Older modseq stays until new mail is drained so no flag change is skipped.
+            state["uidnext"] = new[-1] + 1
+            state["highestmodseq"] = old_modseq
+        result.update(new=[str(u) for u in new], changed=[str(u) for u in changed], state=state)
+        return result
+
+    def idle_wait(
+        self, account: AccountConfig, creds: dict[str, str], payload: dict[str, Any]
+    ) -> dict[str, Any]:
+        """Block in IDLE on mailbox until EXISTS/EXPUNGE/FETCH or `timeout` seconds pass."""
+        mailbox = sanitize_text(payload.get("mailbox", "INBOX"), 128)
+        timeout = clamp_int(payload.get("timeout"), 1500, 1, 1740)
+        with self._session(account, creds, mailbox) as client:
+            if "IDLE" not in _imap_caps(client):
+                raise MailControlError(
+                    "IMAP_IDLE_UNSUPPORTED", "Server does not advertise IDLE."
+                )
+            events = _imap_idle(client, timeout)
+        return {"mailbox": mailbox, "events": events, "timed_out": not events}
 
     def mutate(
         self, account: AccountConfig, creds: dict[str, str], payload: dict[str, Any]
@@ -642,12 +1879,13 @@ class ImapAdapter:
         action = sanitize_text(payload.get("mutate_action"), 64)
         mailbox = sanitize_text(payload.get("mailbox", "INBOX"), 128)
         uids = sanitize_list(payload.get("uids", []), 64, 1000)
-        with self._connect(account, creds) as client:
-            status, _ = client.select(mailbox)
-            if status != "OK":
-                raise MailControlError(
-                    "IMAP_SELECT_FAILED", f"Cannot select mailbox: {mailbox}"
-                )
+        with self._session(
+            account,
+            creds,
+            mailbox,
+            readonly=False,
+            keep_selected=action not in {"rename_mailbox", "delete_mailbox"},
+        ) as client:
             uid_set = ",".join(uids)
             if action in {"set_flags", "clear_flags"}:
                 flags = sanitize_text(payload.get("flags", "\\Seen"), 128)
@@ -664,7 +1902,7 @@ class ImapAdapter:
                 return {"copied": len(uids), "target": target}
             if action == "move_messages":
                 target = sanitize_text(payload.get("target_mailbox"), 128)
-                supports_move = b"MOVE" in (client.capabilities or ())
+                supports_move = "MOVE" in _imap_caps(client)
                 if supports_move:
                     m_status, _ = client.uid("MOVE", uid_set, target)
                     if m_status != "OK":
@@ -734,15 +1972,37 @@ class MailProtocolControl:
         credential_provider: CredentialProvider | None = None,
         smtp_adapter: SmtpAdapter | None = None,
         imap_adapter: ImapAdapter | None = None,
+        state_dir: Path | None = None,
     ):
         self.policy = load_policy(policy_path)
         self.accounts: dict[str, AccountConfig] = {a.account_id: a for a in accounts}
         self.credential_provider = credential_provider or EnvCredentialProvider()
         self.smtp = smtp_adapter or SmtpAdapter()
-        self.imap = imap_adapter or ImapAdapter()
-        self.confirmations = ConfirmationStore()
-        self.idempotency_results: dict[str, dict[str, Any]] = {}
+        self.state_dir = Path(state_dir) if state_dir else default_state_dir()
+        self.imap = imap_adapter or ImapAdapter(part_cache=self._part_cache_from_env())
+        # Confirmation tokens and idempotent results, shared with other processes on state_dir
+        self.state_store = ExpiringStore(self.state_dir / "tokens.sqlite3")
+        self.confirmations = ConfirmationStore(self.state_store)
         self.crypto = CryptoEngine()
+        self.sync_state = SyncStateStore(self.state_dir / "sync_state.json")
+
+    def _part_cache_from_env(self) -> AttachmentPartCache | None:
+        """MAIL_PROTOCOL_PART_CACHE_MB > 0 keeps decoded attachments under state_dir/part_cache."""
+        try:
+            limit_mb = int(os.getenv("MAIL_PROTOCOL_PART_CACHE_MB") or 0)
+        except ValueError:
+            limit_mb = 0
+        if limit_mb <= 0:
+            return None
+        return AttachmentPartCache(self.state_dir / "part_cache", max_bytes=limit_mb * 1024 * 1024)
+
+    def close(self) -> None:
+        """Log out pooled IMAP and SMTP sessions (long-lived callers; short CLI runs may skip this)."""
+        for adapter in (self.imap, self.smtp):
+            closer = getattr(adapter, "close", None)
+            if callable(closer):
+                closer()
+        self.state_store.close()
 
     def _account(self, account_id: str) -> AccountConfig:
         account = self.accounts.get(account_id)
@@ -759,7 +2019,13 @@ class MailProtocolControl:
         params: dict[str, Any],
         confirm_token: str | None = None,
         request_constraints: dict[str, Any] | None = None,
+        replay: bool = False,
     ) -> None:
+        """
+        Policy check, then the confirmation gate. replay: an idempotent replay of a result
+        already recorded for this exact scope; policy still applies, but the confirmation
+        spent on the original call is not asked for again.
+        """
         decision = evaluate_action(
             self.policy,
             account_id,
@@ -769,7 +2035,7 @@ class MailProtocolControl:
         )
         if not decision.allowed:
             raise MailControlError("ACTION_BLOCKED", decision.reason)
-        if decision.requires_confirmation:
+        if decision.requires_confirmation and not replay:
             scope = _scope_hash(account_id, action, params)
             if not confirm_token:
                 challenge = self.confirmations.issue(
@@ -899,14 +2165,41 @@ class MailProtocolControl:
         data = self.smtp.send_message(account, creds, payload)
         return MailResult(ok=True, code="OK", data=data)
 
-    def mutate(self, payload: dict[str, Any]) -> MailResult:
+    def send_batch(self, payload: dict[str, Any]) -> MailResult:
+        """
+        payload["messages"]: up to 100 mail_send payloads (acct and from default to the batch's),
+        sent over one SMTP session. One authorization covers the whole batch.
+        """
         account_id = sanitize_text(payload.get("acct"), 64)
-        idempotency_key = sanitize_text(payload.get("idempotency_key"), 128)
-        if idempotency_key and idempotency_key in self.idempotency_results:
-            cached = self.idempotency_results[idempotency_key]
+        account = self._account(account_id)
+        messages = payload.get("messages")
+        if not isinstance(messages, list) or not messages:
+            raise MailControlError("INVALID_ARGUMENT", "messages must be a non-empty list.")
+        if len(messages) > 100:
+            raise MailControlError("INVALID_ARGUMENT", "At most 100 messages per batch.")
+        if not all(isinstance(row, dict) for row in messages):
+            raise MailControlError("INVALID_ARGUMENT", "Each message must be an object.")
+        self._authorize(account_id, "smtp.send_message", payload)
+        creds = self._credentials(account)
+        defaults = {"from": payload["from"]} if payload.get("from") else {}
+        data = self.smtp.send_batch(
+            account,
+            creds,
+            [{**defaults, **row} for row in messages],
+            stop_on_error=as_bool(payload.get("stop_on_error"), False),
+        )
+        if data["failed"] or data["skipped"]:
             return MailResult(
-                ok=True, code="OK", data={**cached, "idempotent_replay": True}
+                ok=False,
+                code="BATCH_PARTIAL",
+                message=f"{data['failed']} of {len(messages)} messages failed.",
+                data=data,
             )
+        return MailResult(ok=True, code="OK", data=data)
+
+    def mutate(self, payload: dict[str, Any]) -> MailResult:
+        account_id = sanitize_text(payload.get("acct"), 64)
+        idempotency_key = sanitize_text(payload.get("idempotency_key"), 128)
         mapping = {
             "set_flags": "imap.set_flags",
             "clear_flags": "imap.clear_flags",
@@ -923,33 +2216,80 @@ class MailProtocolControl:
         if not action:
             raise MailControlError("INVALID_ARGUMENT", "Unknown mutate_action.")
         account = self._account(account_id)
+        # The store is shared across accounts and processes: a key only replays the same
+        # account, action and parameters.
+        store_key = (
+            f"{account_id}|{mutate_action}|{_scope_hash(account_id, action, payload)}|{idempotency_key}"
+            if idempotency_key
+            else ""
+        )
+        cached = self.state_store.get("idempotency", store_key) if store_key else None
         confirm_token = sanitize_text(payload.get("confirm_token"), 128) or None
-        self._authorize(account_id, action, payload, confirm_token=confirm_token)
+        self._authorize(
+            account_id, action, payload, confirm_token=confirm_token, replay=cached is not None
+        )
+        if cached is not None:
+            return MailResult(
+                ok=True, code="OK", data={**cached, "idempotent_replay": True}
+            )
         creds = self._credentials(account)
         result = self.imap.mutate(account, creds, payload)
         op_id = make_request_id()
         result["op_id"] = op_id
-        if idempotency_key:
-            self.idempotency_results[idempotency_key] = result
+        if store_key:
+            self.state_store.put("idempotency", store_key, result, IDEMPOTENCY_TTL_SECONDS)
         return MailResult(ok=True, code="OK", data=result)
 
     def sync(self, payload: dict[str, Any]) -> MailResult:
+        """
+        Incremental sync. Resumes from `cursor`, else from the persisted state for
+        (acct, mailbox); `reset` forces a full resync. State is persisted unless
+        commit=false, in which case a later call with `commit_cursor` records it once the
+        caller has processed the delta.
+        """
         account_id = sanitize_text(payload.get("acct"), 64)
+        account = self._account(account_id)
         self._authorize(account_id, "imap.sync_state", payload)
-        cursor = sanitize_text(payload.get("cursor"), 128)
-        now = int(time.time())
-        next_cursor = base64.urlsafe_b64encode(
-            f"{account_id}:{now}".encode("utf-8")
-        ).decode("utf-8")
-        return MailResult(
-            ok=True,
-            code="OK",
-            data={
+        mailbox = sanitize_text(payload.get("mailbox", "INBOX"), 128)
+        commit_cursor = sanitize_text(payload.get("commit_cursor"), 512)
+        if commit_cursor:
+            state = _decode_sync_cursor(commit_cursor, account_id, mailbox)
+            if state is None:
+                raise MailControlError("INVALID_ARGUMENT", "commit_cursor is not a sync cursor.")
+            self.sync_state.put(account_id, mailbox, state)
+            return MailResult(ok=True, code="OK", data={"committed": True, "next": commit_cursor})
+        cursor = sanitize_text(payload.get("cursor"), 512)
+        if as_bool(payload.get("reset"), False):
+            since = None
+        elif cursor:
+            since = _decode_sync_cursor(cursor, account_id, mailbox)
+        else:
+            since = self.sync_state.get(account_id, mailbox)
+        creds = self._credentials(account)
+        data = self.imap.sync_changes(
+            account, creds, {**payload, "mailbox": mailbox, "since": since}
+        )
+        state = data.pop("state")
+        if as_bool(payload.get("commit"), True):
+            self.sync_state.put(account_id, mailbox, state)
+        data.update(
+            {
                 "cursor": cursor or None,
-                "next": next_cursor,
-                "next_actions": ["mail_query"],
-            },
+                "next": _encode_sync_cursor(account_id, mailbox, state),
+                "uidvalidity": state["uidvalidity"],
+                "next_actions": ["mail_get", "mail_get_decrypted", "mail_sync"],
+            }
         )
+        return MailResult(ok=True, code="OK", data=data)
+
+    def idle(self, payload: dict[str, Any]) -> MailResult:
+        account_id = sanitize_text(payload.get("acct"), 64)
+        account = self._account(account_id)
+        self._authorize(account_id, "imap.sync_state", payload)
+        creds = self._credentials(account)
+        data = self.imap.idle_wait(account, creds, payload)
+        data["next_actions"] = ["mail_sync", "mail_idle"]
+        return MailResult(ok=True, code="OK", data=data)
 
     def policy_preview(self, payload: dict[str, Any]) -> MailResult:
         account_id = sanitize_text(payload.get("acct"), 64)
@@ -1105,6 +2445,46 @@ class MailProtocolControl:
             data={"queried": queried, "mutation": moved, "moved": len(uids)},
         )
 
+    def sweep(self, payload: dict[str, Any]) -> MailResult:
+        """
+        payload["calls"]: up to 200 {"tool", "args"} entries run concurrently, at most
+        per_account (default 2) at a time per account. Each call is authorized on its own;
+        results come back in call order.
+        """
+        calls = payload.get("calls")
+        if not isinstance(calls, list) or not calls:
+            raise MailControlError("INVALID_ARGUMENT", "calls must be a non-empty list.")
+        if len(calls) > 200:
+            raise MailControlError("INVALID_ARGUMENT", "At most 200 calls per sweep.")
+        jobs: list[tuple[str, dict[str, Any]]] = []
+        for row in calls:
+            if not isinstance(row, dict):
+                raise MailControlError("INVALID_ARGUMENT", "Each call must be an object.")
+            tool = sanitize_text(row.get("tool"), 64)
+            args = row.get("args") if isinstance(row.get("args"), dict) else {}
+            if tool == "mail_sweep":
+                raise MailControlError("INVALID_ARGUMENT", "mail_sweep cannot be nested.")
+            jobs.append((tool, args))
+        engine = AsyncMailEngine(
+            self,
+            per_account=clamp_int(payload.get("per_account"), 2, 1, 8),
+            max_workers=clamp_int(payload.get("max_workers"), 16, 1, 64),
+        )
+        try:
+            results = engine.run_sweep(jobs)
+        finally:
+            engine.close()
+        failed = sum(1 for r in results if not r.get("ok"))
+        data = {"results": results, "failed": failed}
+        if failed:
+            return MailResult(
+                ok=False,
+                code="SWEEP_PARTIAL",
+                message=f"{failed} of {len(results)} calls failed.",
+                data=data,
+            )
+        return MailResult(ok=True, code="OK", data=data)
+
     def reply_flow(self, payload: dict[str, Any]) -> MailResult:
         account_id = sanitize_text(payload.get("acct"), 64)
         details = self.get(
@@ -1148,6 +2528,8 @@ class MailProtocolControl:
                 return self.mutate(payload).to_dict()
             if tool == "mail_send":
                 return self.send(payload).to_dict()
+            if tool == "mail_send_batch":
+                return self.send_batch(payload).to_dict()
             if tool == "mail_encrypt":
                 return self.encrypt_payload(payload).to_dict()
             if tool == "mail_decrypt":
@@ -1158,12 +2540,16 @@ class MailProtocolControl:
                 return self.get_decrypted(payload).to_dict()
             if tool == "mail_sync":
                 return self.sync(payload).to_dict()
+            if tool == "mail_idle":
+                return self.idle(payload).to_dict()
             if tool == "mail_policy_preview":
                 return self.policy_preview(payload).to_dict()
             if tool == "mail_triage_batch":
                 return self.triage_batch(payload).to_dict()
             if tool == "mail_reply_flow":
                 return self.reply_flow(payload).to_dict()
+            if tool == "mail_sweep":
+                return self.sweep(payload).to_dict()
             return MailResult(
                 ok=False, code="UNKNOWN_TOOL", message=f"Unknown tool '{tool}'"
             ).to_dict()
@@ -1,15 +1,16 @@
 #!/usr/bin/env python3
 # Purpose: MCP-oriented bridge for mail protocol control tooling.
 # Created: 2026-03-07
-# Last updated: 2026-03-07
+# Last updated: 2026-10-17
 
 from __future__ import annotations
 
 import argparse
 import json
 import sys
+import threading
 from pathlib import Path
-from typing import Any
+from typing import Any, TextIO
 
 if __package__ in (None, ""):
     sys.path.insert(0, str(Path(__file__).resolve().parent))
@@ -55,9 +56,57 @@ def _load_accounts(path: Path) -> list[AccountConfig]:
     return accounts
 
 
+# name -> (required args, description); mirrors references/MCP_TOOL_SCHEMA.md
+TOOLS: dict[str, tuple[list[str], str]] = {
+    "mail_accounts_list": ([], "List configured delegated accounts"),
+    "mail_capabilities_get": (["acct"], "Return SMTP and IMAP capabilities"),
+    "mail_query": (["acct"], "Query mailbox with pagination"),
+    "mail_get": (["acct", "id"], "Fetch message headers or full body"),
+    "mail_get_attachment": (
+        ["acct", "id", "attachment_index"],
+        "Fetch one attachment payload chunk",
+    ),
+    "mail_mutate": (["acct", "mutate_action"], "Run IMAP mutation"),
+    "mail_send": (["acct", "from", "to", "subject", "body"], "Send SMTP message"),
+    "mail_send_batch": (
+        ["acct", "messages"],
+        "Send up to 100 mail_send payloads over one SMTP session",
+    ),
+    "mail_encrypt": (["acct", "encryption_mode"], "Encrypt full envelope payload"),
+    "mail_decrypt": (
+        ["acct", "encrypted", "encryption_mode"],
+        "Decrypt full envelope payload",
+    ),
+    "mail_send_encrypted": (
+        ["acct", "from", "to", "subject", "encryption_mode"],
+        "Encrypt then send secure message",
+    ),
+    "mail_get_decrypted": (
+        ["acct", "id", "encryption_mode"],
+        "Fetch encrypted message and decrypt envelope",
+    ),
+    "mail_sync": (["acct"], "New/changed UIDs since the sync cursor"),
+    "mail_idle": (["acct"], "Block in IMAP IDLE until new mail or timeout seconds"),
+    "mail_policy_preview": (["acct", "action"], "Explain policy result"),
+    "mail_triage_batch": (["acct"], "Query and apply batch mailbox actions"),
+    "mail_reply_flow": (["acct", "id", "from", "body"], "Fetch context and send reply"),
+    "mail_sweep": (
+        ["calls"],
+        "Run many tool calls concurrently with a per-account limit",
+    ),
+}
+
+PROTOCOL_VERSIONS = ("2025-06-18", "2025-03-26", "2024-11-05")
+
+
 class MailMcpServer:
-    def __init__(self, policy_path: Path, accounts_path: Path):
-        self.controller = MailProtocolControl(
+    def __init__(
+        self,
+        policy_path: Path,
+        accounts_path: Path,
+        controller: MailProtocolControl | None = None,
+    ):
+        self.controller = controller or MailProtocolControl(
             policy_path=policy_path,
             accounts=_load_accounts(accounts_path),
             credential_provider=EnvCredentialProvider(),
@@ -69,6 +118,124 @@ class MailMcpServer:
         payload = arguments if isinstance(arguments, dict) else {}
         return self.controller.dispatch(tool_name, payload)
 
+    @staticmethod
+    def tool_list() -> list[dict[str, Any]]:
+        return [
+            {
+                "name": name,
+                "description": description,
+                "inputSchema": {
+                    "type": "object",
+                    "properties": {arg: {} for arg in required},
+                    "required": required,
+                    "additionalProperties": True,
+                },
+            }
+            for name, (required, description) in TOOLS.items()
+        ]
+
+    def handle(self, message: Any) -> dict[str, Any] | None:
+        """One JSON-RPC 2.0 message -> response (None for notifications)."""
+        if not isinstance(message, dict) or message.get("jsonrpc") != "2.0":
+            return _rpc_error(None, -32600, "Invalid Request")
+        msg_id = message.get("id")
+        method = message.get("method")
+        params = message.get("params")
+        params = params if isinstance(params, dict) else {}
+        if "id" not in message:
+            return None  # notifications (initialized, cancelled) need no reply
+        if method == "initialize":
+            requested = str(params.get("protocolVersion") or "")
+            version = requested if requested in PROTOCOL_VERSIONS else PROTOCOL_VERSIONS[0]
+            return _rpc_result(
+                msg_id,
+                {
+                    "protocolVersion": version,
+                    "capabilities": {"tools": {"listChanged": False}},
+                    "serverInfo": {"name": "localsetup-mail-protocol-control", "version": "1"},
+                },
+            )
+        if method == "ping":
+            return _rpc_result(msg_id, {})
+        if method == "tools/list":
+            return _rpc_result(msg_id, {"tools": self.tool_list()})
+        if method == "tools/call":
+            name = params.get("name")
+            if not isinstance(name, str) or name not in TOOLS:
+                return _rpc_error(msg_id, -32602, f"Unknown tool: {name}")
+            try:
+                result = self.call_tool(name, params.get("arguments"))
+            except Exception as exc:  # noqa: BLE001
+                result = {"ok": False, "code": "UNHANDLED_ERROR", "message": str(exc)}
+            return _rpc_result(
+                msg_id,
+                {
+                    "content": [
+                        {"type": "text", "text": json.dumps(result, ensure_ascii=False)}
+                    ],
+                    "structuredContent": result,
+                    "isError": not result.get("ok", False),
+                },
+            )
+        return _rpc_error(msg_id, -32601, f"Method not found: {method}")
+
+    def serve(self, instream: TextIO, outstream: TextIO, workers: int = 8) -> int:
+        """
+        MCP stdio transport: newline-delimited JSON-RPC on instream/outstream until EOF.
+        tools/call runs on a worker pool so a slow call (IDLE, a large fetch) does not hold
+        up others; responses are written as they finish, matched by id. The controller, its
+        pooled IMAP/SMTP sessions, caches and confirmation tokens live for the whole session.
+        """
+        from concurrent.futures import ThreadPoolExecutor
+
+        write_lock = threading.Lock()
+
+        def _write(response: dict[str, Any] | None) -> None:
+            if response is None:
+                return
+            line = json.dumps(response, ensure_ascii=False, separators=(",", ":"))
+            with write_lock:
+                outstream.write(line + "\n")
+                outstream.flush()
+
+        def _run(message: dict[str, Any]) -> None:
+            try:
+                _write(self.handle(message))
+            except Exception as exc:  # noqa: BLE001
+                _write(_rpc_error(message.get("id"), -32603, str(exc)))
+
+        pool = ThreadPoolExecutor(max_workers=max(1, workers), thread_name_prefix="mcp-call")
+        try:
+            for line in instream:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    message = json.loads(line)
+                except ValueError:
+                    _write(_rpc_error(None, -32700, "Parse error"))
+                    continue
+                if isinstance(message, dict) and message.get("method") == "tools/call":
+                    pool.submit(_run, message)
+                elif isinstance(message, list):
+                    _write(_rpc_error(None, -32600, "Batch requests are not supported"))
+                else:
+                    _run(message)
+        except KeyboardInterrupt:
+            pass
+        finally:
+            pool.shutdown(wait=True)
+            self.controller.close()
+        return 0
+
+
+def _rpc_result(msg_id: Any, result: dict[str, Any]) -> dict[str, Any]:
+    return {"jsonrpc": "2.0", "id": msg_id, "result": result}
+
+
+def _rpc_error(msg_id: Any, code: int, message: str) -> dict[str, Any]:
+    return {"jsonrpc": "2.0", "id": msg_id, "error": {"code": code, "message": message}}
+
 
 def main() -> int:
     parser = argparse.ArgumentParser(description="Mail protocol MCP bridge")
@@ -76,11 +243,28 @@ def main() -> int:
         "--policy", default="_localsetup/config/mail_protocol_policy.yaml"
     )
     parser.add_argument("--accounts", default="_localsetup/config/mail_accounts.json")
-    parser.add_argument("--tool", required=True, help="Tool name to execute")
+    parser.add_argument("--tool", help="Tool name to execute (one-shot mode)")
     parser.add_argument(
         "--args-json", default="{}", help="JSON object for tool arguments"
     )
+    parser.add_argument(
+        "--serve",
+        action="store_true",
+        help="Run as a long-lived MCP stdio server (JSON-RPC, one message per line)",
+    )
+    parser.add_argument(
+        "--workers", type=int, default=8, help="Concurrent tools/call handlers in --serve mode"
+    )
     args = parser.parse_args()
+    if args.serve:
+        try:
+            server = MailMcpServer(Path(args.policy), Path(args.accounts))
+        except Exception as exc:  # noqa: BLE001
+            sys.stderr.write(f"[FAIL] {exc}\n")
+            return 1
+        return server.serve(sys.stdin, sys.stdout, workers=args.workers)
+    if not args.tool:
+        parser.error("--tool is required unless --serve is given")
     try:
         payload = json.loads(args.args_json)
         if not isinstance(payload, dict):
@@ -1,7 +1,7 @@
 #!/usr/bin/env python3
 # Purpose: Policy loading, validation, and action authorization for mail control.
 # Created: 2026-03-07
-# Last updated: 2026-03-07
+# Last updated: 2026-10-17
 
 from __future__ import annotations
 
@@ -101,8 +101,8 @@ class PolicyDecision:
     allowed: bool
     reason: str
     requires_confirmation: bool
-    effective_allow: set[str]
-    effective_deny: set[str]
+    effective_allow: frozenset[str]
+    effective_deny: frozenset[str]
     thresholds: dict[str, Any]
     constraints: dict[str, Any]
 
@@ -174,31 +174,6 @@ def _validate_profile(name: str, profile: dict[str, Any]) -> None:
             raise PolicyError(f"Threshold '{key}' in profile '{name}' must be boolean.")
 
 
-def load_policy(path: Path) -> dict[str, Any]:
-    policy = _load_yaml(path)
-    required = {"version", "default_profile", "profiles", "accounts"}
-    missing = [key for key in required if key not in policy]
-    if missing:
-        raise PolicyError(f"Missing required policy keys: {', '.join(missing)}")
-    if not isinstance(policy["version"], int):
-        raise PolicyError("Policy version must be an integer.")
-    if policy["default_profile"] not in {"full", "restricted", "read_only"}:
-        raise PolicyError(
-            "default_profile must be one of: full, restricted, read_only."
-        )
-    profiles = policy.get("profiles")
-    accounts = policy.get("accounts")
-    if not isinstance(profiles, dict):
-        raise PolicyError("profiles must be a mapping.")
-    if not isinstance(accounts, dict):
-        raise PolicyError("accounts must be a mapping.")
-    for name, profile in profiles.items():
-        _validate_profile(str(name), profile if isinstance(profile, dict) else {})
-    if policy["default_profile"] not in profiles:
-        raise PolicyError("default_profile must exist in profiles map.")
-    return policy
-
-
 def _profile(policy: dict[str, Any], profile_name: str) -> dict[str, Any]:
     profiles = policy.get("profiles", {})
     profile = profiles.get(profile_name)
@@ -225,17 +200,55 @@ def _merged_constraints(
     return merged
 
 
-def evaluate_action(
-    policy: dict[str, Any],
-    account_id: str,
-    action: str,
-    params: dict[str, Any] | None = None,
-    request_constraints: dict[str, Any] | None = None,
-) -> PolicyDecision:
-    if action not in ALL_ACTIONS:
-        raise PolicyError(f"Action not in canonical catalog: {action}")
+def _encryption_modes(constraints: dict[str, Any]) -> frozenset[str] | None:
+    allowed_modes = constraints.get("allowed_encryption_modes")
+    if not isinstance(allowed_modes, list):
+        return None
+    return frozenset(sanitize_text(item, 32).lower() for item in allowed_modes)
+
+
+@dataclass(slots=True)
+class AccountRules:
+    """One account's profile and overrides, merged once; reasons holds the per-action verdict."""
+
+    allow: frozenset[str]
+    deny: frozenset[str]
+    thresholds: dict[str, Any]
+    constraints: dict[str, Any]
+    encryption_modes: frozenset[str] | None
+    reasons: dict[str, str]
+
+
+def _rules(
+    allow: set[str] | frozenset[str],
+    deny: set[str] | frozenset[str],
+    thresholds: dict[str, Any],
+    constraints: dict[str, Any],
+) -> AccountRules:
+    reasons = {
+        action: "policy_deny"
+        if action in deny
+        else ("allowed" if action in allow else "policy_not_allowed")
+        for action in ALL_ACTIONS
+    }
+    return AccountRules(
+        allow=frozenset(allow),
+        deny=frozenset(deny),
+        thresholds=thresholds,
+        constraints=constraints,
+        encryption_modes=_encryption_modes(constraints),
+        reasons=reasons,
+    )
+
+
+def compile_account(policy: dict[str, Any], account_id: str | None) -> AccountRules:
+    """Merge profile and account overrides for account_id (None: an unlisted account)."""
     account_map = policy.get("accounts", {})
-    account_cfg = account_map.get(account_id) if isinstance(account_map, dict) else None
+    account_cfg = (
+        account_map.get(account_id)
+        if isinstance(account_map, dict) and account_id is not None
+        else None
+    )
     profile_name = (
         sanitize_text((account_cfg or {}).get("profile"), 64)
         if isinstance(account_cfg, dict)
@@ -265,53 +278,119 @@ def evaluate_action(
         account_constraints = account_cfg.get("constraints", {})
         if isinstance(account_constraints, dict):
             constraints = _merged_constraints(constraints, account_constraints)
+    return _rules(allow, deny, thresholds, constraints)
+
+
+class CompiledPolicy(dict):
+    """
+    The loaded policy mapping plus AccountRules for every listed account and for unlisted
+    ones, built once by load_policy. An account whose profile or overrides are invalid keeps
+    its PolicyError and raises it on evaluation, as before compilation.
+    """
+
+    def __init__(self, policy: dict[str, Any]):
+        super().__init__(policy)
+        self.default_rules: AccountRules | PolicyError = self._compile(None)
+        self.account_rules: dict[str, AccountRules | PolicyError] = {}
+        accounts = policy.get("accounts")
+        for account_id in accounts if isinstance(accounts, dict) else {}:
+            self.account_rules[account_id] = self._compile(account_id)
+
+    def _compile(self, account_id: str | None) -> AccountRules | PolicyError:
+        try:
+            return compile_account(self, account_id)
+        except PolicyError as exc:
+            return exc
+
+    def rules_for(self, account_id: str) -> AccountRules:
+        rules = self.account_rules.get(account_id, self.default_rules)
+        if isinstance(rules, PolicyError):
+            raise rules
+        return rules
+
+
+def load_policy(path: Path) -> CompiledPolicy:
+    policy = _load_yaml(path)
+    required = {"version", "default_profile", "profiles", "accounts"}
+    missing = [key for key in required if key not in policy]
+    if missing:
+        raise PolicyError(f"Missing required policy keys: {', '.join(missing)}")
+    if not isinstance(policy["version"], int):
+        raise PolicyError("Policy version must be an integer.")
+    if policy["default_profile"] not in {"full", "restricted", "read_only"}:
+        raise PolicyError(
+            "default_profile must be one of: full, restricted, read_only."
+        )
+    profiles = policy.get("profiles")
+    accounts = policy.get("accounts")
+    if not isinstance(profiles, dict):
+        raise PolicyError("profiles must be a mapping.")
+    if not isinstance(accounts, dict):
+        raise PolicyError("accounts must be a mapping.")
+    for name, profile in profiles.items():
+        _validate_profile(str(name), profile if isinstance(profile, dict) else {})
+    if policy["default_profile"] not in profiles:
+        raise PolicyError("default_profile must exist in profiles map.")
+    return CompiledPolicy(policy)
+
+
+def evaluate_action(
+    policy: dict[str, Any],
+    account_id: str,
+    action: str,
+    params: dict[str, Any] | None = None,
+    request_constraints: dict[str, Any] | None = None,
+) -> PolicyDecision:
+    """
+    A CompiledPolicy (from load_policy) answers from its table; a plain mapping has the
+    account merged on the spot. request_constraints can only tighten: extra deny_actions and
+    threshold/constraint overrides on top of the account's rules.
+    """
+    if action not in ALL_ACTIONS:
+        raise PolicyError(f"Action not in canonical catalog: {action}")
+    if isinstance(policy, CompiledPolicy):
+        rules = policy.rules_for(account_id)
+    else:
+        account_map = policy.get("accounts", {})
+        listed = isinstance(account_map, dict) and account_id in account_map
+        rules = compile_account(policy, account_id if listed else None)
     if isinstance(request_constraints, dict):
-        deny.update(_expand_actions(request_constraints.get("deny_actions", [])))
+        deny = set(rules.deny) | _expand_actions(request_constraints.get("deny_actions", []))
+        thresholds = rules.thresholds
         req_thresholds = request_constraints.get("thresholds", {})
         if isinstance(req_thresholds, dict):
             thresholds = _merged_thresholds(thresholds, req_thresholds)
+        constraints = rules.constraints
         req_constraints = request_constraints.get("constraints", {})
         if isinstance(req_constraints, dict):
             constraints = _merged_constraints(constraints, req_constraints)
-    effective_allow = set(allow)
-    effective_deny = set(deny)
-    if action in effective_deny:
+        rules = _rules(rules.allow, deny, thresholds, constraints)
+    thresholds = rules.thresholds
+    reason = rules.reasons[action]
+    if reason != "allowed":
         return PolicyDecision(
             allowed=False,
-            reason="policy_deny",
+            reason=reason,
             requires_confirmation=False,
-            effective_allow=effective_allow,
-            effective_deny=effective_deny,
+            effective_allow=rules.allow,
+            effective_deny=rules.deny,
             thresholds=thresholds,
-            constraints=constraints,
+            constraints=rules.constraints,
         )
-    if action not in effective_allow:
-        return PolicyDecision(
-            allowed=False,
-            reason="policy_not_allowed",
-            requires_confirmation=False,
-            effective_allow=effective_allow,
-            effective_deny=effective_deny,
-            thresholds=thresholds,
-            constraints=constraints,
-        )
-    if action.startswith("crypto."):
-        allowed_modes = constraints.get("allowed_encryption_modes")
+    if action.startswith("crypto.") and rules.encryption_modes is not None:
         requested_mode = sanitize_text(
             (params or {}).get("encryption_mode"), 32
         ).lower()
-        if isinstance(allowed_modes, list) and requested_mode:
-            normalized = {sanitize_text(item, 32).lower() for item in allowed_modes}
-            if requested_mode not in normalized:
-                return PolicyDecision(
-                    allowed=False,
-                    reason="encryption_mode_not_allowed",
-                    requires_confirmation=False,
-                    effective_allow=effective_allow,
-                    effective_deny=effective_deny,
-                    thresholds=thresholds,
-                    constraints=constraints,
-                )
+        if requested_mode and requested_mode not in rules.encryption_modes:
+            return PolicyDecision(
+                allowed=False,
+                reason="encryption_mode_not_allowed",
+                requires_confirmation=False,
+                effective_allow=rules.allow,
+                effective_deny=rules.deny,
+                thresholds=thresholds,
+                constraints=rules.constraints,
+            )
     p = params or {}
     requires_confirmation = False
     if action in THRESHOLD_ACTIONS:
@@ -337,8 +416,94 @@ def evaluate_action(
         allowed=True,
         reason="allowed",
         requires_confirmation=requires_confirmation,
-        effective_allow=effective_allow,
-        effective_deny=effective_deny,
+        effective_allow=rules.allow,
+        effective_deny=rules.deny,
         thresholds=thresholds,
-        constraints=constraints,
+        constraints=rules.constraints,
     )
+
+
+def synthetic_policy(accounts: int) -> dict[str, Any]:
+    """The stock three profiles plus `accounts` listed accounts with mixed overrides."""
+    profiles = {
+        "full": {
+            "allow_actions": ["smtp.*", "imap.*", "crypto.*"],
+            "deny_actions": [],
+            "thresholds": {"delete_count_confirm": 1000, "move_count_confirm": 1000},
+            "constraints": {"allowed_encryption_modes": ["psk", "password", "openpgp"]},
+        },
+        "restricted": {
+            "allow_actions": ["smtp.*", "imap.read.*", "imap.write.*", "imap.destructive.*", "crypto.*"],
+            "deny_actions": ["imap.delete_mailbox"],
+            "thresholds": {"delete_count_confirm": 50, "move_count_confirm": 100},
+            "constraints": {"allowed_encryption_modes": ["psk", "password"]},
+        },
+        "read_only": {
+            "allow_actions": ["smtp.verify_connectivity", "imap.read.*", "imap.admin.*"],
+            "deny_actions": ["smtp.send_message", "imap.write.*", "imap.destructive.*"],
+            "thresholds": {},
+            "constraints": {},
+        },
+    }
+    names = sorted(profiles)
+    account_map: dict[str, Any] = {}
+    for i in range(accounts):
+        row: dict[str, Any] = {"profile": names[i % len(names)]}
+        if i % 4 == 0:
+            row["deny_actions"] = ["imap.expunge_mailbox"]
+            row["thresholds"] = {"move_count_confirm": 10 + i % 90}
+        if i % 7 == 0:
+            row["allow_actions"] = ["imap.admin.*"]
+        account_map[f"acct-{i}"] = row
+    return {"version": 1, "default_profile": "restricted", "profiles": profiles, "accounts": account_map}
+
+
+def benchmark_evaluate(accounts: int = 5000, calls: int = 100_000) -> dict[str, Any]:
+    """Per-call evaluate_action cost on synthetic_policy(accounts): compiled table vs per-call merge."""
+    import random
+    import time
+
+    raw = synthetic_policy(accounts)
+    t0 = time.perf_counter()
+    compiled = CompiledPolicy(raw)
+    compile_s = time.perf_counter() - t0
+    rng = random.Random(7)
+    actions = sorted(ALL_ACTIONS)
+    sample = [
+        (f"acct-{rng.randrange(accounts)}", rng.choice(actions), {"count": rng.randrange(200)})
+        for _ in range(min(calls, 10_000))
+    ]
+
+    def _per_call_us(policy: dict[str, Any], n: int) -> float:
+        t = time.perf_counter()
+        for i in range(n):
+            account_id, action, params = sample[i % len(sample)]
+            evaluate_action(policy, account_id, action, params=params)
+        return (time.perf_counter() - t) / n * 1e6
+
+    compiled_us = _per_call_us(compiled, calls)
+    merged_us = _per_call_us(raw, max(1, calls // 10))
+    return {
+        "accounts": accounts,
+        "calls": calls,
+        "compile_ms": round(compile_s * 1000, 2),
+        "compiled_us_per_call": round(compiled_us, 3),
+        "uncompiled_us_per_call": round(merged_us, 3),
+        "speedup": round(merged_us / compiled_us, 1) if compiled_us else None,
+    }
+
+
+def main() -> int:
+    import argparse
+    import json
+
+    parser = argparse.ArgumentParser(description="Mail policy engine benchmark")
+    parser.add_argument("--accounts", type=int, default=5000)
+    parser.add_argument("--calls", type=int, default=100_000)
+    args = parser.parse_args()
+    print(json.dumps(benchmark_evaluate(args.accounts, args.calls), indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
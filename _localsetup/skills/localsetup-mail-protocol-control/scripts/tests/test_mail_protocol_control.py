@@ -1,17 +1,50 @@
 #!/usr/bin/env python3
 # Purpose: Unit tests for attachment and crypto mail protocol control flows.
 # Created: 2026-03-07
-# Last updated: 2026-03-07
+# Last updated: 2026-10-17
 
 from __future__ import annotations
 
 from pathlib import Path
+import base64
+import io
+import json
+import os
+import re
+import smtplib
+import sqlite3
+import stat
 import sys
+import threading
+import time
+
+import pytest
 
 sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
 
-from scripts.mail_protocol_control import MailProtocolControl
+from scripts.mail_protocol_control import (
+    AttachmentPartCache,
+    ExpiringStore,
+    ImapAdapter,
+    ImapConnectionPool,
+    MailProtocolControl,
+    SmtpAdapter,
+    _imap_idle,
+    _parse_uid_fetch,
+)
+from scripts.crypto_engine import CryptoEngine
+from scripts.mail_engine import AsyncMailEngine
 from scripts.mail_types import AccountConfig
+from scripts.mcp_server import MailMcpServer
+from scripts.policy_engine import (
+    ALL_ACTIONS,
+    CompiledPolicy,
+    PolicyError,
+    benchmark_evaluate,
+    evaluate_action,
+    load_policy,
+    synthetic_policy,
+)
 
 
 class FakeCreds:
@@ -163,6 +196,7 @@ def _control(tmp_path: Path) -> MailProtocolControl:
         credential_provider=FakeCreds(),
         smtp_adapter=FakeSmtp(),
         imap_adapter=FakeImap(),
+        state_dir=tmp_path / "state",
     )
 
 
@@ -209,6 +243,61 @@ def test_idempotency_replay(tmp_path: Path) -> None:
     assert second["idempotent_replay"] is True
 
 
+def test_confirmations_and_idempotency_persist_across_processes(tmp_path: Path) -> None:
+    move = {
+        "acct": "acct1",
+        "mailbox": "INBOX",
+        "mutate_action": "move_messages",
+        "uids": ["1", "2"],
+        "target_mailbox": "Archive",
+    }
+    issued = _control(tmp_path).dispatch("mail_mutate", move)
+    token = re.search(r"token=(\S+)", issued["message"]).group(1)  # type: ignore[union-attr]
+    # A fresh controller (next CLI run) on the same state dir accepts the token exactly once
+    assert _control(tmp_path).dispatch("mail_mutate", {**move, "confirm_token": token})["ok"]
+    replay = _control(tmp_path).dispatch("mail_mutate", {**move, "confirm_token": token})
+    assert replay["code"] == "CONFIRMATION_REPLAY_BLOCKED"
+    flags = {"acct": "acct1", "mutate_action": "set_flags", "uids": ["1"], "idempotency_key": "k1"}
+    first = _control(tmp_path).dispatch("mail_mutate", flags)
+    second = _control(tmp_path).dispatch("mail_mutate", flags)
+    assert second["idempotent_replay"] and second["op_id"] == first["op_id"]
+    # Keys are scoped: other params or another account never see that result
+    other = _control(tmp_path).dispatch("mail_mutate", {**flags, "uids": ["2"]})
+    assert other["ok"] and "idempotent_replay" not in other and other["op_id"] != first["op_id"]
+    assert _control(tmp_path).dispatch("mail_mutate", {**flags, "acct": "acct2"})["code"] == "ACCOUNT_NOT_FOUND"
+    # Policy is checked before a replay is returned
+    deny = tmp_path / "deny.yaml"
+    deny.write_text((tmp_path / "policy.yaml").read_text().replace("      - imap.write.*\n", ""))
+    blocked = _control(tmp_path)
+    blocked.policy = load_policy(deny)
+    assert blocked.dispatch("mail_mutate", flags)["code"] == "ACTION_BLOCKED"
+
+    store = ExpiringStore(tmp_path / "kv.sqlite3", max_entries=3, prune_every=1000)
+    store.put("n", "old", {"v": 0}, ttl_seconds=-1)
+    assert store.get("n", "old") is None
+    for i in range(5):
+        store.put("n", f"k{i}", {"v": i}, ttl_seconds=60)
+    assert store.get("n", "k0") == {"v": 0}  # touch: k0 becomes most recently used
+    assert store.prune() == 2  # "old" went with the first write's prune
+    assert [store.get("n", f"k{i}") is not None for i in range(5)] == [True, False, False, True, True]
+    assert store.count("n") == 3
+
+    # WAL sidecars are private too; close() reaches connections opened by other threads
+    worker = threading.Thread(target=lambda: store.put("n", "t", {"v": 1}, ttl_seconds=60))
+    worker.start()
+    worker.join()
+    for suffix in ("", "-wal", "-shm"):
+        assert stat.S_IMODE(os.stat(f"{tmp_path / 'kv.sqlite3'}{suffix}").st_mode) == 0o600
+    conns = list(store._conns.values())
+    assert len(conns) == 2
+    store.close()
+    for conn in conns:
+        with pytest.raises(sqlite3.ProgrammingError):
+            conn.execute("SELECT 1")
+    assert store.get("n", "t") == {"v": 1}  # reopens after close
+    store.close()
+
+
 def test_policy_blocked(tmp_path: Path) -> None:
     control = _control(tmp_path)
     result = control.dispatch(
@@ -224,6 +313,138 @@ def test_policy_blocked(tmp_path: Path) -> None:
     assert result["code"] in {"ACTION_BLOCKED", "CONFIRMATION_REQUIRED"}
 
 
+def test_compiled_policy_matches_per_call_merge() -> None:
+    raw = synthetic_policy(30)
+    raw["accounts"]["broken"] = {"profile": "missing"}
+    compiled = CompiledPolicy(raw)
+    tighten = {"deny_actions": ["imap.move_messages"], "thresholds": {"delete_count_confirm": 1}}
+    for account_id in [*raw["accounts"], "unlisted"]:
+        for action in sorted(ALL_ACTIONS):
+            for extra in (None, tighten):
+                params = {"count": 40, "encryption_mode": "openpgp"}
+                try:
+                    want = evaluate_action(raw, account_id, action, params, extra)
+                except PolicyError:
+                    assert account_id == "broken"
+                    try:
+                        evaluate_action(compiled, account_id, action, params, extra)
+                    except PolicyError:
+                        continue
+                    raise AssertionError("compiled policy lost the profile error")
+                got = evaluate_action(compiled, account_id, action, params, extra)
+                assert got == want, (account_id, action, extra)
+    bench = benchmark_evaluate(accounts=20, calls=200)
+    assert bench["compiled_us_per_call"] > 0 and bench["uncompiled_us_per_call"] > 0
+
+
+def test_mcp_stdio_server_keeps_controller_across_calls(tmp_path: Path) -> None:
+    server = MailMcpServer(Path("unused"), Path("unused"), controller=_control(tmp_path))
+    move = {
+        "acct": "acct1",
+        "mailbox": "INBOX",
+        "mutate_action": "move_messages",
+        "uids": ["1", "2"],
+        "target_mailbox": "Archive",
+    }
+
+    def _session(*messages: object) -> dict[object, dict]:
+        lines = [m if isinstance(m, str) else json.dumps(m) for m in messages]
+        out = io.StringIO()
+        assert server.serve(io.StringIO("\n".join(lines) + "\n"), out, workers=4) == 0
+        rows = [json.loads(line) for line in out.getvalue().splitlines()]
+        return {row.get("id"): row for row in rows}
+
+    replies = _session(
+        {"jsonrpc": "2.0", "id": 1, "method": "initialize", "params": {"protocolVersion": "2024-11-05"}},
+        {"jsonrpc": "2.0", "method": "notifications/initialized"},
+        {"jsonrpc": "2.0", "id": 2, "method": "tools/list"},
+        *[
+            {"jsonrpc": "2.0", "id": 10 + i, "method": "tools/call",
+             "params": {"name": "mail_query", "arguments": {"acct": "acct1"}}}
+            for i in range(5)
+        ],
+        {"jsonrpc": "2.0", "id": 3, "method": "tools/call", "params": {"name": "mail_mutate", "arguments": move}},
+        "{not json",
+        {"jsonrpc": "2.0", "id": 4, "method": "nope"},
+    )
+    assert replies[1]["result"]["protocolVersion"] == "2024-11-05"
+    assert "mail_send_batch" in {t["name"] for t in replies[2]["result"]["tools"]}
+    assert all(replies[10 + i]["result"]["structuredContent"]["ok"] for i in range(5))
+    assert replies[None]["error"]["code"] == -32700 and replies[4]["error"]["code"] == -32601
+    challenge = replies[3]["result"]
+    assert challenge["isError"] and challenge["structuredContent"]["code"] == "CONFIRMATION_REQUIRED"
+    token = re.search(r"token=(\S+)", challenge["structuredContent"]["message"]).group(1)  # type: ignore[union-attr]
+
+    # The token issued earlier in the session is still held by the warm controller
+    confirmed = _session(
+        {"jsonrpc": "2.0", "id": 5, "method": "tools/call",
+         "params": {"name": "mail_mutate", "arguments": {**move, "confirm_token": token}}},
+    )
+    assert confirmed[5]["result"]["structuredContent"]["ok"] is True
+
+
+def test_sweep_runs_accounts_concurrently_within_per_account_limit(tmp_path: Path) -> None:
+    lock = threading.Lock()
+    inflight: dict[str, int] = {}
+    peak: dict[str, int] = {}
+    started_at: dict[str, float] = {}
+
+    class SlowDispatcher:
+        def dispatch(self, tool: str, payload: dict) -> dict:
+            acct = payload["acct"]
+            with lock:
+                inflight[acct] = inflight.get(acct, 0) + 1
+                peak[acct] = max(peak.get(acct, 0), inflight[acct])
+                peak["*"] = max(peak.get("*", 0), sum(inflight.values()))
+                started_at.setdefault(acct, time.monotonic())
+            time.sleep(0.05)
+            with lock:
+                inflight[acct] -= 1
+            return {"ok": True, "code": "OK", "n": payload["n"]}
+
+    engine = AsyncMailEngine(SlowDispatcher(), per_account=2, max_workers=16)
+    calls = [("mail_query", {"acct": f"a{i % 4}", "n": i}) for i in range(16)]
+    started = time.monotonic()
+    results = engine.run_sweep(calls)
+    elapsed = time.monotonic() - started
+    assert [r["n"] for r in results] == list(range(16))
+    assert max(v for k, v in peak.items() if k != "*") == 2 and peak["*"] > 2
+    assert elapsed < 16 * 0.05 / 2
+
+    # A long backlog on one account does not hold back an account listed after it
+    started_at.clear()
+    engine = AsyncMailEngine(SlowDispatcher(), per_account=1)
+    calls = [("mail_query", {"acct": "slow", "n": i}) for i in range(20)]
+    started = time.monotonic()
+    assert len(engine.run_sweep(calls + [("mail_query", {"acct": "fast", "n": 20})])) == 21
+    engine.close()
+    assert started_at["fast"] - started < 0.05 * 2
+
+    # Same surface through dispatch: per-call results, failures reported, no nesting
+    swept = _control(tmp_path).dispatch(
+        "mail_sweep",
+        {
+            "calls": [
+                {"tool": "mail_query", "args": {"acct": "acct1", "mailbox": "INBOX"}},
+                {"tool": "mail_query", "args": {"acct": "nope"}},
+                {"tool": "mail_sweep", "args": {}},
+            ]
+        },
+    )
+    assert swept["code"] == "INVALID_ARGUMENT"
+    swept = _control(tmp_path).dispatch(
+        "mail_sweep",
+        {
+            "calls": [
+                {"tool": "mail_query", "args": {"acct": "acct1", "mailbox": "INBOX"}},
+                {"tool": "mail_query", "args": {"acct": "nope"}},
+            ]
+        },
+    )
+    assert swept["code"] == "SWEEP_PARTIAL" and swept["failed"] == 1
+    assert swept["results"][0]["ok"] and swept["results"][1]["code"] == "ACCOUNT_NOT_FOUND"
+
+
 def test_unknown_tool(tmp_path: Path) -> None:
     control = _control(tmp_path)
     result = control.dispatch("mail_missing", {"acct": "acct1"})
@@ -299,6 +520,44 @@ def test_encrypt_decrypt_roundtrip_psk(tmp_path: Path) -> None:
     assert decrypted["envelope"]["attachments"][0]["filename"] == "report.txt"
 
 
+def test_openpgp_decrypt_with_shared_protected_key_is_thread_safe() -> None:
+    pgpy = pytest.importorskip("pgpy")
+    from pgpy.constants import (
+        CompressionAlgorithm,
+        HashAlgorithm,
+        KeyFlags,
+        PubKeyAlgorithm,
+        SymmetricKeyAlgorithm,
+    )
+
+    key = pgpy.PGPKey.new(PubKeyAlgorithm.RSAEncryptOrSign, 1024)
+    key.add_uid(
+        pgpy.PGPUID.new("Test", email="t@example.com"),
+        usage={KeyFlags.EncryptCommunications, KeyFlags.Sign},
+        hashes=[HashAlgorithm.SHA256],
+        ciphers=[SymmetricKeyAlgorithm.AES256],
+        compression=[CompressionAlgorithm.Uncompressed],
+    )
+    key.protect("pw", SymmetricKeyAlgorithm.AES256, HashAlgorithm.SHA256)
+    engine = CryptoEngine()
+    armored = engine.encrypt_openpgp({"body": "hello"}, str(key.pubkey))["armored"]
+    errors: list[str] = []
+
+    def _worker() -> None:
+        for _ in range(6):
+            try:
+                assert b"hello" in engine.decrypt_openpgp_raw(armored, str(key), "pw")
+            except Exception as exc:  # noqa: BLE001
+                errors.append(str(exc))
+
+    threads = [threading.Thread(target=_worker) for _ in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert errors == []
+
+
 def test_send_encrypted(tmp_path: Path) -> None:
     control = _control(tmp_path)
     result = control.dispatch(
@@ -368,3 +627,431 @@ accounts:
     )
     assert result["ok"] is False
     assert result["code"] == "ACTION_BLOCKED"
+
+
+class FakeImapClient:
+    """Scripted imaplib.IMAP4 stand-in: counts round trips, serves header/body fetches."""
+
+    def __init__(self, messages: dict[str, bytes], modseq: dict[str, int] | None = None):
+        self.messages = messages
+        self.modseq = modseq if modseq is not None else {}
+        self.uidvalidity = 1
+        self.select_modseq = True
+        self.capabilities = ("IMAP4REV1", "MOVE", "CONDSTORE")
+        self.untagged_responses: dict[str, list[bytes]] = {}
+        self.calls: list[str] = []
+        self.fetch_specs: list[str] = []
+        self.structures: dict[str, str] = {}
+        self.sections: dict[tuple[str, str], tuple[bytes, bytes]] = {}
+        self.alive = True
+
+    def login(self, user: str, password: str) -> tuple[str, list[bytes]]:
+        self.calls.append("LOGIN")
+        return "OK", [b"ok"]
+
+    def logout(self) -> tuple[str, list[bytes]]:
+        self.calls.append("LOGOUT")
+        return "BYE", [b""]
+
+    def noop(self) -> tuple[str, list[bytes]]:
+        self.calls.append("NOOP")
+        if not self.alive:
+            raise OSError("connection reset")
+        return "OK", [b""]
+
+    def select(self, mailbox: str, readonly: bool = False) -> tuple[str, list[bytes]]:
+        self.calls.append("EXAMINE" if readonly else "SELECT")
+        self.selected = mailbox
+        self.untagged_responses["UIDVALIDITY"] = [str(self.uidvalidity).encode()]
+        self.untagged_responses["UIDNEXT"] = [str(self._uidnext()).encode()]
+        if self.select_modseq:
+            self.untagged_responses["HIGHESTMODSEQ"] = [str(max(self.modseq.values(), default=1)).encode()]
+        return "OK", [str(len(self.messages)).encode()]
+
+    def _uidnext(self) -> int:
+        return max((int(u) for u in self.messages), default=0) + 1
+
+    def status(self, mailbox: str, names: str) -> tuple[str, list[bytes]]:
+        self.calls.append("STATUS")
+        # RFC 3501 6.3.10: STATUS on the selected mailbox may return stale values.
+        assert mailbox != getattr(self, "selected", None), "STATUS on the selected mailbox"
+        uidnext = self._uidnext()
+        highest = max(self.modseq.values(), default=1)
+        return "OK", [
+            f"{mailbox} (UIDVALIDITY {self.uidvalidity} UIDNEXT {uidnext} HIGHESTMODSEQ {highest})".encode()
+        ]
+
+    def uid(self, command: str, *args: object) -> tuple[str, list[object]]:
+        self.calls.append(f"UID {command}")
+        if command == "SEARCH":
+            words = str(args[1]).split()
+            uids = list(self.messages)
+            if words[:1] == ["UID"]:
+                lo, hi = words[1].split(":")
+                top = max(int(u) for u in uids)
+                # RFC 3501: n:* includes the highest UID even when it is below n
+                span = (int(lo), top) if hi == "*" else (int(lo), int(hi))
+                uids = [u for u in uids if min(span) <= int(u) <= max(span)]
+            if "MODSEQ" in words:
+                floor = int(words[words.index("MODSEQ") + 1])
+                uids = [u for u in uids if self.modseq.get(u, 1) >= floor]
+            return "OK", [" ".join(uids).encode()]
+        if command == "FETCH":
+            uid_set, spec = str(args[0]), str(args[1])
+            self.fetch_specs.append(spec)
+            if spec == "(UID BODYSTRUCTURE)":
+                return "OK", [f"1 (UID {uid_set} BODYSTRUCTURE {self.structures[uid_set]})".encode()]
+            section = re.search(r"(BODY|BINARY)\.PEEK\[([\d.]+)\](?:<(\d+)\.(\d+)>)?", spec)
+            if section:
+                item, part, start, length = section.groups()
+                encoded, decoded = self.sections[(uid_set, part)]
+                data = decoded if item == "BINARY" else encoded
+                lo = int(start or 0)
+                hi = lo + int(length) if length else len(data)
+                tail = f" BINARY.SIZE[{part}] {len(decoded)})" if "BINARY.SIZE" in spec else ")"
+                head = f"1 (UID {uid_set} {item}[{part}]<{lo}> {{{len(data[lo:hi])}}}"
+                return "OK", [(head.encode(), data[lo:hi]), tail.encode()]
+            rows: list[object] = []
+            for uid in uid_set.split(","):
+                raw = self.messages[uid]
+                if "HEADER.FIELDS" in spec:
+                    raw = raw.split(b"\r\n\r\n", 1)[0] + b"\r\n\r\n"
+                rows.append((f"{uid} (UID {uid} FLAGS () BODY[] {{{len(raw)}}}".encode(), raw))
+                rows.append(b")")
+            return "OK", rows
+        return "OK", [None]
+
+
+def _raw_message(uid: str) -> bytes:
+    return (
+        f"From: a{uid}@example.com\r\nSubject: s{uid}\r\nDate: d{uid}\r\n\r\nbody {uid}\r\n"
+    ).encode()
+
+
+class CountingImapAdapter(ImapAdapter):
+    def __init__(self, messages: dict[str, bytes], **kwargs: object):
+        super().__init__(**kwargs)  # type: ignore[arg-type]
+        self.messages = messages
+        self.modseq: dict[str, int] = {}
+        self.structures: dict[str, str] = {}
+        self.sections: dict[tuple[str, str], tuple[bytes, bytes]] = {}
+        self.extra_caps: tuple[str, ...] = ()
+        self.uidvalidity = 1
+        self.clients: list[FakeImapClient] = []
+
+    def _connect(self, account: AccountConfig, creds: dict[str, str]) -> FakeImapClient:  # type: ignore[override]
+        client = FakeImapClient(self.messages, self.modseq)
+        client.structures, client.sections = self.structures, self.sections
+        client.capabilities += self.extra_caps
+        client.uidvalidity = self.uidvalidity
+        client.login(creds["username"], creds["password"])
+        self.clients.append(client)
+        return client
+
+
+def test_imap_pool_reuses_session_and_reconnects(tmp_path: Path) -> None:
+    messages = {str(i): _raw_message(str(i)) for i in range(1, 4)}
+    adapter = CountingImapAdapter(messages, pool=ImapConnectionPool(keepalive_seconds=3600))
+    account = AccountConfig(account_id="acct1", smtp_host="smtp.local", imap_host="imap.local")
+    control = MailProtocolControl(
+        policy_path=_write_policy(tmp_path),
+        accounts=[account],
+        credential_provider=FakeCreds(),
+        smtp_adapter=FakeSmtp(),
+        imap_adapter=adapter,
+    )
+    for _ in range(3):
+        result = control.dispatch("mail_query", {"acct": "acct1", "mailbox": "INBOX"})
+        assert result["ok"] is True and len(result["items"]) == 3
+    got = control.dispatch("mail_get", {"acct": "acct1", "mailbox": "INBOX", "id": "2"})
+    assert got["sub"] == "s2"
+    assert len(adapter.clients) == 1
+    assert adapter.clients[0].calls.count("LOGIN") == 1
+    assert adapter.clients[0].calls.count("EXAMINE") == 1
+
+    # Stale session fails its keepalive NOOP: dropped and replaced without surfacing an error.
+    adapter.pool.keepalive_seconds = 0
+    adapter.clients[0].alive = False
+    result = control.dispatch("mail_query", {"acct": "acct1", "mailbox": "INBOX"})
+    assert result["ok"] is True
+    assert len(adapter.clients) == 2 and "LOGOUT" in adapter.clients[0].calls
+    control.close()
+    assert "LOGOUT" in adapter.clients[1].calls
+
+
+class FakeSmtpClient:
+    """smtplib.SMTP stand-in; failures scripted as (exception, raised_after_data)."""
+
+    def __init__(self, sent: list[str], script: list[tuple[Exception, bool]]):
+        self.sent = sent
+        self.script = script
+        self.sock: object | None = object()
+        self.esmtp_features = {"size": "0"}
+        self.data_started = False
+
+    def send_message(self, message: object) -> dict[str, object]:
+        if self.script:
+            exc, after_data = self.script.pop(0)
+            self.data_started = after_data
+            self.sock = None
+            raise exc
+        self.sent.append(str(message["Subject"]))  # type: ignore[index]
+        return {}
+
+    def noop(self) -> tuple[int, bytes]:
+        return 250, b"ok"
+
+    def quit(self) -> None:
+        self.sock = None
+
+    def close(self) -> None:
+        self.sock = None
+
+
+class CountingSmtpAdapter(SmtpAdapter):
+    def __init__(self) -> None:
+        super().__init__()
+        self.sent: list[str] = []
+        self.script: list[tuple[Exception, bool]] = []
+        self.connects = 0
+
+    def _connect(self, account: AccountConfig, creds: dict[str, str]) -> FakeSmtpClient:  # type: ignore[override]
+        self.connects += 1
+        return FakeSmtpClient(self.sent, self.script)
+
+
+def test_smtp_batch_reuses_session_and_retries_only_before_data(tmp_path: Path) -> None:
+    smtp = CountingSmtpAdapter()
+    account = AccountConfig(account_id="acct1", smtp_host="smtp.local", imap_host="imap.local")
+    control = MailProtocolControl(
+        policy_path=_write_policy(tmp_path),
+        accounts=[account],
+        credential_provider=FakeCreds(),
+        smtp_adapter=smtp,
+        imap_adapter=FakeImap(),
+    )
+    batch = {
+        "acct": "acct1",
+        "from": "me@example.com",
+        "messages": [{"to": "a@example.com", "subject": f"m{i}", "body": "x"} for i in range(3)],
+    }
+    result = control.dispatch("mail_send_batch", batch)
+    assert result["ok"] is True and result["sent"] == 3
+    assert smtp.sent == ["m0", "m1", "m2"] and smtp.connects == 1
+
+    # Relay closed the idle session / answered 421 at MAIL: reconnect and send once
+    smtp.script[:] = [(smtplib.SMTPServerDisconnected("gone"), False)]
+    assert control.dispatch("mail_send", {**batch["messages"][0], "acct": "acct1", "from": "me@example.com"})["ok"]
+    smtp.script[:] = [(smtplib.SMTPSenderRefused(421, b"closing", "me@example.com"), False)]
+    assert control.dispatch("mail_send", {**batch["messages"][1], "acct": "acct1", "from": "me@example.com"})["ok"]
+    assert smtp.sent[3:] == ["m0", "m1"] and smtp.connects == 3
+
+    # Lost after DATA: may be delivered, so no resend; the batch reports it and continues
+    smtp.script[:] = [(smtplib.SMTPServerDisconnected("lost"), True)]
+    result = control.dispatch("mail_send_batch", batch)
+    assert result["ok"] is False and result["code"] == "BATCH_PARTIAL"
+    assert [row["ok"] for row in result["results"]] == [False, True, True]
+    assert result["results"][0]["code"] == "SMTP_SEND_FAILED"
+    assert smtp.sent[5:] == ["m1", "m2"] and smtp.connects == 4
+
+
+def test_query_fetches_window_headers_in_one_round_trip() -> None:
+    messages = {str(i): _raw_message(str(i)) for i in (7, 3, 11, 5)}
+    adapter = CountingImapAdapter(messages)
+    account = AccountConfig(account_id="acct1", smtp_host="smtp.local", imap_host="imap.local")
+    data = adapter.query_messages(
+        account, {"username": "u", "password": "p"}, {"mailbox": "INBOX", "lim": 3, "offset": 1}
+    )
+    assert [row["id"] for row in data["items"]] == ["3", "11", "5"]
+    assert [row["sub"] for row in data["items"]] == ["s3", "s11", "s5"]
+    assert adapter.clients[0].calls.count("UID FETCH") == 1
+    assert data["total"] == 4 and data["next"] is None
+
+
+def test_parse_uid_fetch_uid_after_literal() -> None:
+    data = [
+        (b"1 (FLAGS (\\Seen) BODY[HEADER.FIELDS (SUBJECT)] {13}", b"Subject: a\r\n\r\n"),
+        b" UID 40)",
+        (b"2 (UID 41 BODY[HEADER.FIELDS (SUBJECT)] {13}", b"Subject: b\r\n\r\n"),
+        b")",
+    ]
+    assert _parse_uid_fetch(data) == {
+        "40": b"Subject: a\r\n\r\n",
+        "41": b"Subject: b\r\n\r\n",
+    }
+
+
+def _attachment_fixture(adapter: CountingImapAdapter, blob: bytes, notes: bytes) -> None:
+    b64 = base64.encodebytes(blob).replace(b"\n", b"\r\n").rstrip(b"\r\n")
+    adapter.messages["9"] = (
+        b"From: a@example.com\r\nSubject: s\r\nMIME-Version: 1.0\r\n"
+        b'Content-Type: multipart/mixed; boundary="b1"\r\n\r\n'
+        b"--b1\r\nContent-Type: text/plain\r\n\r\nhello\r\n"
+        b'--b1\r\nContent-Type: application/octet-stream; name="report.bin"\r\n'
+        b'Content-Disposition: attachment; filename="report.bin"\r\n'
+        b"Content-Transfer-Encoding: base64\r\n\r\n" + b64 + b"\r\n"
+        b'--b1\r\nContent-Type: text/plain\r\nContent-Disposition: attachment; filename="notes.txt"\r\n\r\n'
+        + notes + b"\r\n--b1--\r\n"
+    )
+    adapter.structures["9"] = (
+        '(("text" "plain" NIL NIL NIL "7bit" 5 1 NIL NIL NIL NIL)'
+        f'("application" "octet-stream" ("name" "report.bin") NIL NIL "base64" {len(b64)} NIL'
+        ' ("attachment" ("filename" "report.bin")) NIL NIL)'
+        f'("text" "plain" NIL NIL NIL "7bit" {len(notes)} 1 NIL ("attachment" ("filename" "notes.txt")) NIL NIL)'
+        ' "mixed" ("boundary" "b1") NIL NIL NIL)'
+    )
+    adapter.sections[("9", "2")] = (b64, blob)
+    adapter.sections[("9", "3")] = (notes, notes)
+
+
+def test_get_attachment_fetches_only_the_part_and_caches_it(tmp_path: Path) -> None:
+    blob = bytes(range(256)) * 12
+    notes = b"n" * 1500
+    account = AccountConfig(account_id="acct1", smtp_host="smtp.local", imap_host="imap.local")
+    creds = {"username": "u", "password": "p"}
+
+    def _read_all(adapter: CountingImapAdapter, index: int) -> tuple[bytes, list[dict]]:
+        out, rows, offset = b"", [], 0
+        while offset is not None:
+            row = adapter.get_attachment(
+                account, creds, {"id": "9", "attachment_index": index, "offset": offset, "chunk_size": 1024}
+            )
+            out += base64.b64decode(row["content_bytes_base64"])
+            rows.append(row)
+            offset = row["next_offset"]
+        return out, rows
+
+    adapter = CountingImapAdapter({})
+    _attachment_fixture(adapter, blob, notes)
+    legacy = adapter._attachment_from_message(FakeImapClient(adapter.messages), "9", 0, 0, 1 << 20)  # type: ignore[arg-type]
+    data, rows = _read_all(adapter, 0)
+    specs = adapter.clients[0].fetch_specs
+    assert data == blob and rows[0]["size"] == legacy["size"] == len(blob)
+    assert rows[0]["filename"] == legacy["filename"] == "report.bin"
+    assert rows[-1]["done"] and rows[0]["content_type"] == "application/octet-stream"
+    # BODYSTRUCTURE once, the encoded part once; later chunks come from the memory cache
+    assert specs == ["(UID BODYSTRUCTURE)", "(UID BODY.PEEK[2])"]
+    notes_data, _ = _read_all(adapter, 1)
+    assert notes_data == notes
+    assert specs[2:] == ["(UID BODY.PEEK[3]<0.1024>)", "(UID BODY.PEEK[3]<1024.1024>)"]
+
+    adapter = CountingImapAdapter({}, part_cache=AttachmentPartCache(tmp_path / "parts"))
+    adapter.extra_caps = ("BINARY",)
+    _attachment_fixture(adapter, blob, notes)
+    assert _read_all(adapter, 0)[0] == blob
+    assert adapter.clients[0].fetch_specs == ["(UID BODYSTRUCTURE)", "(UID BODY.PEEK[2])"]
+    fresh = CountingImapAdapter({}, part_cache=AttachmentPartCache(tmp_path / "parts"))
+    _attachment_fixture(fresh, blob, notes)
+    assert _read_all(fresh, 0)[0] == blob and fresh.clients[0].fetch_specs == []
+    reset = CountingImapAdapter({}, part_cache=AttachmentPartCache(tmp_path / "parts"))
+    reset.uidvalidity = 2
+    _attachment_fixture(reset, blob, notes)
+    assert _read_all(reset, 0)[0] == blob
+    assert reset.clients[0].fetch_specs == ["(UID BODYSTRUCTURE)", "(UID BODY.PEEK[2])"]
+
+    # A part above max_bytes // 4 spills to a temp file instead of being re-fetched per chunk
+    small = AttachmentPartCache(max_bytes=4096)
+    spilled = CountingImapAdapter({}, part_cache=small)
+    _attachment_fixture(spilled, blob, notes)
+    assert _read_all(spilled, 0)[0] == blob and len(blob) > 4096 // 4
+    assert spilled.clients[0].fetch_specs == ["(UID BODYSTRUCTURE)", "(UID BODY.PEEK[2])"]
+    spill_dir = small._spill_dir(create=False)
+    assert spill_dir is not None and any(spill_dir.iterdir())
+    spilled.close()
+    assert not spill_dir.exists()
+
+    # Server-side decoding: each chunk is one ranged BINARY fetch, nothing fetched whole
+    ranged = CountingImapAdapter({})
+    ranged.extra_caps = ("BINARY",)
+    _attachment_fixture(ranged, blob, notes)
+    assert _read_all(ranged, 0)[0] == blob
+    assert ranged.clients[0].fetch_specs[1:] == [
+        f"(UID BINARY.PEEK[2]<{o}.1024> BINARY.SIZE[2])" for o in (0, 1024, 2048)
+    ]
+
+
+def test_sync_returns_only_delta_and_persists_cursor(tmp_path: Path) -> None:
+    messages = {str(i): _raw_message(str(i)) for i in range(1, 6)}
+    adapter = CountingImapAdapter(messages)
+    account = AccountConfig(account_id="acct1", smtp_host="smtp.local", imap_host="imap.local")
+
+    def control() -> MailProtocolControl:
+        return MailProtocolControl(
+            policy_path=_write_policy(tmp_path),
+            accounts=[account],
+            credential_provider=FakeCreds(),
+            smtp_adapter=FakeSmtp(),
+            imap_adapter=adapter,
+            state_dir=tmp_path / "state",
+        )
+
+    first = control().dispatch("mail_sync", {"acct": "acct1", "lim": 3})
+    assert first["full_resync"] is True and first["new"] == ["1", "2", "3"] and first["more"]
+    rest = control().dispatch("mail_sync", {"acct": "acct1"})  # resumes from persisted state
+    assert rest["full_resync"] is False and rest["new"] == ["4", "5"] and not rest["more"]
+
+    calls = len(adapter.clients[0].calls)
+    idle = control().dispatch("mail_sync", {"acct": "acct1"})
+    assert idle["new"] == [] and idle["changed"] == []
+    # INBOX is still selected on the pooled session: NOOP + EXAMINE instead of STATUS.
+    assert adapter.clients[0].calls[calls:] == ["NOOP", "EXAMINE"]
+    adapter.clients[0].select_modseq = False  # reply without HIGHESTMODSEQ keeps the old one
+    assert control().dispatch("mail_sync", {"acct": "acct1"})["new"] == []
+    adapter.clients[0].select_modseq = True
+
+    messages["6"] = _raw_message("6")
+    adapter.modseq.update({"2": 5, "6": 5})
+    delta = control().dispatch("mail_sync", {"acct": "acct1", "commit": False})
+    assert delta["new"] == ["6"] and delta["changed"] == ["2"]
+    again = control().dispatch("mail_sync", {"acct": "acct1"})  # not committed: same delta
+    assert again["new"] == ["6"]
+    assert control().dispatch("mail_sync", {"acct": "acct1", "cursor": again["next"]})["new"] == []
+
+    adapter.clients[0].uidvalidity = 2
+    resync = control().dispatch("mail_sync", {"acct": "acct1", "baseline": True})
+    assert resync["full_resync"] is True and resync["new"] == []
+    assert control().dispatch("mail_sync", {"acct": "acct1"})["new"] == []
+
+    calls = len(adapter.clients[0].calls)  # INBOX selected: STATUS on another mailbox is fine
+    other = control().dispatch("mail_sync", {"acct": "acct1", "mailbox": "Archive", "baseline": True})
+    assert other["full_resync"] is True and adapter.clients[0].calls[calls:] == ["STATUS"]
+
+
+def test_imap_idle_wakes_on_exists_and_restores_client() -> None:
+    import socket
+    import threading
+
+    server, client_sock = socket.socketpair()
+
+    class IdleClient:
+        def __init__(self) -> None:
+            self.sock = client_sock
+            self.file = client_sock.makefile("rb")
+
+        def _new_tag(self) -> bytes:
+            return b"A7"
+
+        def send(self, data: bytes) -> None:
+            self.sock.sendall(data)
+
+    seen: list[bytes] = []
+
+    def serve() -> None:
+        rfile = server.makefile("rb")
+        seen.append(rfile.readline())
+        server.sendall(b"+ idling\r\n")
+        server.sendall(b"* 1 RECENT\r\n* 9 EXISTS\r\n")
+        seen.append(rfile.readline())
+        server.sendall(b"* 10 EXISTS\r\nA7 OK IDLE terminated\r\n* OK after\r\n")
+
+    t = threading.Thread(target=serve)
+    t.start()
+    client = IdleClient()
+    buffered = client.file
+    events = _imap_idle(client, timeout=5)  # type: ignore[arg-type]
+    t.join()
+    assert events == ["9 EXISTS", "10 EXISTS"]
+    assert seen == [b"A7 IDLE\r\n", b"DONE\r\n"]
+    assert client.file is buffered and client.file.readline() == b"* OK after\r\n"
+    server.close()
+    client_sock.close()
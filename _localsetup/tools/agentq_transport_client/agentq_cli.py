@@ -1,7 +1,7 @@
 #!/usr/bin/env python3
 # Purpose: Thin CLI for Agent Q transport client (version, PRD stamp, key doctor stubs).
 # Created: 2026-03-09
-# Last updated: 2026-03-09
+# Last updated: 2026-10-17
 
 """Run from repo root: python _localsetup/tools/agentq_transport_client/agentq_cli.py <cmd>"""
 
@@ -92,22 +92,27 @@ def cmd_registry_validate(args: argparse.Namespace) -> int:
 
 
 def cmd_mail_pull(args: argparse.Namespace) -> int:
-    from agentq_transport_client.mail_adapter import mail_pull_and_promote
+    from agentq_transport_client.mail_adapter import mail_pull_and_promote, mail_pull_sweep
 
     policy = Path(args.policy)
     accounts = Path(args.accounts)
-    r = mail_pull_and_promote(
-        queue_root=Path(args.queue),
-        account_id=args.account,
-        policy_path=policy,
-        accounts_path=accounts,
-        mailbox=args.mailbox,
-        post_ingest_mailbox=args.post_mailbox,
-        query=args.query,
-        lim=args.lim,
-        confirm_token=args.confirm_token or "",
-        registry_path=Path(args.registry) if getattr(args, "registry", None) else None,
-    )
+    mailboxes = args.mailbox or ["INBOX"]
+    common = {
+        "queue_root": Path(args.queue),
+        "policy_path": policy,
+        "accounts_path": accounts,
+        "post_ingest_mailbox": args.post_mailbox,
+        "query": args.query,
+        "lim": args.lim,
+        "confirm_token": args.confirm_token or "",
+        "registry_path": Path(args.registry) if getattr(args, "registry", None) else None,
+        "incremental": args.incremental,
+        "concurrency": args.concurrency,
+    }
+    if len(args.account) == 1 and len(mailboxes) == 1:
+        r = mail_pull_and_promote(account_id=args.account[0], mailbox=mailboxes[0], **common)
+    else:
+        r = mail_pull_sweep(account_ids=args.account, mailboxes=mailboxes, **common)
     import json
 
     print(json.dumps(r, indent=2))
@@ -152,6 +157,7 @@ def cmd_mail_move_retry(args: argparse.Namespace) -> int:
         policy_path=Path(args.policy),
         accounts_path=Path(args.accounts),
         confirm_token=args.confirm_token or "",
+        concurrency=args.concurrency,
     )
     import json
 
@@ -172,6 +178,18 @@ def cmd_archive_prune(args: argparse.Namespace) -> int:
     return 0
 
 
+def cmd_ledger_compact(args: argparse.Namespace) -> int:
+    from agentq_transport_client.ledger import compact_ledger
+
+    r = compact_ledger(
+        Path(args.queue),
+        compress=not args.no_gzip,
+        min_bytes=int(args.min_mb * 1024 * 1024),
+    )
+    print(r)
+    return 0
+
+
 def cmd_queue_pending(args: argparse.Namespace) -> int:
     from agentq_transport_client.queue_ops import (
         list_in_ready,
@@ -206,22 +224,37 @@ def cmd_ship_mail(args: argparse.Namespace) -> int:
             sys.stderr.write("[FAIL] Provide --manifest or non-empty --manifest-json\n")
             return 1
         manifest = json.loads(args.manifest_json)
-    r = mail_ship_agentq_outer(
-        account_id=args.account,
-        policy_path=Path(args.policy),
-        accounts_path=Path(args.accounts),
-        manifest=manifest,
-        to_addr=args.to,
-        subject=args.subject,
-        from_addr=args.from_addr,
-        queue_root=Path(args.queue) if getattr(args, "queue", None) else None,
-        skip_pre_ship=args.skip_pre_ship,
-        pre_ship_cwd=Path(args.pre_ship_cwd) if getattr(args, "pre_ship_cwd", None) else None,
-    )
+    from agentq_transport_client.mail_adapter import mail_controller
+
+    # One controller for the fan-out: every recipient rides the same SMTP session.
+    ctrl = mail_controller(Path(args.policy), Path(args.accounts))
+    results = []
+    skip_pre_ship = args.skip_pre_ship
+    try:
+        for to_addr in args.to:
+            r = mail_ship_agentq_outer(
+                account_id=args.account,
+                policy_path=Path(args.policy),
+                accounts_path=Path(args.accounts),
+                manifest=manifest,
+                to_addr=to_addr,
+                subject=args.subject,
+                from_addr=args.from_addr,
+                queue_root=Path(args.queue) if getattr(args, "queue", None) else None,
+                skip_pre_ship=skip_pre_ship,
+                pre_ship_cwd=Path(args.pre_ship_cwd) if getattr(args, "pre_ship_cwd", None) else None,
+                ctrl=ctrl,
+            )
+            results.append(r)
+            if r.get("code") == "PRE_SHIP_FAILED":
+                break
+            skip_pre_ship = True  # checks passed for this manifest; no need to rerun per recipient
+    finally:
+        ctrl.close()
     import json
 
-    print(json.dumps(r, indent=2))
-    return 0 if r.get("ok") else 1
+    print(json.dumps(results[0] if len(results) == 1 else results, indent=2))
+    return 0 if results and all(r.get("ok") for r in results) else 1
 
 
 def cmd_ship_mail_strict(args: argparse.Namespace) -> int:
@@ -282,22 +315,24 @@ def cmd_ingest_blob(args: argparse.Namespace) -> int:
     return 0 if r.get("status") in ("ok", "skipped") else 1
 
 
-def cmd_file_drop_poll(args: argparse.Namespace) -> int:
-    from agentq_transport_client.ingest import run_file_drop_poll
-    from agentq_transport_client.registry import (
-        file_drop_inbound_roots,
-        load_registry_yaml,
-        validate_registry,
-    )
+def _file_drop_roots(args: argparse.Namespace) -> list[Path]:
+    """Registry inbound roots for --agent plus any --root dirs."""
+    from agentq_transport_client.registry import file_drop_inbound_roots, load_validated_registry
 
-    priv = Path(args.privkey).read_text(encoding="utf-8", errors="replace")
     roots: list[Path] = []
     if args.registry and args.agent:
-        raw = load_registry_yaml(Path(args.registry))
-        validated = validate_registry(raw, require_keys_exist=False)
+        validated = load_validated_registry(Path(args.registry), require_keys_exist=False)
         roots = file_drop_inbound_roots(validated, args.agent)
     if args.root:
         roots.extend(Path(p) for p in args.root)
+    return roots
+
+
+def cmd_file_drop_poll(args: argparse.Namespace) -> int:
+    from agentq_transport_client.ingest import run_file_drop_poll
+
+    priv = Path(args.privkey).read_text(encoding="utf-8", errors="replace")
+    roots = _file_drop_roots(args)
     if not roots:
         sys.stderr.write("[FAIL] No roots: use --registry + --agent or --root\n")
         return 1
@@ -311,6 +346,8 @@ def cmd_file_drop_poll(args: argparse.Namespace) -> int:
         registry_path=Path(args.registry) if args.registry else None,
         strict_gpg=getattr(args, "strict_gpg", False),
         use_lockfile=getattr(args, "use_lockfile", False),
+        workers=max(1, getattr(args, "workers", 1)),
+        ledger_fsync=args.ledger_fsync,
     )
     import json
 
@@ -318,6 +355,79 @@ def cmd_file_drop_poll(args: argparse.Namespace) -> int:
     return 0
 
 
+def cmd_watch(args: argparse.Namespace) -> int:
+    import json
+
+    from agentq_transport_client.watch import inotify_available, run_file_drop_watch
+
+    priv = Path(args.privkey).read_text(encoding="utf-8", errors="replace")
+    roots = _file_drop_roots(args)
+    if not roots:
+        sys.stderr.write("[FAIL] No roots: use --registry + --agent or --root\n")
+        return 1
+    use_inotify = not args.poll_only and inotify_available()
+    sys.stderr.write(
+        "[INFO] watching %d root(s) via %s\n" % (len(roots), "inotify" if use_inotify else "polling")
+    )
+    run_file_drop_watch(
+        roots,
+        queue_root=Path(args.queue),
+        recipient_private_armored=priv,
+        passphrase=args.passphrase or "",
+        sealed_extension=args.extension,
+        registry_path=Path(args.registry) if args.registry else None,
+        strict_gpg=args.strict_gpg,
+        use_lockfile=args.use_lockfile,
+        workers=max(1, args.workers),
+        ledger_fsync=args.ledger_fsync,
+        rescan_interval=args.interval,
+        use_inotify=use_inotify,
+        on_result=lambda r: print(json.dumps(r), flush=True),
+    )
+    return 0
+
+
+def cmd_mail_watch(args: argparse.Namespace) -> int:
+    import json
+
+    from agentq_transport_client.mail_adapter import mail_watch
+
+    sys.stderr.write("[INFO] IMAP IDLE on %s for %d account(s)\n" % (args.mailbox, len(args.account)))
+    mail_watch(
+        queue_root=Path(args.queue),
+        account_ids=list(dict.fromkeys(args.account)),
+        policy_path=Path(args.policy),
+        accounts_path=Path(args.accounts),
+        mailbox=args.mailbox,
+        post_ingest_mailbox=args.post_mailbox,
+        lim=args.lim,
+        confirm_token=args.confirm_token or "",
+        registry_path=Path(args.registry) if args.registry else None,
+        renew_seconds=args.renew,
+        poll_seconds=args.poll_interval,
+        on_result=lambda r: print(json.dumps(r), flush=True),
+    )
+    return 0
+
+
+def cmd_bench(args: argparse.Namespace) -> int:
+    import json
+
+    from agentq_transport_client.bench import run_bench
+
+    r = run_bench(
+        count=max(1, args.count),
+        body_bytes=args.body_bytes,
+        attachments=args.attachments,
+        attachment_bytes=args.attachment_bytes,
+        workers=max(1, args.workers),
+        ledger_fsync=args.ledger_fsync,
+        work_dir=Path(args.work_dir) if args.work_dir else None,
+    )
+    print(json.dumps(r, indent=2))
+    return 0 if r.get("status") == "ok" else 1
+
+
 def cmd_ship_file_drop_multi(args: argparse.Namespace) -> int:
     from agentq_transport_client.ship import load_manifest_from_path, ship_file_drop_multi
 
@@ -334,7 +444,13 @@ def cmd_ship_file_drop_multi(args: argparse.Namespace) -> int:
     if args.write_ready_sha256:
         kw["write_ready_sha256"] = True
     r = ship_file_drop_multi(
-        manifest, Path(args.registry), Path(args.out), stem=args.stem, **kw
+        manifest,
+        Path(args.registry),
+        Path(args.out),
+        stem=args.stem,
+        encrypt_once=not args.per_recipient_seal,
+        workers=max(1, args.workers),
+        **kw,
     )
     print(r)
     return 0 if all(x.get("status") == "ok" for x in r if isinstance(x, dict)) else 1
@@ -349,7 +465,8 @@ def cmd_ship_bundle(args: argparse.Namespace) -> int:
         Path(args.out),
         args.stem,
         from_agent_id=args.from_agent,
-        max_bytes=int(args.max_mb) * 1024 * 1024,
+        max_bytes=int(args.max_mb) * 1024 * 1024 or None,
+        part_bytes=int(args.part_mb * 1024 * 1024),
         queue_root=Path(args.queue) if args.queue else None,
         signer_gnupghome=Path(args.signer_gnupghome) if args.signer_gnupghome else None,
         signer_uid=args.signer_uid or "",
@@ -372,6 +489,14 @@ def cmd_prune_processed(args: argparse.Namespace) -> int:
     return 0
 
 
+def cmd_prune_bundles(args: argparse.Namespace) -> int:
+    from agentq_transport_client.prune import prune_bundles
+
+    r = prune_bundles(Path(args.queue), older_than_days=args.days, dry_run=args.dry_run)
+    print(r)
+    return 0
+
+
 def cmd_doctor(args: argparse.Namespace) -> int:
     import shutil
     import subprocess
@@ -458,17 +583,46 @@ def main() -> int:
 
     sp = sub.add_parser("mail-pull", help="IMAP UNSEEN -> get_decrypted -> promote -> move processed")
     sp.add_argument("--queue", required=True, help="Queue root")
-    sp.add_argument("--account", required=True, help="Mail account_id")
+    sp.add_argument(
+        "--account", required=True, action="append", help="Mail account_id (repeatable; swept concurrently)"
+    )
     sp.add_argument("--policy", default="_localsetup/config/mail_protocol_policy.yaml")
     sp.add_argument("--accounts", default="_localsetup/config/mail_accounts.json")
-    sp.add_argument("--mailbox", default="INBOX")
+    sp.add_argument("--mailbox", action="append", help="Mailbox (repeatable; default INBOX)")
     sp.add_argument("--post-mailbox", default="LocalsetupAgentQ/Processed")
     sp.add_argument("--query", default="UNSEEN")
     sp.add_argument("--lim", type=int, default=25)
     sp.add_argument("--confirm-token", default="", help="If policy requires confirmation for move")
     sp.add_argument("--registry", default="", help="agent_trust_registry.yaml path; enforce from_agent_id in agents")
+    sp.add_argument(
+        "--incremental",
+        action="store_true",
+        help="Pull UIDs new since the stored sync cursor (UIDVALIDITY/UIDNEXT/MODSEQ) instead of --query",
+    )
+    sp.add_argument(
+        "--concurrency", type=int, default=2, help="IMAP calls in flight per account (pooled sessions)"
+    )
     sp.set_defaults(run=cmd_mail_pull)
 
+    sp = sub.add_parser(
+        "mail-watch",
+        help="Hold IMAP IDLE per account; incremental pull -> promote as soon as mail arrives",
+    )
+    sp.add_argument("--queue", required=True, help="Queue root")
+    sp.add_argument("--account", required=True, action="append", help="Mail account_id (repeatable)")
+    sp.add_argument("--policy", default="_localsetup/config/mail_protocol_policy.yaml")
+    sp.add_argument("--accounts", default="_localsetup/config/mail_accounts.json")
+    sp.add_argument("--mailbox", default="INBOX")
+    sp.add_argument("--post-mailbox", default="LocalsetupAgentQ/Processed")
+    sp.add_argument("--lim", type=int, default=25)
+    sp.add_argument("--confirm-token", default="", help="If policy requires confirmation for move")
+    sp.add_argument("--registry", default="", help="agent_trust_registry.yaml path; enforce from_agent_id in agents")
+    sp.add_argument("--renew", type=int, default=1500, help="Re-issue IDLE every N seconds (max 1740)")
+    sp.add_argument(
+        "--poll-interval", type=float, default=60.0, help="Pull interval when IDLE is unavailable or fails"
+    )
+    sp.set_defaults(run=cmd_mail_watch)
+
     sp = sub.add_parser("ship-file-drop", help="Seal manifest to recipient pubkey; write .agentq.asc + .ready")
     sp.add_argument("--manifest", help="Path to PRD .md or manifest .json")
     sp.add_argument("--manifest-json", default="", help="Inline JSON manifest if no --manifest")
@@ -501,6 +655,7 @@ def main() -> int:
     sp.add_argument("--policy", default="_localsetup/config/mail_protocol_policy.yaml")
     sp.add_argument("--accounts", default="_localsetup/config/mail_accounts.json")
     sp.add_argument("--confirm-token", default="")
+    sp.add_argument("--concurrency", type=int, default=2, help="Moves in flight at once")
     sp.set_defaults(run=cmd_mail_move_retry)
 
     sp = sub.add_parser(
@@ -513,6 +668,17 @@ def main() -> int:
     sp.add_argument("--dry-run", action="store_true")
     sp.set_defaults(run=cmd_archive_prune)
 
+    sp = sub.add_parser(
+        "ledger-compact",
+        help="Rotate ingest/ship ledgers into dated segments; snapshot idempotency state",
+    )
+    sp.add_argument("--queue", required=True)
+    sp.add_argument("--no-gzip", action="store_true", help="Write plain .jsonl segments")
+    sp.add_argument(
+        "--min-mb", type=float, default=0, help="Skip a ledger smaller than N MB (0=always rotate)"
+    )
+    sp.set_defaults(run=cmd_ledger_compact)
+
     sp = sub.add_parser(
         "queue-pending",
         help="List in/ or move to pending/ (by ack_required or --transport-id)",
@@ -525,7 +691,9 @@ def main() -> int:
     sp = sub.add_parser("ship-mail", help="mail_send_encrypted agentq_outer (set openpgp_public_key in env)")
     sp.add_argument("--account", required=True)
     sp.add_argument("--from-addr", required=True, dest="from_addr")
-    sp.add_argument("--to", required=True)
+    sp.add_argument(
+        "--to", required=True, action="append", help="Recipient; repeat to fan out over one SMTP session"
+    )
     sp.add_argument("--subject", default="AgentQ handoff")
     sp.add_argument("--manifest", help="Path to PRD .md or manifest .json")
     sp.add_argument("--manifest-json", default="{}")
@@ -601,8 +769,62 @@ def main() -> int:
         action="store_true",
         help="fcntl lock on sealed before claim (shared NFS)",
     )
+    sp.add_argument(
+        "--workers",
+        type=int,
+        default=1,
+        help="Decrypt/promote claimed blobs in N worker processes (claim stays serial)",
+    )
+    sp.add_argument(
+        "--ledger-fsync",
+        choices=["event", "batch", "none"],
+        default="batch",
+        help="Ingest ledger durability: fsync per event, once per batch, or never",
+    )
     sp.set_defaults(run=cmd_file_drop_poll)
 
+    sp = sub.add_parser(
+        "watch",
+        help="Long-running file_drop ingest: inotify on .ready markers, polling fallback",
+    )
+    sp.add_argument("--queue", required=True)
+    sp.add_argument("--privkey", required=True)
+    sp.add_argument("--passphrase", default="")
+    sp.add_argument("--registry", default="", help="YAML path; with --agent loads file_drop allowed_inbound_roots")
+    sp.add_argument("--agent", default="", help="Peer agent_id for registry inbound roots")
+    sp.add_argument("--root", action="append", default=[], help="Extra root dir (repeatable)")
+    sp.add_argument("--extension", default=".agentq.asc")
+    sp.add_argument("--strict-gpg", action="store_true")
+    sp.add_argument("--use-lockfile", action="store_true")
+    sp.add_argument("--workers", type=int, default=1)
+    sp.add_argument(
+        "--interval",
+        type=float,
+        default=60.0,
+        help="Full rescan interval in seconds (poll interval when inotify is unavailable)",
+    )
+    sp.add_argument("--poll-only", action="store_true", help="Do not use inotify")
+    sp.add_argument(
+        "--ledger-fsync",
+        choices=["event", "batch", "none"],
+        default="batch",
+        help="Ingest ledger durability: fsync per event, once per batch, or never",
+    )
+    sp.set_defaults(run=cmd_watch)
+
+    sp = sub.add_parser(
+        "bench",
+        help="Seal N synthetic manifests to a throwaway key, poll them, report blobs/s + stage latency",
+    )
+    sp.add_argument("-n", "--count", type=int, default=100)
+    sp.add_argument("--body-bytes", type=int, default=4096, help="prd_body size per manifest")
+    sp.add_argument("--attachments", type=int, default=0, help="Attachments per manifest")
+    sp.add_argument("--attachment-bytes", type=int, default=65536)
+    sp.add_argument("--workers", type=int, default=1)
+    sp.add_argument("--ledger-fsync", choices=["event", "batch", "none"], default="batch")
+    sp.add_argument("--work-dir", default="", help="Keep generated drop/queue here (default: temp)")
+    sp.set_defaults(run=cmd_bench)
+
     sp = sub.add_parser(
         "ship-file-drop-multi",
         help="Ship to each manifest.to_agent_ids using registry pubkeys",
@@ -617,18 +839,30 @@ def main() -> int:
     sp.add_argument("--signer-uid", default="")
     sp.add_argument("--signer-passphrase", default="")
     sp.add_argument("--write-ready-sha256", action="store_true")
+    sp.add_argument(
+        "--per-recipient-seal",
+        action="store_true",
+        help="Encrypt separately per recipient (default: one message, one PKESK per recipient)",
+    )
+    sp.add_argument("--workers", type=int, default=8, help="Parallel drop writers")
     sp.set_defaults(run=cmd_ship_file_drop_multi)
 
     sp = sub.add_parser(
         "ship-bundle",
-        help="Tar.gz a directory into manifest attachment (max size cap); seal like ship-file-drop",
+        help="Stream a directory as tar.gz into sealed drop(s); large bundles split into parts",
     )
     sp.add_argument("src_dir", help="Directory to pack")
     sp.add_argument("--pubkey", required=True, help="Recipient public key file")
     sp.add_argument("--out", required=True, help="Outbound directory")
     sp.add_argument("--stem", default="bundle", help="Stem for sealed files")
     sp.add_argument("--from-agent", default="local", dest="from_agent")
-    sp.add_argument("--max-mb", type=int, default=20, help="Max tar.gz size in MB")
+    sp.add_argument("--max-mb", type=int, default=0, help="Max tar.gz size in MB (0=no cap)")
+    sp.add_argument(
+        "--part-mb",
+        type=float,
+        default=8,
+        help="Split the streamed tar.gz into sealed parts of N MB (ingest reassembles)",
+    )
     sp.add_argument("--queue", default="", help="Queue root for ship_log")
     sp.add_argument("--signer-gnupghome", default="", help="Strict gpg signer homedir")
     sp.add_argument("--signer-uid", default="")
@@ -642,6 +876,14 @@ def main() -> int:
     sp.add_argument("--dry-run", action="store_true", help="List only, do not delete")
     sp.set_defaults(run=cmd_prune_processed)
 
+    sp = sub.add_parser(
+        "prune-bundles", help="Remove incomplete inbox/.bundles/* untouched for N days"
+    )
+    sp.add_argument("--queue", required=True, help="Queue root")
+    sp.add_argument("--days", type=float, default=7.0, help="Age of the newest part in days")
+    sp.add_argument("--dry-run", action="store_true", help="List only, do not delete")
+    sp.set_defaults(run=cmd_prune_bundles)
+
     sp = sub.add_parser("doctor", help="gpg presence + optional registry-validate")
     sp.add_argument("--registry", default="", help="If set, run validate_registry with keys on disk")
     sp.set_defaults(run=cmd_doctor)
@@ -1,7 +1,7 @@
 #!/usr/bin/env python3
 # Purpose: Extract manifest attachments (content_b64) and verify sha256; sidecar archive slice.
 # Created: 2026-03-09
-# Last updated: 2026-03-09
+# Last updated: 2026-10-17
 
 from __future__ import annotations
 
@@ -27,14 +27,32 @@ def _safe_relpath(path: str) -> Path:
     return Path(*parts)
 
 
+# Base64 chars decoded per write; multiple of 4 so slices decode independently.
+_B64_CHUNK = 4 * 256 * 1024
+
+
+def _spill_b64(b64: str, out: Path) -> tuple[str, int]:
+    """Decode b64 in chunks straight into out, hashing as we go. Returns (sha256, bytes)."""
+    h = hashlib.sha256()
+    n = 0
+    with open(out, "wb") as f:
+        for i in range(0, len(b64), _B64_CHUNK):
+            chunk = base64.b64decode(b64[i : i + _B64_CHUNK], validate=True)
+            h.update(chunk)
+            f.write(chunk)
+            n += len(chunk)
+    return h.hexdigest(), n
+
+
 def extract_attachments_to_staging(
     staging_dir: Path,
     manifest: dict[str, Any],
 ) -> None:
     """
-    For each attachment with content_b64, decode, sha256 verify, write under staging_dir/attachments/.
-    Strips content_b64 from manifest copy on disk only if we write manifest.json after (caller writes prd only then skip).
-    Raises CryptoPipelineError ingest_checksum_fail on mismatch.
+    For each attachment with content_b64, decode in chunks with incremental sha256 straight to
+    staging_dir/attachments/<path>. On success the row's content_b64 is replaced in place by a
+    reference (stored_path relative to the promoted dir, bytes), so manifest.json never carries
+    inline content. Raises CryptoPipelineError ingest_checksum_fail on mismatch.
     """
     att = manifest.get("attachments")
     if not att or not isinstance(att, list):
@@ -50,19 +68,25 @@ def extract_attachments_to_staging(
         b64 = row.get("content_b64")
         if not b64 or not isinstance(b64, str):
             continue
+        rel = _safe_relpath(row.get("path") or f"file_{i}")
+        out = base / rel
+        out.parent.mkdir(parents=True, exist_ok=True)
+        part = out.with_name(out.name + ".part")
         try:
-            raw = base64.b64decode(b64, validate=True)
-        except Exception as exc:
+            digest, size = _spill_b64(b64, part)
+        except ValueError as exc:
+            part.unlink(missing_ok=True)
             raise CryptoPipelineError(
                 "MANIFEST_INVALID", f"attachments[{i}] content_b64 invalid: {exc}"
             ) from exc
-        digest = hashlib.sha256(raw).hexdigest()
         if digest != sha:
+            part.unlink(missing_ok=True)
             raise CryptoPipelineError(
                 "ingest_checksum_fail",
                 f"attachments[{i}] sha256 mismatch expected {sha} got {digest}",
             )
-        rel = _safe_relpath(row.get("path") or f"file_{i}")
-        out = base / rel
-        out.parent.mkdir(parents=True, exist_ok=True)
-        out.write_bytes(raw)
+        part.replace(out)
+        ref = {k: v for k, v in row.items() if k != "content_b64"}
+        ref["bytes"] = size
+        ref["stored_path"] = (Path("attachments") / rel).as_posix()
+        att[i] = ref
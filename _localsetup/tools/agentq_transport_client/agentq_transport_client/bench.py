@@ -0,0 +1,164 @@
+#!/usr/bin/env python3
+# Purpose: Ingest load generator for `agentq_cli bench` (throughput + per-stage latency baseline).
+# Created: 2026-10-17
+# Last updated: 2026-10-17
+
+"""
+Stage samples come from timing.stage() hooks in ingest/ledger; run_bench installs the sink.
+"""
+
+from __future__ import annotations
+
+import base64
+import hashlib
+import os
+import tempfile
+import time
+from pathlib import Path
+from typing import Any
+
+from agentq_transport_client.timing import STAGES, set_stage_sink
+
+def _percentile(sorted_vals: list[float], q: float) -> float:
+    if not sorted_vals:
+        return 0.0
+    i = min(len(sorted_vals) - 1, max(0, round(q / 100.0 * (len(sorted_vals) - 1))))
+    return sorted_vals[i]
+
+
+def _peak_rss_mb() -> dict[str, float]:
+    try:
+        import resource
+    except ImportError:
+        return {}
+    # ru_maxrss is KiB on Linux, bytes on macOS
+    scale = 1024 * 1024 if os.uname().sysname == "Darwin" else 1024
+    return {
+        "self": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / scale, 1),
+        "children": round(resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss / scale, 1),
+    }
+
+
+def synthetic_manifest(
+    i: int, *, body_bytes: int, attachments: int, attachment_bytes: int
+) -> dict[str, Any]:
+    body = f"# Bench PRD {i}\n" + "x" * max(0, body_bytes)
+    m: dict[str, Any] = {
+        "manifest_version": "1",
+        "from_agent_id": "agent-bench",
+        "prd_filename": f"bench-{i}.prd.md",
+        "prd_body": body,
+    }
+    if attachments:
+        rows = []
+        for a in range(attachments):
+            data = os.urandom(attachment_bytes)
+            rows.append(
+                {
+                    "path": f"att/{a}.bin",
+                    "sha256": hashlib.sha256(data).hexdigest(),
+                    "content_b64": base64.b64encode(data).decode("ascii"),
+                }
+            )
+        m["attachments"] = rows
+    return m
+
+
+def run_bench(
+    *,
+    count: int = 100,
+    body_bytes: int = 4096,
+    attachments: int = 0,
+    attachment_bytes: int = 65536,
+    workers: int = 1,
+    ledger_fsync: str = "batch",
+    work_dir: Path | None = None,
+    keypair: tuple[str, str] | None = None,
+) -> dict[str, Any]:
+    """
+    Seal count synthetic manifests to a throwaway key with ship_file_drop, drain them with
+    one run_file_drop_poll, and report blobs/s, per-stage p50/p95/p99 (ms) and peak RSS.
+    keypair: (public, private) armored; generated via gpg when omitted.
+    """
+    from agentq_transport_client.ingest import run_file_drop_poll
+    from agentq_transport_client.ship import ship_file_drop
+
+    tmp = None
+    if work_dir is None:
+        tmp = tempfile.TemporaryDirectory(prefix="agentq-bench-")
+        work_dir = Path(tmp.name)
+    work_dir = Path(work_dir)
+    try:
+        if keypair is None:
+            from agentq_transport_client.keygen import generate_keypair_gnupg
+
+            pub_path, priv_path, _fp = generate_keypair_gnupg(work_dir / "keys")
+            pub, priv = pub_path.read_text(), priv_path.read_text()
+        else:
+            pub, priv = keypair
+        pub_path = work_dir / "recipient.pub.asc"
+        pub_path.write_text(pub, encoding="utf-8")
+        drop = work_dir / "drop"
+        queue = work_dir / "queue"
+
+        t0 = time.perf_counter()
+        for i in range(count):
+            m = synthetic_manifest(
+                i, body_bytes=body_bytes, attachments=attachments, attachment_bytes=attachment_bytes
+            )
+            r = ship_file_drop(m, pub_path, drop, stem=f"bench{i:06d}", skip_pre_ship=True)
+            if r.get("status") != "ok":
+                return {"status": "error", "stage": "generate", "result": r}
+        gen_s = time.perf_counter() - t0
+        sealed_bytes = sum(p.stat().st_size for p in drop.glob("*.agentq.asc"))
+
+        samples: dict[str, list[float]] = {s: [] for s in STAGES}
+
+        def _sink(name: str, secs: float) -> None:
+            samples.setdefault(name, []).append(secs)
+
+        set_stage_sink(_sink)
+        try:
+            t0 = time.perf_counter()
+            results = run_file_drop_poll(
+                [drop],
+                queue_root=queue,
+                recipient_private_armored=priv,
+                passphrase="",
+                max_per_poll=count,
+                workers=workers,
+                ledger_fsync=ledger_fsync,
+            )
+            wall = time.perf_counter() - t0
+        finally:
+            set_stage_sink(None)
+
+        ok = sum(1 for r in results if r.get("status") == "ok")
+        stages: dict[str, Any] = {}
+        for name, vals in samples.items():
+            if not vals:
+                continue
+            vals.sort()
+            stages[name] = {
+                "n": len(vals),
+                "p50_ms": round(_percentile(vals, 50) * 1000, 3),
+                "p95_ms": round(_percentile(vals, 95) * 1000, 3),
+                "p99_ms": round(_percentile(vals, 99) * 1000, 3),
+                "total_s": round(sum(vals), 4),
+            }
+        return {
+            "status": "ok" if ok == count else "partial",
+            "blobs": count,
+            "ok": ok,
+            "workers": workers,
+            "ledger_fsync": ledger_fsync,
+            "sealed_mb": round(sealed_bytes / (1024 * 1024), 2),
+            "generate_s": round(gen_s, 3),
+            "ingest_s": round(wall, 3),
+            "blobs_per_s": round(count / wall, 2) if wall > 0 else 0.0,
+            "stages": stages,
+            "peak_rss_mb": _peak_rss_mb(),
+        }
+    finally:
+        if tmp is not None:
+            tmp.cleanup()
@@ -1,26 +1,99 @@
 #!/usr/bin/env python3
-# Purpose: Ship directory as tar.gz inside manifest attachment (size-capped).
+# Purpose: Ship a directory as a streamed tar.gz bundle (one attachment, or numbered parts).
 # Created: 2026-03-10
-# Last updated: 2026-03-10
+# Last updated: 2026-10-17
 
-"""Build manifest with one attachment content_b64 = tar.gz of directory; seal like ship_file_drop."""
+"""
+Ship: tarfile streams ("w|gz") into a sink that seals every part_bytes of compressed output as
+its own drop (<stem>.partNNNNN), then an index manifest listing each part's sha256 is shipped
+last as <stem>. Memory stays a small multiple of part_bytes whatever the directory size. A
+bundle that fits in one part ships as the original single-attachment manifest.
+
+Ingest: parts and index are held under inbox/.bundles/<bundle_id>/ (any arrival order); once the
+index and every listed part are present, parts are concatenated (sha256 checked per part and for
+the whole archive) into in/<index transport id>/attachments/<path>. Bundles that never complete
+stay there until prune.prune_bundles (CLI prune-bundles) removes them by age.
+"""
 
 from __future__ import annotations
 
 import base64
 import hashlib
-import io
+import json
+import re
+import shutil
 import tarfile
+import uuid
 from pathlib import Path
-from typing import Any
+from typing import Any, Callable
 
+BUNDLE_PART_BYTES = 8 * 1024 * 1024
+BUNDLE_ID = re.compile(r"^[A-Za-z0-9_-]{1,64}$")
 
-def tar_gz_directory(src_dir: Path) -> bytes:
-    buf = io.BytesIO()
-    src_dir = Path(src_dir)
-    with tarfile.open(fileobj=buf, mode="w:gz") as tf:
-        tf.add(str(src_dir), arcname=src_dir.name)
-    return buf.getvalue()
+
+class _BundleAbort(Exception):
+    def __init__(self, result: dict[str, Any]):
+        super().__init__(result.get("code", ""))
+        self.result = result
+
+
+class _PartSink:
+    """Write-only file object for tarfile: every part_bytes written are handed to ship_part."""
+
+    def __init__(
+        self,
+        part_bytes: int,
+        ship_part: Callable[[int, bytes], dict[str, Any]],
+        max_bytes: int | None,
+    ):
+        self.part_bytes = part_bytes
+        self.ship_part = ship_part
+        self.max_bytes = max_bytes
+        self.buf = bytearray()
+        self.total = 0
+        self.sha = hashlib.sha256()
+        self.parts: list[dict[str, Any]] = []
+
+    def write(self, data: bytes) -> int:
+        self.buf += data
+        self.total += len(data)
+        self.sha.update(data)
+        if self.max_bytes and self.total > self.max_bytes:
+            raise _BundleAbort(
+                {
+                    "status": "error",
+                    "code": "BUNDLE_TOO_LARGE",
+                    "message": f"tar.gz over {self.total} bytes > cap {self.max_bytes}",
+                }
+            )
+        while len(self.buf) >= self.part_bytes:
+            self.ship(bytes(self.buf[: self.part_bytes]))
+            del self.buf[: self.part_bytes]
+        return len(data)
+
+    def ship(self, data: bytes) -> None:
+        r = self.ship_part(len(self.parts), data)
+        self.parts.append(
+            {"sha256": hashlib.sha256(data).hexdigest(), "bytes": len(data), "result": r}
+        )
+        if r.get("status") != "ok":
+            raise _BundleAbort(r)
+
+    def flush(self) -> None:
+        pass
+
+
+def _remove_drop(result: dict[str, Any]) -> None:
+    """Best-effort removal of an already written drop (sealed, ready, sidecar)."""
+    sealed = result.get("sealed")
+    if not sealed:
+        return
+    sealed_p = Path(sealed)
+    stem = sealed_p.name[: -len(".agentq.asc")]
+    sidecar = sealed_p.with_name(f"{stem}.agentq.sidecar.json")
+    for p in (sealed_p, Path(result.get("ready") or ""), sidecar):
+        if p.name:
+            p.unlink(missing_ok=True)
 
 
 def ship_bundle_file_drop(
@@ -30,7 +103,8 @@ def ship_bundle_file_drop(
     stem: str,
     *,
     from_agent_id: str = "local",
-    max_bytes: int = 20 * 1024 * 1024,
+    max_bytes: int | None = None,
+    part_bytes: int = BUNDLE_PART_BYTES,
     queue_root: Path | None = None,
     signer_gnupghome: Path | None = None,
     signer_uid: str = "",
@@ -38,41 +112,220 @@ def ship_bundle_file_drop(
     write_ready_sha256: bool = False,
 ) -> dict[str, Any]:
     """
-    Tar+gzip src_dir; if over max_bytes return error.
-    Else manifest with single attachment content_b64 + sha256; ship via ship_file_drop.
+    Stream tar+gzip of src_dir into drops. max_bytes caps the compressed archive (None/0 = no
+    cap); on overflow, parts already written are removed. Output up to part_bytes ships as
+    one manifest with a single attachment; larger output ships as parts + index.
     """
     from agentq_transport_client.ship import ship_file_drop
 
-    data = tar_gz_directory(src_dir)
-    if len(data) > max_bytes:
-        return {
-            "status": "error",
-            "code": "BUNDLE_TOO_LARGE",
-            "message": f"tar.gz {len(data)} bytes > cap {max_bytes}",
+    src_dir = Path(src_dir)
+    bundle_id = f"{re.sub(r'[^A-Za-z0-9_-]', '_', stem)[:40]}-{uuid.uuid4().hex[:16]}"
+    ship_kw: dict[str, Any] = {
+        "queue_root": queue_root,
+        "signer_gnupghome": signer_gnupghome,
+        "signer_uid": signer_uid,
+        "signer_passphrase": signer_passphrase,
+        "write_ready_sha256": write_ready_sha256,
+    }
+
+    def _ship_part(i: int, data: bytes) -> dict[str, Any]:
+        part = {
+            "manifest_version": "1",
+            "from_agent_id": from_agent_id,
+            "bundle": {"id": bundle_id, "role": "part", "part": i},
+            "attachments": [
+                {
+                    "path": f"part{i:05d}",
+                    "sha256": hashlib.sha256(data).hexdigest(),
+                    "bytes": len(data),
+                    "content_b64": base64.b64encode(data).decode("ascii"),
+                }
+            ],
         }
-    sha = hashlib.sha256(data).hexdigest()
-    manifest: dict[str, Any] = {
+        return ship_file_drop(
+            part,
+            recipient_pubkey_path,
+            out_dir,
+            stem=f"{stem}.part{i:05d}",
+            skip_pre_ship=True,
+            **ship_kw,
+        )
+
+    sink = _PartSink(max(1, part_bytes), _ship_part, max_bytes or None)
+    try:
+        with tarfile.open(fileobj=sink, mode="w|gz") as tf:  # type: ignore[call-overload]
+            tf.add(str(src_dir), arcname=src_dir.name)
+        if sink.parts and sink.buf:
+            sink.ship(bytes(sink.buf))
+    except _BundleAbort as e:
+        for p in sink.parts:
+            _remove_drop(p["result"])
+        return e.result
+
+    sha = sink.sha.hexdigest()
+    if not sink.parts:
+        data = bytes(sink.buf)
+        manifest: dict[str, Any] = {
+            "manifest_version": "1",
+            "from_agent_id": from_agent_id,
+            "prd_body": f"bundle_archive stem={stem} sha256={sha}\n",
+            "prd_filename": f"{stem}.bundle.prd.md",
+            "attachments": [
+                {
+                    "path": f"{stem}.tar.gz",
+                    "sha256": sha,
+                    "bytes": len(data),
+                    "content_b64": base64.b64encode(data).decode("ascii"),
+                }
+            ],
+        }
+        return ship_file_drop(manifest, recipient_pubkey_path, out_dir, stem=stem, **ship_kw)
+
+    index: dict[str, Any] = {
         "manifest_version": "1",
         "from_agent_id": from_agent_id,
-        "prd_body": f"bundle_archive stem={stem} sha256={sha}\n",
+        "prd_body": f"bundle_archive stem={stem} sha256={sha} parts={len(sink.parts)}\n",
         "prd_filename": f"{stem}.bundle.prd.md",
-        "attachments": [
-            {
-                "path": f"{stem}.tar.gz",
-                "sha256": sha,
-                "bytes": len(data),
-                "content_b64": base64.b64encode(data).decode("ascii"),
-            }
-        ],
+        "bundle": {
+            "id": bundle_id,
+            "role": "index",
+            "path": f"{stem}.tar.gz",
+            "sha256": sha,
+            "bytes": sink.total,
+            "parts": [{"sha256": p["sha256"], "bytes": p["bytes"]} for p in sink.parts],
+        },
     }
-    return ship_file_drop(
-        manifest,
-        recipient_pubkey_path,
-        out_dir,
-        stem=stem,
-        queue_root=queue_root,
-        signer_gnupghome=signer_gnupghome,
-        signer_uid=signer_uid,
-        signer_passphrase=signer_passphrase,
-        write_ready_sha256=write_ready_sha256,
-    )
+    r = ship_file_drop(index, recipient_pubkey_path, out_dir, stem=stem, **ship_kw)
+    r["bundle_id"] = bundle_id
+    r["parts"] = len(sink.parts)
+    return r
+
+
+# --- ingest side ---
+
+
+def bundles_dir(queue_root: Path) -> Path:
+    return Path(queue_root) / "inbox" / ".bundles"
+
+
+def accept_bundle_manifest(
+    queue_root: Path, manifest: dict[str, Any], tid: str
+) -> dict[str, Any]:
+    """
+    Hold a validated bundle part/index under inbox/.bundles/<id>/ and promote the bundle once
+    complete. Returns status ok for a held blob (bundle: held | promoted | rejected).
+    """
+    from agentq_transport_client.attachments_extract import extract_attachments_to_staging
+    from agentq_transport_client.crypto_pipeline import CryptoPipelineError
+    from agentq_transport_client.ledger import _lock_exclusive, append_event
+
+    queue_root = Path(queue_root)
+    b = manifest["bundle"]
+    bid = str(b["id"])
+    d = bundles_dir(queue_root) / bid
+    d.mkdir(parents=True, exist_ok=True)
+    with open(d / ".lock", "a") as lock:
+        _lock_exclusive(lock)
+        if b["role"] == "part":
+            try:
+                extract_attachments_to_staging(d, manifest)
+            except CryptoPipelineError as e:
+                event = (
+                    "ingest_checksum_fail"
+                    if e.code == "ingest_checksum_fail"
+                    else "ingest_verify_fail"
+                )
+                append_event(
+                    queue_root,
+                    event,
+                    {"code": e.code, "message": e.message, "blob_id": tid, "bundle_id": bid},
+                    transport_id=tid,
+                )
+                return {"status": "reject", "code": e.code, "message": e.message}
+            row = manifest["attachments"][0]
+            meta = {
+                "transport_id": tid,
+                "from_agent_id": manifest.get("from_agent_id"),
+                "sha256": row["sha256"],
+                "bytes": row["bytes"],
+                "stored_path": row["stored_path"],
+            }
+            (d / f"part{int(b['part']):05d}.json").write_text(json.dumps(meta), encoding="utf-8")
+        else:
+            (d / "index.json").write_text(
+                json.dumps({"transport_id": tid, "manifest": manifest}), encoding="utf-8"
+            )
+        append_event(
+            queue_root,
+            "ingest_bundle_held",
+            {"blob_id": tid, "bundle_id": bid, "role": b["role"], "part": b.get("part")},
+            transport_id=tid,
+        )
+        done = _try_finalize(queue_root, d)
+    out: dict[str, Any] = {"status": "ok", "transport_id": tid, "bundle_id": bid}
+    if done is None:
+        out["bundle"] = "held"
+    elif done.get("status") == "ok":
+        out["bundle"] = "promoted"
+        out["promoted_to"] = done.get("promoted_to")
+    else:
+        out["bundle"] = "rejected"
+        out["bundle_result"] = done
+    return out
+
+
+def _try_finalize(queue_root: Path, d: Path) -> dict[str, Any] | None:
+    """Assemble + promote if the index and all parts are held (caller holds the bundle lock)."""
+    from agentq_transport_client.attachments_extract import _safe_relpath
+    from agentq_transport_client.ingest import promote_staging
+    from agentq_transport_client.ledger import append_event
+
+    try:
+        rec = json.loads((d / "index.json").read_text(encoding="utf-8"))
+    except (OSError, json.JSONDecodeError):
+        return None
+    manifest, tid = rec["manifest"], rec["transport_id"]
+    b = manifest["bundle"]
+    metas = []
+    for i in range(len(b["parts"])):
+        try:
+            metas.append(json.loads((d / f"part{i:05d}.json").read_text(encoding="utf-8")))
+        except (OSError, json.JSONDecodeError):
+            return None
+
+    def _fail(code: str, message: str) -> dict[str, Any]:
+        append_event(
+            queue_root,
+            "ingest_checksum_fail" if code == "ingest_checksum_fail" else "ingest_verify_fail",
+            {"code": code, "message": message, "blob_id": tid, "bundle_id": b["id"]},
+            transport_id=tid,
+        )
+        return {"status": "reject", "code": code, "message": message}
+
+    for i, (want, meta) in enumerate(zip(b["parts"], metas)):
+        if meta.get("sha256") != want["sha256"]:
+            return _fail("ingest_checksum_fail", f"bundle part {i} sha256 differs from index")
+        if meta.get("from_agent_id") != manifest.get("from_agent_id"):
+            return _fail("BUNDLE_SENDER_MISMATCH", f"bundle part {i} from another agent")
+
+    rel = _safe_relpath(b.get("path") or f"{b['id']}.tar.gz")
+    staging = Path(queue_root) / "inbox" / ".staging" / uuid.uuid4().hex
+    out_path = staging / "attachments" / rel
+    out_path.parent.mkdir(parents=True, exist_ok=True)
+    h = hashlib.sha256()
+    n = 0
+    with open(out_path, "wb") as out:
+        for meta in metas:
+            with open(d / meta["stored_path"], "rb") as f:
+                for chunk in iter(lambda: f.read(1024 * 1024), b""):
+                    h.update(chunk)
+                    out.write(chunk)
+                    n += len(chunk)
+    if h.hexdigest() != b["sha256"]:
+        shutil.rmtree(staging, ignore_errors=True)
+        return _fail("ingest_checksum_fail", f"bundle sha256 mismatch expected {b['sha256']}")
+    manifest["bundle"] = {**b, "bytes": n, "stored_path": (Path("attachments") / rel).as_posix()}
+    r = promote_staging(queue_root, staging, manifest, tid)
+    if r.get("status") == "ok":
+        shutil.rmtree(d, ignore_errors=True)
+    return r
@@ -1,7 +1,7 @@
 #!/usr/bin/env python3
 # Purpose: OpenPGP seal/unseal for Agent Q outer blob (encrypt; optional sign via gpg).
 # Created: 2026-03-09
-# Last updated: 2026-03-09
+# Last updated: 2026-10-17
 
 """
 Seal: encrypt inner bytes to recipient pubkey -> single armored blob.
@@ -20,10 +20,11 @@ import base64
 import json
 import sys
 from pathlib import Path
-from typing import Any
+from typing import Any, BinaryIO
 
 _ENGINE = Path(__file__).resolve().parents[3]
-sys.path.insert(0, str(_ENGINE))
+if str(_ENGINE) not in sys.path:
+    sys.path.insert(0, str(_ENGINE))
 from lib.deps import require_deps  # noqa: E402
 
 require_deps(["cryptography"])
@@ -36,12 +37,20 @@ class CryptoPipelineError(RuntimeError):
         self.message = message
 
 
+_CRYPTO_ENGINE = None
+
+
 def _engine_crypto():
-    skill_scripts = _ENGINE / "skills" / "localsetup-mail-protocol-control" / "scripts"
-    sys.path.insert(0, str(skill_scripts))
-    from crypto_engine import CryptoEngine  # type: ignore
+    """Process-wide CryptoEngine (keeps its parsed-key cache warm across blobs)."""
+    global _CRYPTO_ENGINE
+    if _CRYPTO_ENGINE is None:
+        skill_scripts = str(_ENGINE / "skills" / "localsetup-mail-protocol-control" / "scripts")
+        if skill_scripts not in sys.path:
+            sys.path.insert(0, skill_scripts)
+        from crypto_engine import CryptoEngine  # type: ignore
 
-    return CryptoEngine()
+        _CRYPTO_ENGINE = CryptoEngine()
+    return _CRYPTO_ENGINE
 
 
 def seal_inner_json(manifest: dict[str, Any], recipient_pubkey_armored: str) -> str:
@@ -50,14 +59,23 @@ def seal_inner_json(manifest: dict[str, Any], recipient_pubkey_armored: str) ->
     return seal_bytes(inner, recipient_pubkey_armored)
 
 
-def seal_bytes(inner: bytes, recipient_pubkey_armored: str) -> str:
+def seal_inner_json_multi(manifest: dict[str, Any], recipient_pubkeys_armored: list[str]) -> str:
+    """Encrypt canonical JSON manifest once, readable by every recipient (one PKESK each)."""
+    inner = json.dumps(manifest, sort_keys=True, separators=(",", ":")).encode("utf-8")
+    return seal_bytes(inner, recipient_pubkeys_armored)
+
+
+def seal_bytes(inner: bytes, recipient_pubkey_armored: str | list[str]) -> str:
     eng = _engine_crypto()
     envelope = {
         "mode": "agentq_outer",
         "payload_b64": base64.b64encode(inner).decode("ascii"),
     }
     try:
-        out = eng.encrypt_openpgp(envelope, recipient_pubkey_armored)
+        if isinstance(recipient_pubkey_armored, str):
+            out = eng.encrypt_openpgp(envelope, recipient_pubkey_armored)
+        else:
+            out = eng.encrypt_openpgp_multi(envelope, list(recipient_pubkey_armored))
     except Exception as exc:
         raise CryptoPipelineError("ENCRYPT_FAILED", str(exc)) from exc
     armored = out.get("armored") or ""
@@ -70,16 +88,103 @@ def unseal_to_bytes(
     armored: str, recipient_private_armored: str, passphrase: str = ""
 ) -> bytes:
     """Decrypt armored blob; return inner bytes (JSON or raw)."""
-    eng = _engine_crypto()
     if not armored.strip():
         raise CryptoPipelineError("DECRYPT_FAILED", "Empty armored input.")
-    encrypted = {"mode": "openpgp", "armored": armored.strip()}
+    return _decrypt_to_inner(armored.strip(), recipient_private_armored, passphrase)
+
+
+# Base64 chars per decode step; multiple of 4 so each slice decodes independently.
+_B64_CHUNK = 4 * 256 * 1024
+
+
+def dearmor_stream(fh: BinaryIO) -> bytearray:
+    """
+    Decode an ASCII-armored OpenPGP block from a file handle into binary packets.
+    Reads line by line and decodes in bounded chunks (no full armored copy in memory).
+    """
+    out = bytearray()
+    pending: list[bytes] = []
+    pending_len = 0
+    state = "begin"  # begin -> headers -> body -> end
+    for line in fh:
+        line = line.strip()
+        if state == "begin":
+            if line.startswith(b"-----BEGIN PGP MESSAGE-----"):
+                state = "headers"
+            continue
+        if state == "headers":
+            if not line:
+                state = "body"
+            elif b": " not in line:
+                state = "body"  # no header block; first line is body
+            else:
+                continue
+        if line.startswith(b"-----END PGP") or (line.startswith(b"=") and len(line) == 5):
+            state = "end"
+            break
+        if not line:
+            continue
+        pending.append(line)
+        pending_len += len(line)
+        if pending_len >= _B64_CHUNK:
+            joined = b"".join(pending)
+            cut = len(joined) - (len(joined) % 4)
+            out += base64.b64decode(joined[:cut], validate=True)
+            pending = [joined[cut:]] if cut < len(joined) else []
+            pending_len = len(joined) - cut
+    if state != "end":
+        raise CryptoPipelineError("DECRYPT_FAILED", "Armored block not terminated.")
+    if pending:
+        out += base64.b64decode(b"".join(pending), validate=True)
+    return out
+
+
+def _agentq_payload_bytes(plain: bytes) -> bytearray | None:
+    """
+    agentq_outer fast path: locate payload_b64 in the decrypted envelope text and decode it
+    in chunks, parsing only the small remainder as JSON. None if the shape is unexpected.
+    """
+    key = plain.find(b'"payload_b64"')
+    if key < 0:
+        return None
+    colon = plain.find(b":", key + 13)
+    if colon < 0:
+        return None
+    start = plain.find(b'"', colon) + 1
+    end = plain.find(b'"', start) if start > 0 else -1
+    if end < 0 or plain.find(b"\\", start, end) >= 0:
+        return None
+    try:
+        rest = json.loads(plain[:start] + plain[end:])
+    except (json.JSONDecodeError, UnicodeDecodeError):
+        return None
+    if not isinstance(rest, dict) or rest.get("mode") != "agentq_outer":
+        return None
+    out = bytearray()
     try:
-        envelope = eng.decrypt_openpgp(
-            encrypted, recipient_private_armored, passphrase or ""
-        )
+        for i in range(start, end, _B64_CHUNK):
+            out += base64.b64decode(plain[i : min(i + _B64_CHUNK, end)], validate=True)
+    except ValueError as exc:
+        raise CryptoPipelineError("DECRYPT_FAILED", f"payload_b64 invalid: {exc}") from exc
+    return out
+
+
+def _decrypt_to_inner(
+    message_blob: str | bytearray, recipient_private_armored: str, passphrase: str
+) -> bytes:
+    eng = _engine_crypto()
+    try:
+        plain = eng.decrypt_openpgp_raw(message_blob, recipient_private_armored, passphrase or "")
     except Exception as exc:
         raise CryptoPipelineError("DECRYPT_FAILED", str(exc)) from exc
+    del message_blob
+    inner = _agentq_payload_bytes(plain)
+    if inner is not None:
+        return inner  # type: ignore[return-value]
+    try:
+        envelope = json.loads(plain)
+    except (json.JSONDecodeError, UnicodeDecodeError) as exc:
+        raise CryptoPipelineError("DECRYPT_FAILED", f"Decrypted payload not JSON: {exc}") from exc
     if not isinstance(envelope, dict):
         raise CryptoPipelineError("DECRYPT_FAILED", "Decrypted payload not a dict.")
     if envelope.get("mode") == "agentq_outer" and envelope.get("payload_b64"):
@@ -90,14 +195,46 @@ def unseal_to_bytes(
     raise CryptoPipelineError("DECRYPT_FAILED", "Not an agentq_outer envelope.")
 
 
+def unseal_file_to_manifest(
+    sealed_path: Path,
+    recipient_private_armored: str,
+    passphrase: str = "",
+    *,
+    max_bytes: int | None = None,
+) -> dict[str, Any]:
+    """
+    File-handle unseal: size cap from stat() before any read, streamed de-armor, chunked
+    payload_b64 decode. Raises CryptoPipelineError BLOB_TOO_LARGE over max_bytes.
+    """
+    sealed_path = Path(sealed_path)
+    if max_bytes is not None and sealed_path.stat().st_size > max_bytes:
+        raise CryptoPipelineError("BLOB_TOO_LARGE", "armored payload exceeds cap")
+    try:
+        with open(sealed_path, "rb") as fh:
+            binary = dearmor_stream(fh)
+    except ValueError as exc:
+        raise CryptoPipelineError("DECRYPT_FAILED", f"Invalid armor: {exc}") from exc
+    return _inner_to_manifest(_decrypt_to_inner(binary, recipient_private_armored, passphrase))
+
+
+def _inner_to_manifest(data: bytes) -> dict[str, Any]:
+    try:
+        m = json.loads(data)
+    except Exception as exc:
+        raise CryptoPipelineError("MANIFEST_PARSE_FAILED", str(exc)) from exc
+    if not isinstance(m, dict):
+        raise CryptoPipelineError("MANIFEST_PARSE_FAILED", "Inner payload not an object.")
+    return m
+
+
 def seal_bytes_strict_gpg(
     inner: bytes,
-    recipient_pubkey_armored: str,
+    recipient_pubkey_armored: str | list[str],
     signer_gnupghome: Path,
     signer_uid: str = "",
     passphrase: str = "",
 ) -> str:
-    """Sign-then-encrypt outer per spec; requires gpg and signer GNUPGHOME."""
+    """Sign-then-encrypt outer per spec; requires gpg and signer GNUPGHOME. List = one -r each."""
     from agentq_transport_client.gpg_crypto import gpg_sign_encrypt_armored
 
     return gpg_sign_encrypt_armored(
@@ -138,14 +275,7 @@ def unseal_to_manifest_strict_gpg(
 def unseal_to_manifest(
     armored: str, recipient_private_armored: str, passphrase: str = ""
 ) -> dict[str, Any]:
-    data = unseal_to_bytes(armored, recipient_private_armored, passphrase)
-    try:
-        m = json.loads(data.decode("utf-8"))
-    except Exception as exc:
-        raise CryptoPipelineError("MANIFEST_PARSE_FAILED", str(exc)) from exc
-    if not isinstance(m, dict):
-        raise CryptoPipelineError("MANIFEST_PARSE_FAILED", "Inner payload not an object.")
-    return m
+    return _inner_to_manifest(unseal_to_bytes(armored, recipient_private_armored, passphrase))
 
 
 # Part 2 naming: single module entrypoints for agents reading the spec
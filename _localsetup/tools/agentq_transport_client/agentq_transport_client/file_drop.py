@@ -1,7 +1,7 @@
 #!/usr/bin/env python3
 # Purpose: file_drop adapter: scan roots, ready marker, claim, processed move.
 # Created: 2026-03-09
-# Last updated: 2026-03-09
+# Last updated: 2026-10-17
 
 from __future__ import annotations
 
@@ -77,12 +77,23 @@ def verify_ready_marker_sha256(sealed_path: Path, ready_path: Path) -> bool:
 def ready_marker_path(sealed_path: Path, sealed_extension: str) -> Path:
     # x.agentq.asc -> x.agentq.ready (replace final extension segment)
     if sealed_path.name.endswith(sealed_extension):
+        keep = sealed_extension.rsplit(".", 1)[0]
         return sealed_path.with_name(
-            sealed_path.name[: -len(sealed_extension)] + ".ready"
+            sealed_path.name[: -len(sealed_extension)] + keep + ".ready"
         )
     return sealed_path.with_suffix(".ready")
 
 
+def sealed_for_ready(ready_path: Path, sealed_extension: str) -> Path:
+    """Inverse of ready_marker_path: x.agentq.ready -> x.agentq.asc."""
+    keep = sealed_extension.rsplit(".", 1)[0]
+    suffix = keep + ".ready"
+    name = ready_path.name
+    if name.endswith(suffix):
+        return ready_path.with_name(name[: -len(suffix)] + sealed_extension)
+    return ready_path.with_suffix(sealed_extension)
+
+
 def iter_candidates(
     roots: list[Path],
     sealed_extension: str,
@@ -138,7 +149,7 @@ def claim_to_processing(
     uid = uuid.uuid4().hex[:12]
     dest = processing_dir / uid
     try:
-        dest.mkdir(exist=False)
+        dest.mkdir()
     except FileExistsError:
         return None
     ready = ready_marker_path(sealed, sealed_extension)
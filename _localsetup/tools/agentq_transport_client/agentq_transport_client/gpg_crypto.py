@@ -1,20 +1,27 @@
 #!/usr/bin/env python3
 # Purpose: GnuPG sign-then-encrypt outer blob and decrypt+verify (original spec Part 1 #5).
 # Created: 2026-03-10
-# Last updated: 2026-03-10
+# Last updated: 2026-10-17
 
 """
 Uses gpg in subprocess. Signer keyring must contain signer secret; recipient pubkey imported for -r.
-Decrypt: temporary keyring with recipient secret + sender public keys for Good signature check.
+Decrypt: keyring with recipient secret + sender public keys for Good signature check.
+
+GpgSession keeps one prepared GNUPGHOME per process (recipient secret / registry pubkeys imported
+once, gpg-agent left warm) and talks to gpg over pipes: data on stdin/stdout, machine-readable
+results via --status-fd, passphrase via its own fd. The module-level functions reuse sessions.
 """
 
 from __future__ import annotations
 
-import re
+import atexit
+import hashlib
+import os
 import shutil
 import subprocess
 import tempfile
 from pathlib import Path
+from typing import Iterable, Sequence
 
 
 class GpgCryptoError(RuntimeError):
@@ -24,92 +31,260 @@ class GpgCryptoError(RuntimeError):
         self.message = message
 
 
-_FINGERPRINT_RE = re.compile(
-    r"Primary key fingerprint:\s*([0-9A-Fa-f ]+)", re.MULTILINE
-)
-_VALID_SIG_RE = re.compile(r"^\[GNUPG:\]\s+VALIDSIG\s+(\S+)", re.MULTILINE)
-
-
 def _which_gpg() -> str:
     return shutil.which("gpg") or shutil.which("gpg2") or ""
 
 
+# Any of these means a signature is present but must not be trusted.
+_BAD_SIG_STATUS = frozenset({"BADSIG", "EXPSIG", "EXPKEYSIG", "REVKEYSIG"})
+
+
+def _status_lines(stderr: bytes) -> list[list[str]]:
+    """[GNUPG:] status records from a --status-fd 2 stream, split into fields."""
+    out = []
+    for line in stderr.decode("utf-8", errors="replace").splitlines():
+        if line.startswith("[GNUPG:] "):
+            out.append(line[9:].split())
+    return out
+
+
+class GpgSession:
+    """
+    Reusable gpg context. gnupghome=None creates a private temp homedir (removed, and its
+    gpg-agent stopped, on close); an existing homedir is used as-is and left in place.
+    Keys passed to import_key are imported once per session (keyed by content digest).
+    """
+
+    def __init__(self, gnupghome: Path | str | None = None):
+        self.gpg = _which_gpg()
+        if not self.gpg:
+            raise GpgCryptoError("GPG_NOT_FOUND", "gpg not on PATH")
+        self._tmp: tempfile.TemporaryDirectory[str] | None = None
+        if gnupghome is None:
+            self._tmp = tempfile.TemporaryDirectory(prefix="agentq-gpg-")
+            gnupghome = self._tmp.name
+            os.chmod(gnupghome, 0o700)
+        self.home = Path(gnupghome)
+        if not self.home.is_dir():
+            raise GpgCryptoError("KEYRING_NOT_FOUND", f"GNUPGHOME not a dir: {self.home}")
+        self._env = {**os.environ, "GNUPGHOME": str(self.home)}
+        self._imported: dict[str, list[str]] = {}
+
+    def _run(
+        self,
+        args: list[str],
+        data: bytes | None,
+        *,
+        passphrase: str = "",
+        timeout: float = 120,
+    ) -> tuple[int, bytes, bytes]:
+        cmd = [self.gpg, "--batch", "--no-tty", "--status-fd", "2"]
+        pass_fds: tuple[int, ...] = ()
+        rfd = -1
+        if passphrase:
+            rfd, wfd = os.pipe()
+            os.write(wfd, (passphrase + "\n").encode())
+            os.close(wfd)
+            cmd += ["--pinentry-mode", "loopback", "--passphrase-fd", str(rfd)]
+            pass_fds = (rfd,)
+        try:
+            p = subprocess.Popen(
+                cmd + args,
+                stdin=subprocess.PIPE if data is not None else subprocess.DEVNULL,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.PIPE,
+                env=self._env,
+                pass_fds=pass_fds,
+            )
+            try:
+                out, err = p.communicate(data, timeout=timeout)
+            except subprocess.TimeoutExpired:
+                p.kill()
+                p.communicate()
+                raise GpgCryptoError("GPG_TIMEOUT", f"gpg {' '.join(args[:2])} timed out")
+        finally:
+            if rfd >= 0:
+                os.close(rfd)
+        return p.returncode, out, err
+
+    def import_key(self, armored: str) -> list[str]:
+        """Import armored key material once; returns fingerprints from IMPORT_OK."""
+        digest = hashlib.sha256(armored.encode("utf-8")).hexdigest()
+        if digest in self._imported:
+            return self._imported[digest]
+        rc, _out, err = self._run(["--import"], armored.encode("utf-8"), timeout=60)
+        fprs = []
+        for f in _status_lines(err):
+            if f[0] == "IMPORT_OK" and len(f) >= 3 and f[2] not in fprs:
+                fprs.append(f[2])
+        if rc != 0 and not fprs:
+            raise GpgCryptoError("IMPORT_FAILED", err.decode(errors="replace")[:500])
+        self._imported[digest] = fprs
+        return fprs
+
+    def import_keys(self, armored_keys: Iterable[str]) -> None:
+        for k in armored_keys:
+            self.import_key(k)
+
+    def sign_encrypt(
+        self,
+        plaintext: bytes,
+        *,
+        recipient_pubkey_armored: str | Sequence[str],
+        signer_uid: str = "",
+        passphrase: str = "",
+        trust_model_always: bool = True,
+    ) -> str:
+        """Sign + encrypt once; a list of recipient pubkeys yields one message with a -r each."""
+        keys = (
+            [recipient_pubkey_armored]
+            if isinstance(recipient_pubkey_armored, str)
+            else list(recipient_pubkey_armored)
+        )
+        args = ["--armor", "--sign", "--encrypt", "--output", "-"]
+        if trust_model_always:
+            args += ["--trust-model", "always"]
+        for key in keys:
+            fprs = self.import_key(key)
+            args += ["-r", fprs[0] if fprs else _recipient_key_spec(key)]
+        if signer_uid:
+            args += ["--local-user", signer_uid]
+        rc, out, err = self._run(args, plaintext, passphrase=passphrase)
+        if rc != 0 or not out:
+            raise GpgCryptoError("SIGN_ENCRYPT_FAILED", err.decode(errors="replace")[:800])
+        return out.decode("utf-8", errors="replace")
+
+    def decrypt_verify(
+        self,
+        armored: str | bytes,
+        *,
+        passphrase: str = "",
+        require_signature: bool = False,
+    ) -> tuple[bytes, str]:
+        """
+        Decrypt in one gpg call; signer fingerprint (primary key) from VALIDSIG, "" if unsigned
+        or signer unknown. The input must be encrypted (DECRYPTION_OKAY) and any bad, expired
+        or revoked signature fails. require_signature: also gpg exit 0, no ERRSIG, and exactly
+        one GOODSIG whose key id matches the single VALIDSIG.
+        """
+        data = armored.encode("utf-8") if isinstance(armored, str) else armored
+        rc, out, err = self._run(["--decrypt"], data, passphrase=passphrase)
+        detail = err.decode(errors="replace")[:800]
+        status = _status_lines(err)
+        kinds = [f[0] for f in status]
+        if any(k in _BAD_SIG_STATUS for k in kinds) or (require_signature and "ERRSIG" in kinds):
+            raise GpgCryptoError("SIGNATURE_VERIFY_FAILED", detail)
+        if "DECRYPTION_OKAY" not in kinds or "DECRYPTION_FAILED" in kinds:
+            raise GpgCryptoError("DECRYPT_FAILED", detail)
+        # Without a required signature gpg exits 2 for an unknown signer (ERRSIG); nothing else.
+        if rc != 0 and (require_signature or "ERRSIG" not in kinds):
+            raise GpgCryptoError("DECRYPT_FAILED", detail)
+        good = [f for f in status if f[0] == "GOODSIG" and len(f) >= 2]
+        valid = [f for f in status if f[0] == "VALIDSIG" and len(f) >= 2]
+        fp = ""
+        if len(good) == 1 and len(valid) == 1:
+            keyid = good[0][1].upper()
+            sig_fpr = valid[0][1].upper()
+            primary = (valid[0][10] if len(valid[0]) >= 11 else valid[0][1]).upper()
+            if sig_fpr.endswith(keyid) or primary.endswith(keyid):
+                fp = primary
+        if require_signature and not fp:
+            raise GpgCryptoError("SIGNATURE_VERIFY_FAILED", detail)
+        return out, fp
+
+    def close(self) -> None:
+        if self._tmp is None:
+            return
+        gpgconf = shutil.which("gpgconf")
+        if gpgconf:
+            subprocess.run(
+                [gpgconf, "--kill", "gpg-agent"],
+                env=self._env,
+                capture_output=True,
+                timeout=30,
+            )
+        self._tmp.cleanup()
+        self._tmp = None
+
+    def __enter__(self) -> "GpgSession":
+        return self
+
+    def __exit__(self, *exc: object) -> None:
+        self.close()
+
+
+# Per-process sessions: recipient side keyed by secret-key digest or homedir, signer by homedir.
+_SESSIONS: dict[str, GpgSession] = {}
+
+
+def _close_sessions() -> None:
+    for sess in _SESSIONS.values():
+        try:
+            sess.close()
+        except Exception:
+            pass
+    _SESSIONS.clear()
+
+
+atexit.register(_close_sessions)
+
+
+def recipient_session(
+    recipient_sec_armored: str, recipient_gnupghome: Path | str | None = None
+) -> GpgSession:
+    """Session holding the recipient secret: the given keyring, else a temp one (imported once)."""
+    if recipient_gnupghome and Path(recipient_gnupghome).is_dir():
+        key = "home:" + str(Path(recipient_gnupghome).resolve())
+    else:
+        key = "sec:" + hashlib.sha256(recipient_sec_armored.encode("utf-8")).hexdigest()
+    sess = _SESSIONS.get(key)
+    if sess is None:
+        if key.startswith("home:"):
+            sess = GpgSession(recipient_gnupghome)
+        else:
+            sess = GpgSession()
+            try:
+                sess.import_key(recipient_sec_armored)
+            except GpgCryptoError as e:
+                sess.close()
+                raise GpgCryptoError("IMPORT_SEC_FAILED", e.message) from e
+        _SESSIONS[key] = sess
+    return sess
+
+
+def signer_session(signer_gnupghome: Path | str) -> GpgSession:
+    """Session over the signer keyring (recipient pubkeys get imported into it, once each)."""
+    key = "home:" + str(Path(signer_gnupghome).resolve())
+    sess = _SESSIONS.get(key)
+    if sess is None:
+        sess = GpgSession(signer_gnupghome)
+        _SESSIONS[key] = sess
+    return sess
+
+
 def gpg_sign_encrypt_armored(
     plaintext: bytes,
     *,
-    recipient_pubkey_armored: str,
+    recipient_pubkey_armored: str | Sequence[str],
     signer_gnupghome: Path,
     signer_uid: str = "",
     passphrase: str = "",
     trust_model_always: bool = True,
 ) -> str:
     """
-    Import recipient pubkey into signer homedir temp overlay... actually import into signer homedir
-    pollutes it. Use separate temp homedir: import signer sec from signer_gnupghome is hard.
-    Simpler: temp homedir, import recipient pub only, then we need signer sec - export signer sec
-    to temp not ideal. Alternative: signer_gnupghome is full ring; gpg --import recipient pub
-    into signer ring (one extra pubkey), then gpg --sign --encrypt -r RECIP_FPR -u SIGNER.
-    Caller responsible for cleaning or use dedicated agentq signer ring.
+    Import recipient pubkey into the signer ring (once per process; use a dedicated agentq
+    signer ring), then gpg --sign --encrypt -r RECIP_FPR -u SIGNER over pipes.
     """
-    gpg = _which_gpg()
-    if not gpg:
-        raise GpgCryptoError("GPG_NOT_FOUND", "gpg not on PATH")
-
     signer_gnupghome = Path(signer_gnupghome)
     if not signer_gnupghome.is_dir():
         raise GpgCryptoError("KEYRING_NOT_FOUND", f"GNUPGHOME not a dir: {signer_gnupghome}")
-
-    with tempfile.TemporaryDirectory() as tmp:
-        t = Path(tmp)
-        recip_pub = t / "recipient.pub.asc"
-        recip_pub.write_text(recipient_pubkey_armored, encoding="utf-8")
-        plain = t / "payload.bin"
-        plain.write_bytes(plaintext)
-        out = t / "out.asc"
-        env = {"GNUPGHOME": str(signer_gnupghome)}
-        r_import = subprocess.run(
-            [gpg, "--batch", "--import", str(recip_pub)],
-            env={**__import__("os").environ, **env},
-            capture_output=True,
-            timeout=60,
-        )
-        if r_import.returncode != 0:
-            raise GpgCryptoError(
-                "IMPORT_FAILED", r_import.stderr.decode(errors="replace")[:500]
-            )
-        cmd = [
-            gpg,
-            "--batch",
-            "--armor",
-            "--sign",
-            "--encrypt",
-            "-o",
-            str(out),
-        ]
-        if trust_model_always:
-            cmd.append("--trust-model")
-            cmd.append("always")
-        # Recipient: use email from key if possible; else first uid - gpg -r needs key id
-        cmd.extend(["-r", _recipient_key_spec(recipient_pubkey_armored)])
-        if signer_uid:
-            cmd.extend(["--local-user", signer_uid])
-        cmd.append(str(plain))
-        stdin = subprocess.DEVNULL
-        if passphrase:
-            cmd[1:1] = ["--pinentry-mode", "loopback", "--passphrase-fd", "0"]
-            stdin = subprocess.PIPE
-        r = subprocess.run(
-            cmd,
-            env={**__import__("os").environ, **env},
-            input=(passphrase + "\n").encode() if passphrase else None,
-            capture_output=True,
-            timeout=120,
-        )
-        if r.returncode != 0:
-            raise GpgCryptoError(
-                "SIGN_ENCRYPT_FAILED", r.stderr.decode(errors="replace")[:800]
-            )
-        return out.read_text(encoding="utf-8", errors="replace")
+    return signer_session(signer_gnupghome).sign_encrypt(
+        plaintext,
+        recipient_pubkey_armored=recipient_pubkey_armored,
+        signer_uid=signer_uid,
+        passphrase=passphrase,
+        trust_model_always=trust_model_always,
+    )
 
 
 def _recipient_key_spec(pubkey_armored: str) -> str:
@@ -137,68 +312,11 @@ def gpg_decrypt_verify_armored(
     If recipient_gnupghome is set, decrypt using that keyring (no armored import).
     Returns (plaintext_bytes, signer_fingerprint_hex_no_spaces).
     """
-    gpg = _which_gpg()
-    if not gpg:
-        raise GpgCryptoError("GPG_NOT_FOUND", "gpg not on PATH")
-
-    home = Path(recipient_gnupghome) if recipient_gnupghome else None
-    tmp_ctx = None
-    if home is None or not home.is_dir():
-        tmp_ctx = tempfile.TemporaryDirectory()
-        home = Path(tmp_ctx.name)
-        sec = home / "sec.asc"
-        sec.write_text(recipient_sec_armored, encoding="utf-8")
-        env0 = {"GNUPGHOME": str(home)}
-        r_imp = subprocess.run(
-            [gpg, "--batch", "--import", str(sec)],
-            env={**__import__("os").environ, **env0},
-            capture_output=True,
-            timeout=60,
-        )
-        if r_imp.returncode != 0:
-            if tmp_ctx:
-                tmp_ctx.cleanup()
-            raise GpgCryptoError(
-                "IMPORT_SEC_FAILED", r_imp.stderr.decode(errors="replace")[:500]
-            )
-
-    work = home / ".agentq_decrypt"
-    work.mkdir(exist_ok=True)
-    inp = work / "in.asc"
-    inp.write_text(armored, encoding="utf-8")
-    env = {"GNUPGHOME": str(home)}
+    sess = recipient_session(recipient_sec_armored, recipient_gnupghome)
     if sender_pubkey_armored:
-        pub = work / "sender.pub.asc"
-        pub.write_text(sender_pubkey_armored, encoding="utf-8")
-        subprocess.run(
-            [gpg, "--batch", "--import", str(pub)],
-            env={**__import__("os").environ, **env},
-            capture_output=True,
-            timeout=60,
-        )
-    cmd = [gpg, "--batch", "--decrypt", str(inp)]
-    if recipient_passphrase:
-        cmd[1:1] = ["--pinentry-mode", "loopback", "--passphrase-fd", "0"]
-    r = subprocess.run(
-        cmd,
-        env={**__import__("os").environ, **env},
-        input=(recipient_passphrase + "\n").encode() if recipient_passphrase else None,
-        capture_output=True,
-        timeout=120,
+        sess.import_key(sender_pubkey_armored)
+    return sess.decrypt_verify(
+        armored,
+        passphrase=recipient_passphrase,
+        require_signature=bool(sender_pubkey_armored),
     )
-    out_bytes = r.stdout
-    err = r.stderr.decode("utf-8", errors="replace")
-    if tmp_ctx:
-        tmp_ctx.cleanup()
-    # gpg returns 2 when decryption ok but signature unchecked (no sender pub yet)
-    if r.returncode != 0 and not out_bytes:
-        raise GpgCryptoError("DECRYPT_FAILED", err[:800])
-    if r.returncode != 0 and sender_pubkey_armored:
-        raise GpgCryptoError("DECRYPT_FAILED", err[:800])
-    if sender_pubkey_armored and "Good signature" not in err:
-        raise GpgCryptoError("SIGNATURE_VERIFY_FAILED", err[:800])
-    fp = ""
-    m = _FINGERPRINT_RE.search(err)
-    if m:
-        fp = m.group(1).replace(" ", "").upper()
-    return out_bytes, fp
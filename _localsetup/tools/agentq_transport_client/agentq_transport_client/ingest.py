@@ -1,33 +1,43 @@
 #!/usr/bin/env python3
 # Purpose: Orchestrate file_drop and mail ingest: decrypt, manifest check, promote, ledger.
 # Created: 2026-03-09
-# Last updated: 2026-03-09
+# Last updated: 2026-10-17
 
 from __future__ import annotations
 
 import base64
+import errno
 import json
+import os
 import shutil
 import uuid
 from pathlib import Path
-from typing import Any
+from typing import Any, Iterable
 
-from agentq_transport_client.crypto_pipeline import CryptoPipelineError, unseal_to_manifest
-from agentq_transport_client.file_drop import claim_to_processing, iter_candidates, move_to_processed
-from agentq_transport_client.ledger import append_event, already_ingested, blob_id
+from agentq_transport_client.crypto_pipeline import CryptoPipelineError, unseal_file_to_manifest
+from agentq_transport_client.file_drop import (
+    claim_to_processing,
+    iter_candidates,
+    move_to_processed,
+    ready_marker_path,
+)
+from agentq_transport_client.ledger import append_event, already_ingested, blob_id, ledger_batch
+from agentq_transport_client.timing import stage
 
+# Armored sealed blob size cap (checked from stat() before any read).
+MAX_BLOB_BYTES = 50 * 1024 * 1024
 
-def _ensure_manifest(m: dict[str, Any]) -> None:
+
+def _ensure_manifest(m: dict[str, Any], *, trusted: bool = False) -> None:
     from agentq_transport_client.manifest_validate import validate_manifest
 
-    validate_manifest(m)
+    validate_manifest(m, trusted=trusted)
 
 
 def agentq_outer_to_manifest(envelope: dict[str, Any]) -> dict[str, Any]:
     """If decrypted mail/crypto envelope is agentq_outer, return inner manifest dict."""
     if envelope.get("mode") == "agentq_outer" and envelope.get("payload_b64"):
-        raw = base64.b64decode(str(envelope["payload_b64"]), validate=True)
-        m = json.loads(raw.decode("utf-8"))
+        m = json.loads(base64.b64decode(str(envelope["payload_b64"]), validate=True))
         if not isinstance(m, dict):
             raise CryptoPipelineError("MANIFEST_PARSE_FAILED", "Inner payload not object.")
         return m
@@ -45,8 +55,12 @@ def promote_manifest(
     operator: str = "",
     reason: str = "",
     registry_path: Path | None = None,
+    trusted_sender: bool = False,
 ) -> dict[str, Any]:
-    """Write manifest to inbox/.staging then atomic promote to in/<transport_id>/. Ledger."""
+    """
+    Write manifest to inbox/.staging then atomic promote to in/<transport_id>/. Ledger.
+    trusted_sender: caller verified the signer binding; skips jsonschema after bounds checks.
+    """
     queue_root = Path(queue_root)
     tid = sanitize_transport_id(transport_id)
     # Optional registry binding before idempotency skip so rejects are logged once
@@ -54,13 +68,11 @@ def promote_manifest(
         from agentq_transport_client.registry import (
             RegistryError,
             assert_sender_allowed,
-            load_registry_yaml,
-            validate_registry,
+            load_validated_registry,
         )
 
         try:
-            raw = load_registry_yaml(Path(registry_path))
-            validated = validate_registry(raw, require_keys_exist=False)
+            validated = load_validated_registry(Path(registry_path), require_keys_exist=False)
             assert_sender_allowed(validated, str(manifest.get("from_agent_id", "")))
         except RegistryError as e:
             append_event(
@@ -73,7 +85,8 @@ def promote_manifest(
     if not force and already_ingested(queue_root, tid):
         return {"status": "skipped", "transport_id": tid, "reason": "already_ingested"}
     try:
-        _ensure_manifest(manifest)
+        with stage("validate"):
+            _ensure_manifest(manifest, trusted=trusted_sender)
     except CryptoPipelineError as e:
         append_event(
             queue_root,
@@ -83,42 +96,91 @@ def promote_manifest(
         )
         return {"status": "reject", "code": e.code}
 
-    staging = queue_root / "inbox" / ".staging" / uuid.uuid4().hex
-    staging.mkdir(parents=True, exist_ok=True)
-    try:
-        from agentq_transport_client.attachments_extract import extract_attachments_to_staging
+    bundle = manifest.get("bundle")
+    if isinstance(bundle, dict):
+        from agentq_transport_client.bundle import accept_bundle_manifest
 
-        extract_attachments_to_staging(staging, manifest)
-    except CryptoPipelineError as e:
-        if e.code == "ingest_checksum_fail":
-            append_event(
-                queue_root,
-                "ingest_checksum_fail",
-                {"message": e.message, "blob_id": tid},
-                transport_id=tid,
-            )
-        shutil.rmtree(staging, ignore_errors=True)
-        return {"status": "reject", "code": e.code, "message": e.message}
+        return accept_bundle_manifest(queue_root, manifest, tid)
+
+    with stage("promote"):
+        staging = queue_root / "inbox" / ".staging" / uuid.uuid4().hex
+        staging.mkdir(parents=True, exist_ok=True)
+        try:
+            from agentq_transport_client.attachments_extract import extract_attachments_to_staging
+
+            extract_attachments_to_staging(staging, manifest)
+        except CryptoPipelineError as e:
+            if e.code == "ingest_checksum_fail":
+                append_event(
+                    queue_root,
+                    "ingest_checksum_fail",
+                    {"message": e.message, "blob_id": tid},
+                    transport_id=tid,
+                )
+            shutil.rmtree(staging, ignore_errors=True)
+            return {"status": "reject", "code": e.code, "message": e.message}
+        r = _move_staging_to_in(queue_root, staging, manifest, tid, force=force)
+    if r.get("status") != "ok":
+        return r
+    _log_promoted(queue_root, manifest, tid, force=force, operator=operator, reason=reason)
+    return r
+
+
+def promote_staging(
+    queue_root: Path,
+    staging: Path,
+    manifest: dict[str, Any],
+    tid: str,
+    *,
+    force: bool = False,
+    operator: str = "",
+    reason: str = "",
+) -> dict[str, Any]:
+    """Write PRD + manifest.json into a filled staging dir, move it to in/<tid>/, log promote."""
+    r = _move_staging_to_in(Path(queue_root), staging, manifest, tid, force=force)
+    if r.get("status") == "ok":
+        _log_promoted(queue_root, manifest, tid, force=force, operator=operator, reason=reason)
+    return r
+
+
+def _move_staging_to_in(
+    queue_root: Path, staging: Path, manifest: dict[str, Any], tid: str, *, force: bool
+) -> dict[str, Any]:
     prd_name = manifest.get("prd_filename") or "ingested.prd.md"
     body = manifest.get("prd_body")
     if body:
         (staging / prd_name).write_text(str(body), encoding="utf-8")
-    else:
-        (staging / "manifest.json").write_text(json.dumps(manifest, indent=2), encoding="utf-8")
-    # Always keep manifest.json for queue_ops (ack_required, conversation_id) when prd_body exists
-    if body:
-        (staging / "manifest.json").write_text(json.dumps(manifest, indent=2), encoding="utf-8")
+    # Always keep manifest.json for queue_ops (ack_required, conversation_id); attachments are
+    # references (stored_path) by now, not inline content_b64.
+    with open(staging / "manifest.json", "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2)
 
     promote_to = queue_root / "in"
     promote_to.mkdir(parents=True, exist_ok=True)
     final_dir = promote_to / tid
-    if final_dir.exists() and not force:
+    if final_dir.exists() and force:
+        shutil.rmtree(final_dir, ignore_errors=True)
+    try:
+        # Atomic within inbox/ and in/ (same queue): a concurrent promote of the same tid
+        # loses here instead of being moved inside the winner's directory.
+        os.rename(staging, final_dir)
+    except OSError as e:
+        if not isinstance(e, FileExistsError) and e.errno not in (errno.EEXIST, errno.ENOTEMPTY):
+            raise
         shutil.rmtree(staging, ignore_errors=True)
         return {"status": "skipped", "transport_id": tid, "reason": "target_exists"}
-    if final_dir.exists():
-        shutil.rmtree(final_dir, ignore_errors=True)
-    shutil.move(str(staging), str(final_dir))
+    return {"status": "ok", "transport_id": tid, "promoted_to": str(final_dir)}
 
+
+def _log_promoted(
+    queue_root: Path,
+    manifest: dict[str, Any],
+    tid: str,
+    *,
+    force: bool,
+    operator: str,
+    reason: str,
+) -> None:
     append_event(
         queue_root,
         "ingest_forced" if force else "ingest_promote_ok",
@@ -130,7 +192,6 @@ def promote_manifest(
         },
         transport_id=tid,
     )
-    return {"status": "ok", "transport_id": tid, "promoted_to": str(final_dir)}
 
 
 def sanitize_transport_id(tid: str) -> str:
@@ -161,11 +222,12 @@ def ingest_file_drop_blob(
 
     # Optional ready marker first line: sha256 <hex> must match sealed file (Part 6)
     try:
-        from agentq_transport_client.file_drop import ready_marker_path, verify_ready_marker_sha256
+        from agentq_transport_client.file_drop import verify_ready_marker_sha256
 
         ready = ready_marker_path(sealed_path, sealed_extension)
         if ready.is_file():
-            verify_ready_marker_sha256(sealed_path, ready)
+            with stage("verify_ready"):
+                verify_ready_marker_sha256(sealed_path, ready)
     except ValueError as e:
         append_event(
             queue_root,
@@ -175,7 +237,21 @@ def ingest_file_drop_blob(
         )
         return {"status": "reject", "code": "READY_SHA256_MISMATCH", "message": str(e)}
 
-    armored = sealed_path.read_text(encoding="utf-8", errors="replace")
+    # Cap from stat() before reading anything
+    max_blob = MAX_BLOB_BYTES
+    try:
+        too_large = sealed_path.stat().st_size > max_blob
+    except OSError:
+        too_large = False
+    if too_large:
+        append_event(
+            queue_root,
+            "ingest_verify_fail",
+            {"code": "BLOB_TOO_LARGE", "message": "armored payload exceeds cap", "blob_id": tid},
+            transport_id=tid,
+        )
+        return {"status": "reject", "code": "BLOB_TOO_LARGE"}
+
     # Strict gpg sign-then-encrypt path (spec): --strict-gpg only; avoids breaking PGPy envelopes.
     import os as _os
 
@@ -184,41 +260,27 @@ def ingest_file_drop_blob(
     )
     if _strict_gpg and registry_path:
         try:
-            from agentq_transport_client.crypto_pipeline import unseal_to_manifest_strict_gpg
+            from agentq_transport_client.gpg_crypto import recipient_session
             from agentq_transport_client.registry import (
-                RegistryError,
                 agent_id_for_fingerprint,
-                load_pubkey_armored_for_agent,
-                load_registry_yaml,
-                validate_registry,
+                load_validated_registry,
+                registry_pubkeys_armored,
+                schema_fast_path_allowed,
             )
 
-            _gpg = __import__(
-                "agentq_transport_client.gpg_crypto", fromlist=["gpg_decrypt_verify_armored"]
-            )
-            plain, _fp0 = _gpg.gpg_decrypt_verify_armored(
-                armored,
-                recipient_sec_armored=recipient_private_armored,
-                recipient_passphrase=passphrase or "",
-                sender_pubkey_armored=None,
-                recipient_gnupghome=recipient_gnupghome,
-            )
+            # One gpg call per blob: the per-process session already holds the recipient secret
+            # and every registry pubkey; signer binding is checked against the registry below.
+            validated = load_validated_registry(Path(registry_path), require_keys_exist=False)
+            session = recipient_session(recipient_private_armored, recipient_gnupghome)
+            session.import_keys(registry_pubkeys_armored(validated))
+            with stage("decrypt"):
+                plain, signer_fp = session.decrypt_verify(
+                    sealed_path.read_bytes(), passphrase=passphrase or "", require_signature=True
+                )
             manifest = json.loads(plain.decode("utf-8"))
             if not isinstance(manifest, dict):
                 raise CryptoPipelineError("MANIFEST_PARSE_FAILED", "gpg plaintext not object")
-            if not registry_path:
-                raise CryptoPipelineError("MANIFEST_INVALID", "strict gpg requires --registry")
-            raw = load_registry_yaml(Path(registry_path))
-            validated = validate_registry(raw, require_keys_exist=False)
             from_id = str(manifest.get("from_agent_id", ""))
-            sender_pub = load_pubkey_armored_for_agent(validated, from_id)
-            _plain2, signer_fp = unseal_to_manifest_strict_gpg(
-                armored,
-                recipient_private_armored,
-                passphrase or "",
-                sender_pub,
-                recipient_gnupghome=recipient_gnupghome,
-            )
             bound = agent_id_for_fingerprint(validated, signer_fp)
             if bound != from_id:
                 append_event(
@@ -240,6 +302,7 @@ def ingest_file_drop_blob(
                 operator=operator,
                 reason=reason,
                 registry_path=Path(registry_path),
+                trusted_sender=schema_fast_path_allowed(validated, from_id),
             )
             if r.get("status") != "ok":
                 return r
@@ -247,9 +310,7 @@ def ingest_file_drop_blob(
             proc.mkdir(parents=True, exist_ok=True)
             from agentq_transport_client.file_drop import processed_subdir_name
 
-            ready = sealed_path.parent / (
-                sealed_path.name[: -len(sealed_extension)] + ".ready"
-            ) if sealed_extension and sealed_path.name.endswith(sealed_extension) else sealed_path.with_suffix(".ready")
+            ready = ready_marker_path(sealed_path, sealed_extension)
             if sealed_path.exists():
                 dest_proc = proc / processed_subdir_name(tid)
                 dest_proc.mkdir(exist_ok=True)
@@ -266,17 +327,11 @@ def ingest_file_drop_blob(
             # fall through to PGPy path
             pass
 
-    max_blob = 50 * 1024 * 1024
-    if len(armored.encode("utf-8")) > max_blob:
-        append_event(
-            queue_root,
-            "ingest_verify_fail",
-            {"code": "BLOB_TOO_LARGE", "message": "armored payload exceeds cap", "blob_id": tid},
-            transport_id=tid,
-        )
-        return {"status": "reject", "code": "BLOB_TOO_LARGE"}
     try:
-        manifest = unseal_to_manifest(armored, recipient_private_armored, passphrase)
+        with stage("decrypt"):
+            manifest = unseal_file_to_manifest(
+                sealed_path, recipient_private_armored, passphrase, max_bytes=max_blob
+            )
     except CryptoPipelineError as e:
         quarantine = queue_root / "inbox" / ".quarantine" / tid
         quarantine.mkdir(parents=True, exist_ok=True)
@@ -307,7 +362,7 @@ def ingest_file_drop_blob(
     proc.mkdir(parents=True, exist_ok=True)
     from agentq_transport_client.file_drop import processed_subdir_name
 
-    ready = sealed_path.parent / (sealed_path.name[: -len(sealed_extension)] + ".ready") if sealed_extension and sealed_path.name.endswith(sealed_extension) else sealed_path.with_suffix(".ready")
+    ready = ready_marker_path(sealed_path, sealed_extension)
     if sealed_path.exists():
         dest_proc = proc / processed_subdir_name(tid)
         dest_proc.mkdir(exist_ok=True)
@@ -320,6 +375,30 @@ def ingest_file_drop_blob(
     return r
 
 
+def _claimed_sealed(claimed: Path, sealed_extension: str) -> Path | None:
+    for f in claimed.iterdir():
+        if f.name.endswith(sealed_extension):
+            return f
+    return None
+
+
+def _ingest_claimed_worker(
+    sealed_in_proc: Path,
+    processed_root: Path,
+    strict_gpg: bool,
+    ledger_fsync: str,
+    kwargs: dict[str, Any],
+) -> dict[str, Any]:
+    """Process-pool entrypoint: ingest one already-claimed blob (claim stays in parent)."""
+    if strict_gpg:
+        ingest_file_drop_blob._strict_gpg = True  # type: ignore[attr-defined]
+    try:
+        with ledger_batch(kwargs["queue_root"], fsync=ledger_fsync):
+            return ingest_file_drop_blob(sealed_in_proc, processed_root=processed_root, **kwargs)
+    except Exception as exc:  # surfaced per blob; pool keeps draining
+        return {"status": "error", "code": "WORKER_FAILED", "message": str(exc)[:500]}
+
+
 def run_file_drop_poll(
     roots: list[Path],
     *,
@@ -331,45 +410,91 @@ def run_file_drop_poll(
     registry_path: Path | None = None,
     strict_gpg: bool = False,
     use_lockfile: bool = False,
+    workers: int = 1,
+    candidates: Iterable[tuple[Path, Path]] | None = None,
+    ledger_fsync: str = "batch",
 ) -> list[dict[str, Any]]:
+    """
+    Claim sealed+ready pairs into inbox/.processing/ and ingest each.
+    candidates: explicit (sealed, ready) pairs (watch mode) instead of scanning roots.
+    workers > 1: claims stay serial in this process (the concurrency gate); decrypt/promote
+    of claimed blobs runs in a process pool. Ledger appends are serialized by file lock.
+    ledger_fsync: LedgerWriter policy for the poll ("event" | "batch" | "none").
+    """
     import time as _time
 
     if strict_gpg:
         ingest_file_drop_blob._strict_gpg = True  # type: ignore[attr-defined]
-    results = []
+    results: list[dict[str, Any]] = []
     processing_dir = Path(queue_root) / "inbox" / ".processing"
-    fail_streak = 0
-    for sealed, _ready in iter_candidates(roots, sealed_extension):
-        if len(results) >= max_per_poll:
-            break
-        claimed = claim_to_processing(
-            sealed, processing_dir, sealed_extension, use_lockfile=use_lockfile
-        )
-        if not claimed:
-            continue
-        sealed_in_proc = None
-        for f in claimed.iterdir():
-            if f.name.endswith(sealed_extension):
-                sealed_in_proc = f
+    kwargs: dict[str, Any] = {
+        "queue_root": queue_root,
+        "recipient_private_armored": recipient_private_armored,
+        "passphrase": passphrase,
+        "sealed_extension": sealed_extension,
+        "registry_path": registry_path,
+    }
+    claims: list[tuple[Path, Path, Path]] = []
+    pooled_tids: set[str] = set()
+    if candidates is None:
+        candidates = iter_candidates(roots, sealed_extension)
+    with ledger_batch(queue_root, fsync=ledger_fsync):
+        fail_streak = 0
+        for sealed, _ready in candidates:
+            if len(results) + len(claims) >= max_per_poll:
                 break
-        if not sealed_in_proc:
-            shutil.rmtree(claimed, ignore_errors=True)
-            continue
-        r = ingest_file_drop_blob(
-            sealed_in_proc,
-            queue_root=queue_root,
-            recipient_private_armored=recipient_private_armored,
-            passphrase=passphrase,
-            sealed_extension=sealed_extension,
-            processed_root=sealed.parent / "processed",
-            registry_path=registry_path,
-        )
-        if r.get("status") == "ok":
-            fail_streak = 0
-            move_to_processed(claimed, sealed.parent / "processed")
-        else:
-            fail_streak += 1
-            if fail_streak > 2:
-                _time.sleep(min(2 ** min(fail_streak, 6), 60))
-        results.append(r)
+            with stage("claim"):
+                claimed = claim_to_processing(
+                    sealed, processing_dir, sealed_extension, use_lockfile=use_lockfile
+                )
+            if not claimed:
+                continue
+            sealed_in_proc = _claimed_sealed(claimed, sealed_extension)
+            if not sealed_in_proc:
+                shutil.rmtree(claimed, ignore_errors=True)
+                continue
+            if workers > 1:
+                # Same content in two roots is the same tid: only one claim may reach the
+                # pool, or both would pass already_ingested before either is logged.
+                tid = blob_id(sealed_in_proc)
+                if tid in pooled_tids:
+                    results.append(
+                        {"status": "skipped", "transport_id": tid, "reason": "already_ingested"}
+                    )
+                    continue
+                pooled_tids.add(tid)
+                claims.append((sealed.parent / "processed", claimed, sealed_in_proc))
+                continue
+            r = ingest_file_drop_blob(
+                sealed_in_proc, processed_root=sealed.parent / "processed", **kwargs
+            )
+            if r.get("status") == "ok":
+                fail_streak = 0
+                move_to_processed(claimed, sealed.parent / "processed")
+            else:
+                fail_streak += 1
+                if fail_streak > 2:
+                    _time.sleep(min(2 ** min(fail_streak, 6), 60))
+            results.append(r)
+
+    if claims:
+        from concurrent.futures import ProcessPoolExecutor
+
+        with ProcessPoolExecutor(max_workers=min(workers, len(claims))) as pool:
+            futures = [
+                pool.submit(
+                    _ingest_claimed_worker,
+                    sealed_in_proc,
+                    proc_root,
+                    strict_gpg,
+                    ledger_fsync,
+                    kwargs,
+                )
+                for proc_root, _claimed, sealed_in_proc in claims
+            ]
+            for (proc_root, claimed, _sealed_in_proc), fut in zip(claims, futures):
+                r = fut.result()
+                if r.get("status") == "ok":
+                    move_to_processed(claimed, proc_root)
+                results.append(r)
     return results
@@ -1,21 +1,151 @@
 #!/usr/bin/env python3
-# Purpose: Append-only ingest ledger JSONL for idempotency.
+# Purpose: Append-only ingest ledger JSONL for idempotency (+ SQLite index, batch writer, segments).
 # Created: 2026-03-09
-# Last updated: 2026-03-09
+# Last updated: 2026-10-17
 
 from __future__ import annotations
 
+import gzip
 import hashlib
 import json
+import os
+import sqlite3
+from contextlib import closing, contextmanager
 from datetime import datetime, timezone
 from pathlib import Path
-from typing import Any
+from typing import Any, Callable, Iterator
+
+from agentq_transport_client.timing import stage
+
+# Events that make a transport_id count as ingested (idempotency skip). ingest_bundle_held: a
+# bundle part/index accepted into inbox/.bundles/ awaiting reassembly.
+_INGESTED_EVENTS = ("ingest_promote_ok", "ingest_forced", "ingest_bundle_held")
 
 
 def ledger_path(queue_root: Path) -> Path:
     return Path(queue_root) / "inbox" / ".ingest_log.jsonl"
 
 
+def ledger_index_path(queue_root: Path) -> Path:
+    """Derived (transport_id, event) index; safe to delete, rebuilt from the JSONL."""
+    return Path(queue_root) / "inbox" / ".ingest_log.index.sqlite"
+
+
+def ledger_segments_dir(queue_root: Path) -> Path:
+    """Rotated ingest ledger segments (ledger-compact); names sort oldest -> newest."""
+    return Path(queue_root) / "inbox" / ".ingest_log.segments"
+
+
+def ledger_snapshot_path(queue_root: Path) -> Path:
+    """Idempotency state folded out of all segments: ingested ids + unresolved pending moves."""
+    return Path(queue_root) / "inbox" / ".ingest_log.snapshot.json"
+
+
+def load_ledger_snapshot(queue_root: Path) -> dict[str, Any]:
+    """{"ingested": {transport_id: event}, "pending_processed_move": [records]}; empty if none."""
+    try:
+        with open(ledger_snapshot_path(queue_root), encoding="utf-8") as f:
+            snap = json.load(f)
+    except (OSError, json.JSONDecodeError):
+        snap = {}
+    return {
+        "ingested": dict(snap.get("ingested") or {}),
+        "pending_processed_move": list(snap.get("pending_processed_move") or []),
+    }
+
+
+def _index_connect(queue_root: Path) -> sqlite3.Connection:
+    # Autocommit; _index_sync manages its own BEGIN IMMEDIATE for cross-process safety
+    conn = sqlite3.connect(str(ledger_index_path(queue_root)), timeout=30, isolation_level=None)
+    conn.execute(
+        "CREATE TABLE IF NOT EXISTS events ("
+        "transport_id TEXT NOT NULL, event TEXT NOT NULL, "
+        "PRIMARY KEY (transport_id, event)) WITHOUT ROWID"
+    )
+    conn.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)")
+    return conn
+
+
+def _ledger_head(p: Path) -> str:
+    """Hash of the ledger's first complete line ("" when it has none yet)."""
+    try:
+        with open(p, "rb") as f:
+            first = f.readline(1 << 16)
+    except OSError:
+        return ""
+    return hashlib.sha256(first).hexdigest()[:16] if first.endswith(b"\n") else ""
+
+
+def _index_sync(conn: sqlite3.Connection, queue_root: Path) -> None:
+    """
+    Catch the index up with the JSONL: index complete lines past the stored byte offset.
+    Full rebuild when the ledger shrank or was replaced: offset past EOF, another
+    device/inode, or a different first line (rewritten in place).
+    """
+    p = ledger_path(queue_root)
+    try:
+        st = p.stat()
+        size, file_id = st.st_size, f"{st.st_dev}:{st.st_ino}"
+    except OSError:
+        size, file_id = 0, ""
+    meta = dict(conn.execute("SELECT key, value FROM meta").fetchall())
+    if meta.get("offset") == str(size) and meta.get("file_id", "") == file_id:
+        return
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        # Re-read under the write lock; another process may have synced meanwhile
+        meta = dict(conn.execute("SELECT key, value FROM meta").fetchall())
+        offset = int(meta.get("offset", 0))
+        head = _ledger_head(p)
+        replaced = meta.get("file_id", "") != file_id or (
+            meta.get("head", "") not in ("", head)
+        )
+        if "offset" not in meta or offset > size or replaced:
+            # Fresh index or replaced ledger: start from the compacted snapshot
+            conn.execute("DELETE FROM events")
+            conn.executemany(
+                "INSERT OR IGNORE INTO events VALUES (?, ?)",
+                load_ledger_snapshot(queue_root)["ingested"].items(),
+            )
+            offset = 0
+        rows: list[tuple[str, str]] = []
+        if size > offset:
+            with open(p, "rb") as f:
+                f.seek(offset)
+                for raw in f:
+                    if not raw.endswith(b"\n"):
+                        break  # partial line from an in-flight writer; index next time
+                    offset += len(raw)
+                    try:
+                        o = json.loads(raw)
+                    except (json.JSONDecodeError, UnicodeDecodeError):
+                        continue
+                    tid = o.get("transport_id") if isinstance(o, dict) else None
+                    if tid and o.get("event"):
+                        rows.append((str(tid), str(o["event"])))
+        conn.executemany("INSERT OR IGNORE INTO events VALUES (?, ?)", rows)
+        conn.executemany(
+            "INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)",
+            [
+                ("offset", str(offset)),
+                ("file_id", file_id),
+                # The first line only identifies the file once it has been indexed
+                ("head", head if offset else ""),
+            ],
+        )
+        conn.execute("COMMIT")
+    except BaseException:
+        conn.execute("ROLLBACK")
+        raise
+
+
+def rebuild_ledger_index(queue_root: Path) -> None:
+    """Drop and rebuild the sidecar index from the JSONL ledger."""
+    ledger_index_path(queue_root).unlink(missing_ok=True)
+    with closing(_index_connect(queue_root)) as conn:
+        _index_sync(conn, queue_root)
+
+
 def blob_id(path: Path) -> str:
     h = hashlib.sha256()
     with open(path, "rb") as f:
@@ -24,6 +154,135 @@ def blob_id(path: Path) -> str:
     return h.hexdigest()[:16]
 
 
+def _lock_exclusive(f: Any) -> None:
+    try:
+        import fcntl
+
+        fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+    except (ImportError, OSError):
+        pass  # no flock (Windows / some network fs); single-writer behaviour
+
+
+def _append_line(path: Path, line: str) -> None:
+    """Append one line under an exclusive flock so pool workers / parallel polls never interleave."""
+    with open(path, "a", encoding="utf-8") as f:
+        _lock_exclusive(f)
+        f.write(line)
+        f.flush()
+
+
+FSYNC_POLICIES = ("event", "batch", "none")
+
+
+class LedgerWriter:
+    """
+    Buffered JSONL appender used across a poll (see ledger_batch).
+    fsync: "event" writes + fsyncs every record; "batch" buffers up to batch_size records and
+    fsyncs once per flush; "none" buffers and never fsyncs. Each flush is one write under an
+    exclusive flock, so writers in other processes never interleave with a batch.
+    """
+
+    def __init__(
+        self,
+        path: Path,
+        *,
+        fsync: str = "batch",
+        batch_size: int = 256,
+        on_flush: Callable[[], None] | None = None,
+    ):
+        if fsync not in FSYNC_POLICIES:
+            raise ValueError(f"fsync must be one of {FSYNC_POLICIES}, got {fsync!r}")
+        self.path = Path(path)
+        self.fsync = fsync
+        self.batch_size = 1 if fsync == "event" else max(1, batch_size)
+        self._on_flush = on_flush
+        self._buf: list[str] = []
+        self._pending: set[tuple[str, str]] = set()
+        self._pid = os.getpid()
+
+    def append(self, rec: dict[str, Any]) -> None:
+        self._buf.append(json.dumps(rec, sort_keys=True) + "\n")
+        tid = rec.get("transport_id")
+        if tid and rec.get("event"):
+            self._pending.add((str(tid), str(rec["event"])))
+        if len(self._buf) >= self.batch_size:
+            self.flush()
+
+    def has_pending(self, transport_id: str, events: tuple[str, ...]) -> bool:
+        """True if a buffered (not yet flushed) record matches; keeps idempotency exact mid-batch."""
+        return any((transport_id, e) in self._pending for e in events)
+
+    def flush(self) -> None:
+        if not self._buf:
+            return
+        data = "".join(self._buf)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with open(self.path, "a", encoding="utf-8") as f:
+            _lock_exclusive(f)
+            f.write(data)
+            f.flush()
+            if self.fsync != "none":
+                os.fsync(f.fileno())
+        self._buf.clear()
+        self._pending.clear()
+        if self._on_flush:
+            self._on_flush()
+
+    def close(self) -> None:
+        with stage("ledger"):
+            self.flush()
+
+    def __enter__(self) -> "LedgerWriter":
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        self.close()
+
+
+# Active batch writers by ledger file path; only honoured in the process that opened them
+# (a forked pool worker must not buffer into its copy of the parent's writer).
+_ACTIVE_WRITERS: dict[str, LedgerWriter] = {}
+
+
+def _active_writer(path: Path) -> LedgerWriter | None:
+    w = _ACTIVE_WRITERS.get(str(path))
+    if w is not None and w._pid == os.getpid():
+        return w
+    return None
+
+
+@contextmanager
+def ledger_batch(
+    queue_root: Path, *, fsync: str = "batch", batch_size: int = 256
+) -> Iterator[LedgerWriter]:
+    """
+    Route append_event for queue_root through one LedgerWriter until exit (then flush).
+    Nested use for the same ledger reuses the outer writer.
+    """
+    path = ledger_path(queue_root)
+    outer = _active_writer(path)
+    if outer is not None:
+        yield outer
+        return
+    writer = LedgerWriter(
+        path, fsync=fsync, batch_size=batch_size, on_flush=lambda: _index_sync_quiet(queue_root)
+    )
+    _ACTIVE_WRITERS[str(path)] = writer
+    try:
+        yield writer
+    finally:
+        _ACTIVE_WRITERS.pop(str(path), None)
+        writer.close()
+
+
+def _index_sync_quiet(queue_root: Path) -> None:
+    try:
+        with closing(_index_connect(queue_root)) as conn:
+            _index_sync(conn, queue_root)
+    except sqlite3.Error:
+        pass  # JSONL stays authoritative; next lookup catches the index up
+
+
 def append_event(
     queue_root: Path,
     event_type: str,
@@ -31,17 +290,28 @@ def append_event(
     *,
     transport_id: str | None = None,
 ) -> None:
-    """Append one JSON line; create parent dirs."""
+    """Append one JSON line (buffered when inside ledger_batch); create parent dirs."""
+    with stage("ledger"):
+        _append_event(queue_root, event_type, payload, transport_id)
+
+
+def _append_event(
+    queue_root: Path, event_type: str, payload: dict[str, Any], transport_id: str | None
+) -> None:
     path = ledger_path(queue_root)
-    path.parent.mkdir(parents=True, exist_ok=True)
     rec = {
         "ts": datetime.now(timezone.utc).isoformat(),
         "event": event_type,
         "transport_id": transport_id,
         **payload,
     }
-    with open(path, "a", encoding="utf-8") as f:
-        f.write(json.dumps(rec, sort_keys=True) + "\n")
+    writer = _active_writer(path)
+    if writer is not None:
+        writer.append(rec)
+        return
+    path.parent.mkdir(parents=True, exist_ok=True)
+    _append_line(path, json.dumps(rec, sort_keys=True) + "\n")
+    _index_sync_quiet(queue_root)
 
 
 def ship_ledger_path(queue_root: Path) -> Path:
@@ -51,6 +321,10 @@ def ship_ledger_path(queue_root: Path) -> Path:
     return p
 
 
+def ship_segments_dir(queue_root: Path) -> Path:
+    return Path(queue_root) / "out" / ".ship_log.segments"
+
+
 def append_ship_event(
     queue_root: Path,
     event_type: str,
@@ -63,42 +337,56 @@ def append_ship_event(
         "event": event_type,
         **payload,
     }
-    with open(path, "a", encoding="utf-8") as f:
-        f.write(json.dumps(rec, sort_keys=True) + "\n")
+    _append_line(path, json.dumps(rec, sort_keys=True) + "\n")
 
 
 def already_ingested(queue_root: Path, transport_id: str) -> bool:
+    """True if the ledger holds ingest_promote_ok or ingest_forced for transport_id (indexed)."""
     p = ledger_path(queue_root)
-    if not p.is_file():
+    if (
+        not p.is_file()
+        and _active_writer(p) is None
+        and not ledger_snapshot_path(queue_root).is_file()
+    ):
         return False
     tid = (transport_id or "").strip()
     if not tid:
         return False
-    with open(p, encoding="utf-8", errors="replace") as f:
-        for line in f:
-            line = line.strip()
-            if not line:
-                continue
-            try:
-                o = json.loads(line)
-            except json.JSONDecodeError:
-                continue
-            if o.get("transport_id") == tid and o.get("event") in (
-                "ingest_promote_ok",
-                "ingest_forced",
-            ):
-                return True
+    writer = _active_writer(p)
+    if writer is not None and writer.has_pending(tid, _INGESTED_EVENTS):
+        return True
+    try:
+        with closing(_index_connect(queue_root)) as conn:
+            _index_sync(conn, queue_root)
+            row = conn.execute(
+                "SELECT 1 FROM events WHERE transport_id = ? AND event IN ("
+                + ", ".join("?" * len(_INGESTED_EVENTS))
+                + ") LIMIT 1",
+                (tid, *_INGESTED_EVENTS),
+            ).fetchone()
+        return row is not None
+    except sqlite3.Error:
+        return _scan_already_ingested(queue_root, tid)
+
+
+def _scan_already_ingested(queue_root: Path, tid: str) -> bool:
+    """Snapshot + live JSONL scan; fallback when the sidecar index is unusable."""
+    if tid in load_ledger_snapshot(queue_root)["ingested"]:
+        return True
+    for o in _iter_jsonl(ledger_path(queue_root)):
+        if o.get("transport_id") == tid and o.get("event") in _INGESTED_EVENTS:
+            return True
     return False
 
 
-def iter_ingest_events(
-    queue_root: Path, event_type: str | None = None
-):
-    """Yield parsed JSON objects from ingest ledger."""
-    p = ledger_path(queue_root)
-    if not p.is_file():
+def _iter_jsonl(p: Path) -> Iterator[dict[str, Any]]:
+    """Parsed objects from a JSONL file or .gz segment; bad lines skipped."""
+    opener = gzip.open if p.suffix == ".gz" else open
+    try:
+        f = opener(p, "rt", encoding="utf-8", errors="replace")
+    except OSError:
         return
-    with open(p, encoding="utf-8", errors="replace") as f:
+    with f:
         for line in f:
             line = line.strip()
             if not line:
@@ -107,11 +395,178 @@ def iter_ingest_events(
                 o = json.loads(line)
             except json.JSONDecodeError:
                 continue
+            if isinstance(o, dict):
+                yield o
+
+
+def _segments_newest_first(seg_dir: Path) -> list[Path]:
+    if not seg_dir.is_dir():
+        return []
+    return sorted(
+        (p for p in seg_dir.iterdir() if p.name.endswith((".jsonl", ".jsonl.gz"))),
+        key=lambda p: p.name,
+        reverse=True,
+    )
+
+
+def iter_ingest_events(
+    queue_root: Path, event_type: str | None = None, *, include_segments: bool = True
+) -> Iterator[dict[str, Any]]:
+    """
+    Yield parsed JSON objects from the ingest ledger: the live file first, then rotated
+    segments newest-first (each in append order). include_segments=False reads the live file only.
+    """
+    p = ledger_path(queue_root)
+    writer = _active_writer(p)
+    if writer is not None:
+        writer.flush()
+    files = [p] if p.is_file() else []
+    if include_segments:
+        files += _segments_newest_first(ledger_segments_dir(queue_root))
+    for fp in files:
+        for o in _iter_jsonl(fp):
             if event_type and o.get("event") != event_type:
                 continue
             yield o
 
 
 def pending_processed_moves(queue_root: Path) -> list[dict[str, Any]]:
-    """Ledger records with event pending_processed_move (mail-move-retry)."""
-    return list(iter_ingest_events(queue_root, "pending_processed_move"))
+    """
+    pending_processed_move records (mail-move-retry): unresolved ones carried in the snapshot,
+    then the live ledger. Rotated segments are not rescanned.
+    """
+    out = load_ledger_snapshot(queue_root)["pending_processed_move"]
+    out.extend(iter_ingest_events(queue_root, "pending_processed_move", include_segments=False))
+    return out
+
+
+def _segment_name(path: Path, compress: bool) -> str:
+    stamp = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%S%fZ")
+    return f"{path.name.lstrip('.').rsplit('.', 1)[0]}.{stamp}.jsonl" + (".gz" if compress else "")
+
+
+def _rotate_locked(
+    path: Path,
+    seg_dir: Path,
+    *,
+    compress: bool,
+    min_bytes: int,
+    on_record: Callable[[dict[str, Any]], None] | None = None,
+    before_truncate: Callable[[], None] | None = None,
+    after_truncate: Callable[[], None] | None = None,
+) -> dict[str, Any]:
+    """
+    Copy the live JSONL into a dated segment and truncate it, all under the writers' flock
+    (writers blocked meanwhile append to the emptied file, so nothing is lost or duplicated).
+    """
+    try:
+        size = path.stat().st_size
+    except OSError:
+        return {"segment": None, "lines": 0, "bytes": 0}
+    if size == 0 or size < min_bytes:
+        return {"segment": None, "lines": 0, "bytes": size}
+    seg_dir.mkdir(parents=True, exist_ok=True)
+    with open(path, "r+b") as live:
+        _lock_exclusive(live)
+        seg = seg_dir / _segment_name(path, compress)
+        tmp = seg.with_name(seg.name + ".part")
+        lines = 0
+        nbytes = 0
+        with (gzip.open(tmp, "wb") if compress else open(tmp, "wb")) as out:
+            for raw in live:
+                if not raw.endswith(b"\n"):
+                    raw += b"\n"
+                out.write(raw)
+                lines += 1
+                nbytes += len(raw)
+                if on_record is not None:
+                    try:
+                        o = json.loads(raw)
+                    except (json.JSONDecodeError, UnicodeDecodeError):
+                        continue
+                    if isinstance(o, dict):
+                        on_record(o)
+        with open(tmp, "rb") as f:
+            os.fsync(f.fileno())
+        os.replace(tmp, seg)
+        if before_truncate is not None:
+            before_truncate()
+        live.truncate(0)
+        live.flush()
+        os.fsync(live.fileno())
+        if after_truncate is not None:
+            after_truncate()
+    return {"segment": str(seg), "lines": lines, "bytes": nbytes}
+
+
+def compact_ledger(
+    queue_root: Path, *, compress: bool = True, min_bytes: int = 0
+) -> dict[str, Any]:
+    """
+    Roll inbox/.ingest_log.jsonl and out/.ship_log.jsonl into dated segments (gzip by default)
+    and fold the ingest idempotency state into ledger_snapshot_path. Skips a ledger smaller
+    than min_bytes. Safe to run while pollers are appending.
+    """
+    queue_root = Path(queue_root)
+    path = ledger_path(queue_root)
+    writer = _active_writer(path)
+    if writer is not None:
+        writer.flush()
+    snap = load_ledger_snapshot(queue_root)
+    ingested: dict[str, str] = snap["ingested"]
+    pending: dict[str, dict[str, Any]] = {
+        str(r.get("uid")): r for r in snap["pending_processed_move"] if r.get("uid") is not None
+    }
+
+    def _fold(o: dict[str, Any]) -> None:
+        ev = o.get("event")
+        tid = o.get("transport_id")
+        if ev in _INGESTED_EVENTS and tid:
+            ingested.setdefault(str(tid), str(ev))
+        elif ev == "pending_processed_move" and o.get("uid") is not None:
+            pending[str(o["uid"])] = o
+        elif ev == "mail_move_ok" and o.get("uid") is not None:
+            pending.pop(str(o["uid"]), None)
+
+    def _write_snapshot() -> None:
+        sp = ledger_snapshot_path(queue_root)
+        tmp = sp.with_name(sp.name + ".tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(
+                {
+                    "compacted_at": datetime.now(timezone.utc).isoformat(),
+                    "ingested": ingested,
+                    "pending_processed_move": list(pending.values()),
+                },
+                f,
+                sort_keys=True,
+            )
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, sp)
+
+    def _reset_index() -> None:
+        # Dropping the offset makes the next sync reseed from the new snapshot + emptied file
+        try:
+            with closing(_index_connect(queue_root)) as conn:
+                conn.execute("DELETE FROM meta WHERE key = 'offset'")
+                _index_sync(conn, queue_root)
+        except sqlite3.Error:
+            pass
+
+    ingest = _rotate_locked(
+        path,
+        ledger_segments_dir(queue_root),
+        compress=compress,
+        min_bytes=min_bytes,
+        on_record=_fold,
+        before_truncate=_write_snapshot,
+        after_truncate=_reset_index,
+    )
+    ship = _rotate_locked(
+        ship_ledger_path(queue_root),
+        ship_segments_dir(queue_root),
+        compress=compress,
+        min_bytes=min_bytes,
+    )
+    return {"status": "ok", "ingest": ingest, "ship": ship, "ingested_ids": len(ingested)}
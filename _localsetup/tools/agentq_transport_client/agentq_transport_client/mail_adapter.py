@@ -1,20 +1,23 @@
 #!/usr/bin/env python3
 # Purpose: Mail adapter: policy-gated query UNSEEN, get_decrypted, promote, move to processed.
 # Created: 2026-03-09
-# Last updated: 2026-03-09
+# Last updated: 2026-10-17
 
 from __future__ import annotations
 
+import asyncio
 import json
 import sys
 from pathlib import Path
-from typing import Any
+from typing import Any, Callable
 
 _ENGINE = Path(__file__).resolve().parents[3]
 _MAIL_SCRIPTS = _ENGINE / "skills" / "localsetup-mail-protocol-control" / "scripts"
 
 
-def _mail_controller(policy_path: Path, accounts_path: Path) -> Any:
+def mail_controller(
+    policy_path: Path, accounts_path: Path, state_dir: Path | None = None
+) -> Any:
     sys.path.insert(0, str(_MAIL_SCRIPTS))
     from mail_protocol_control import EnvCredentialProvider, MailProtocolControl  # type: ignore
     from mail_types import AccountConfig  # type: ignore
@@ -54,52 +57,76 @@ def _mail_controller(policy_path: Path, accounts_path: Path) -> Any:
         policy_path=policy_path,
         accounts=_load_accounts(accounts_path),
         credential_provider=EnvCredentialProvider(),
+        state_dir=state_dir,
     )
 
 
-def mail_pull_and_promote(
+def mail_state_dir(queue_root: Path) -> Path:
+    """Mail sync cursors live with the queue they feed (inbox/.mail_state)."""
+    return Path(queue_root) / "inbox" / ".mail_state"
+
+
+def mail_async_engine(ctrl: Any, per_account: int = 2) -> Any:
+    """AsyncMailEngine over ctrl: concurrent dispatch with a per-account call limit."""
+    sys.path.insert(0, str(_MAIL_SCRIPTS))
+    from mail_engine import AsyncMailEngine  # type: ignore
+
+    return AsyncMailEngine(ctrl, per_account=per_account)
+
+
+async def _pull_and_promote(
+    engine: Any,
     *,
     queue_root: Path,
     account_id: str,
-    policy_path: Path,
-    accounts_path: Path,
-    mailbox: str = "INBOX",
-    post_ingest_mailbox: str = "LocalsetupAgentQ/Processed",
-    query: str = "UNSEEN",
-    lim: int = 25,
-    confirm_token: str = "",
-    registry_path: Path | None = None,
+    mailbox: str,
+    post_ingest_mailbox: str,
+    query: str,
+    lim: int,
+    confirm_token: str,
+    registry_path: Path | None,
+    incremental: bool,
 ) -> list[dict[str, Any]]:
-    """
-    Query messages; for each UID get_decrypted; if envelope is agentq_outer promote to in/.
-    Then move_messages to post_ingest_mailbox (may require confirm_token per policy).
-    """
     from agentq_transport_client.ingest import agentq_outer_to_manifest, promote_manifest
 
-    ctrl = _mail_controller(policy_path, accounts_path)
     out: list[dict[str, Any]] = []
-
-    queried = ctrl.dispatch(
-        "mail_query",
-        {"acct": account_id, "mailbox": mailbox, "query": query, "lim": lim},
-    )
-    if not queried.get("ok"):
-        return [{"status": "error", "code": queried.get("code"), "message": queried.get("message")}]
-    items = queried.get("items") or []
-    for item in items:
-        uid = item.get("id") if isinstance(item, dict) else None
-        if not uid:
-            continue
-        got = ctrl.dispatch(
+    sync_next = ""
+    if incremental:
+        synced = await engine.dispatch(
+            "mail_sync",
+            {"acct": account_id, "mailbox": mailbox, "lim": lim, "commit": False},
+        )
+        if not synced.get("ok"):
+            return [{"status": "error", "code": synced.get("code"), "message": synced.get("message")}]
+        uids = [str(u) for u in synced.get("new") or []]
+        sync_next = str(synced.get("next") or "")
+    else:
+        queried = await engine.dispatch(
+            "mail_query",
+            {"acct": account_id, "mailbox": mailbox, "query": query, "lim": lim},
+        )
+        if not queried.get("ok"):
+            return [{"status": "error", "code": queried.get("code"), "message": queried.get("message")}]
+        uids = [
+            str(item["id"])
+            for item in queried.get("items") or []
+            if isinstance(item, dict) and item.get("id")
+        ]
+    # Fetch+decrypt concurrently; promotion stays sequential in UID order on this thread.
+    fetched = await engine.sweep(
+        (
             "mail_get_decrypted",
-            {
-                "acct": account_id,
-                "mailbox": mailbox,
-                "id": uid,
-                "encryption_mode": "openpgp",
-            },
+            {"acct": account_id, "mailbox": mailbox, "id": uid, "encryption_mode": "openpgp"},
         )
+        for uid in uids
+    )
+    retry_later = False
+    to_move: list[tuple[dict[str, Any], str]] = []
+    for uid, got in zip(uids, fetched):
         if not got.get("ok"):
+            code = str(got.get("code") or "")
+            if code.startswith("IMAP_") or code in ("UNHANDLED_ERROR", "CREDENTIAL_NOT_FOUND"):
+                retry_later = True
             out.append(
                 {"status": "skip", "uid": uid, "code": got.get("code"), "message": got.get("message")}
             )
@@ -124,46 +151,277 @@ def mail_pull_and_promote(
         )
         out.append({"status": r.get("status"), "uid": uid, **r})
         if r.get("status") == "ok":
-            moved = ctrl.dispatch(
-                "mail_mutate",
-                {
-                    "acct": account_id,
-                    "mailbox": mailbox,
-                    "mutate_action": "move_messages",
-                    "uids": [uid],
-                    "target_mailbox": post_ingest_mailbox,
-                    "count": 1,
-                    "confirm_token": confirm_token,
-                },
+            to_move.append((out[-1], uid))
+
+    moves = await engine.sweep(
+        (
+            "mail_mutate",
+            {
+                "acct": account_id,
+                "mailbox": mailbox,
+                "mutate_action": "move_messages",
+                "uids": [uid],
+                "target_mailbox": post_ingest_mailbox,
+                "count": 1,
+                "confirm_token": confirm_token,
+            },
+        )
+        for _row, uid in to_move
+    )
+    for (row, uid), moved in zip(to_move, moves):
+        if not moved.get("ok") and moved.get("code") == "CONFIRMATION_REQUIRED":
+            row["move_pending"] = True
+            row["move_message"] = moved.get("message")
+        elif moved.get("ok"):
+            row["moved_to"] = post_ingest_mailbox
+        else:
+            row["move_error"] = moved.get("code") or moved.get("message")
+            # Ledger for retry (Part 13 pending_processed_move)
+            try:
+                from agentq_transport_client.ledger import append_event
+
+                append_event(
+                    queue_root,
+                    "pending_processed_move",
+                    {
+                        "uid": uid,
+                        "mailbox": mailbox,
+                        "target_mailbox": post_ingest_mailbox,
+                        "code": moved.get("code"),
+                        "message": moved.get("message"),
+                        "transport_id": f"mail-{uid}",
+                    },
+                    transport_id=f"mail-{uid}",
+                )
+            except OSError:
+                pass
+
+    if sync_next and not retry_later:
+        await engine.dispatch(
+            "mail_sync", {"acct": account_id, "mailbox": mailbox, "commit_cursor": sync_next}
+        )
+    return out
+
+
+def mail_pull_and_promote(
+    *,
+    queue_root: Path,
+    account_id: str,
+    policy_path: Path,
+    accounts_path: Path,
+    mailbox: str = "INBOX",
+    post_ingest_mailbox: str = "LocalsetupAgentQ/Processed",
+    query: str = "UNSEEN",
+    lim: int = 25,
+    confirm_token: str = "",
+    registry_path: Path | None = None,
+    incremental: bool = False,
+    ctrl: Any = None,
+    concurrency: int = 2,
+) -> list[dict[str, Any]]:
+    """
+    Query messages; for each UID get_decrypted; if envelope is agentq_outer promote to in/.
+    Then move_messages to post_ingest_mailbox (may require confirm_token per policy).
+    incremental: take UIDs from mail_sync (new since the cursor in inbox/.mail_state) instead
+    of searching `query`; the cursor is committed only when no fetch failed transiently.
+    ctrl: reuse a controller (and its pooled IMAP session) across calls, as mail_watch does.
+    concurrency: fetches/moves in flight at once (pooled IMAP sessions for the account).
+    """
+    owns_ctrl = ctrl is None
+    if ctrl is None:
+        ctrl = mail_controller(policy_path, accounts_path, state_dir=mail_state_dir(queue_root))
+    engine = mail_async_engine(ctrl, per_account=concurrency)
+    try:
+        return asyncio.run(
+            _pull_and_promote(
+                engine,
+                queue_root=queue_root,
+                account_id=account_id,
+                mailbox=mailbox,
+                post_ingest_mailbox=post_ingest_mailbox,
+                query=query,
+                lim=lim,
+                confirm_token=confirm_token,
+                registry_path=registry_path,
+                incremental=incremental,
             )
-            if not moved.get("ok") and moved.get("code") == "CONFIRMATION_REQUIRED":
-                out[-1]["move_pending"] = True
-                out[-1]["move_message"] = moved.get("message")
-            elif moved.get("ok"):
-                out[-1]["moved_to"] = post_ingest_mailbox
-            else:
-                out[-1]["move_error"] = moved.get("code") or moved.get("message")
-                # Ledger for retry (Part 13 pending_processed_move)
+        )
+    finally:
+        engine.close()
+        if owns_ctrl:
+            ctrl.close()
+
+
+def mail_pull_sweep(
+    *,
+    queue_root: Path,
+    account_ids: list[str],
+    policy_path: Path,
+    accounts_path: Path,
+    mailboxes: list[str] | None = None,
+    post_ingest_mailbox: str = "LocalsetupAgentQ/Processed",
+    query: str = "UNSEEN",
+    lim: int = 25,
+    confirm_token: str = "",
+    registry_path: Path | None = None,
+    incremental: bool = False,
+    concurrency: int = 2,
+) -> list[dict[str, Any]]:
+    """
+    mail_pull_and_promote over every (account, mailbox) at once on one controller. Network
+    waits overlap across accounts; concurrency caps calls per account across its mailboxes.
+    Results are tagged with account_id and mailbox, grouped in argument order.
+    """
+    ctrl = mail_controller(policy_path, accounts_path, state_dir=mail_state_dir(queue_root))
+    engine = mail_async_engine(ctrl, per_account=concurrency)
+    pairs = [(a, m) for a in account_ids for m in (mailboxes or ["INBOX"])]
+
+    async def _all() -> list[list[dict[str, Any]]]:
+        return await asyncio.gather(
+            *(
+                _pull_and_promote(
+                    engine,
+                    queue_root=queue_root,
+                    account_id=account_id,
+                    mailbox=mailbox,
+                    post_ingest_mailbox=post_ingest_mailbox,
+                    query=query,
+                    lim=lim,
+                    confirm_token=confirm_token,
+                    registry_path=registry_path,
+                    incremental=incremental,
+                )
+                for account_id, mailbox in pairs
+            )
+        )
+
+    try:
+        per_pair = asyncio.run(_all())
+    finally:
+        engine.close()
+        ctrl.close()
+    return [
+        {"account_id": account_id, "mailbox": mailbox, **r}
+        for (account_id, mailbox), rows in zip(pairs, per_pair)
+        for r in rows
+    ]
+
+
+def mail_watch(
+    *,
+    queue_root: Path,
+    account_ids: list[str],
+    policy_path: Path,
+    accounts_path: Path,
+    mailbox: str = "INBOX",
+    post_ingest_mailbox: str = "LocalsetupAgentQ/Processed",
+    lim: int = 25,
+    confirm_token: str = "",
+    registry_path: Path | None = None,
+    renew_seconds: int = 1500,
+    poll_seconds: float = 60.0,
+    on_result: Callable[[dict[str, Any]], None] | None = None,
+    stop: Any = None,
+) -> int:
+    """
+    One thread per account holding IMAP IDLE on mailbox. EXISTS/EXPUNGE/FETCH wakes an
+    incremental mail_pull_and_promote; IDLE is re-issued every renew_seconds (under the
+    RFC 2177 29-minute limit) and each renewal also runs a catch-up pull, which is a single
+    STATUS when nothing changed. Servers without IDLE fall back to pulling every
+    poll_seconds. A full page is pulled again at once only if some row was promoted;
+    a page of failures, or an exception (logged to stderr, controller reopened), backs
+    off 1s doubling up to poll_seconds. Runs until stop.is_set() or KeyboardInterrupt;
+    returns results handled.
+    """
+    import threading
+
+    stop = stop or threading.Event()
+    handled = 0
+    lock = threading.Lock()
+
+    def _emit(results: list[dict[str, Any]], account_id: str) -> None:
+        nonlocal handled
+        with lock:
+            handled += len(results)
+            if on_result:
+                for r in results:
+                    on_result({"account_id": account_id, **r})
+
+    def _run(account_id: str) -> None:
+        pull_kw: dict[str, Any] = {
+            "queue_root": queue_root,
+            "account_id": account_id,
+            "policy_path": policy_path,
+            "accounts_path": accounts_path,
+            "mailbox": mailbox,
+            "post_ingest_mailbox": post_ingest_mailbox,
+            "lim": lim,
+            "confirm_token": confirm_token,
+            "registry_path": registry_path,
+            "incremental": True,
+        }
+        ctrl = None
+        idle_ok = True
+        backoff = 0.0
+
+        def _back_off() -> None:
+            nonlocal backoff
+            backoff = min(poll_seconds, max(1.0, backoff * 2))
+            stop.wait(backoff)
+
+        try:
+            while not stop.is_set():
                 try:
-                    from agentq_transport_client.ledger import append_event
-
-                    append_event(
-                        queue_root,
-                        "pending_processed_move",
-                        {
-                            "uid": uid,
-                            "mailbox": mailbox,
-                            "target_mailbox": post_ingest_mailbox,
-                            "code": moved.get("code"),
-                            "message": moved.get("message"),
-                            "transport_id": f"mail-{uid}",
-                        },
-                        transport_id=f"mail-{uid}",
+                    if ctrl is None:
+                        ctrl = mail_controller(
+                            policy_path, accounts_path, state_dir=mail_state_dir(queue_root)
+                        )
+                    results = mail_pull_and_promote(**pull_kw, ctrl=ctrl)
+                    _emit(results, account_id)
+                    if any(r.get("status") not in ("error", "skip") for r in results):
+                        backoff = 0.0
+                        if len(results) >= lim:
+                            continue  # more waiting behind the page limit
+                    elif len(results) >= lim:
+                        _back_off()  # whole page failed: do not spin on it
+                        continue
+                    if idle_ok:
+                        woke = ctrl.dispatch(
+                            "mail_idle",
+                            {"acct": account_id, "mailbox": mailbox, "timeout": renew_seconds},
+                        )
+                        if woke.get("ok"):
+                            continue
+                        if woke.get("code") == "IMAP_IDLE_UNSUPPORTED":
+                            idle_ok = False
+                        _emit([{"status": "idle_error", **woke}], account_id)
+                    stop.wait(poll_seconds)
+                except Exception as exc:  # noqa: BLE001
+                    sys.stderr.write(
+                        "[WARN] mail watch %s: %s: %s; restarting\n"
+                        % (account_id, type(exc).__name__, exc)
                     )
-                except OSError:
-                    pass
+                    if ctrl is not None:
+                        ctrl.close()
+                        ctrl = None
+                    _back_off()
+        finally:
+            if ctrl is not None:
+                ctrl.close()
 
-    return out
+    threads = [
+        threading.Thread(target=_run, args=(a,), name=f"mail-watch-{a}", daemon=True)
+        for a in account_ids
+    ]
+    for t in threads:
+        t.start()
+    try:
+        while any(t.is_alive() for t in threads):
+            for t in threads:
+                t.join(timeout=0.5)
+    except KeyboardInterrupt:
+        stop.set()
+    return handled
 
 
 def mail_retry_pending_moves(
@@ -173,10 +431,12 @@ def mail_retry_pending_moves(
     policy_path: Path,
     accounts_path: Path,
     confirm_token: str = "",
+    concurrency: int = 2,
 ) -> list[dict[str, Any]]:
     """
     Re-read ingest ledger for pending_processed_move; retry mail_mutate per uid.
     Appends ingest_promote_ok is wrong - append mail_move_ok or second pending if still failing.
+    Moves run concurrently (concurrency per account); ledger events keep ledger order.
     """
     from agentq_transport_client.ledger import append_event, pending_processed_moves
 
@@ -187,24 +447,39 @@ def mail_retry_pending_moves(
         uid = rec.get("uid")
         if uid is not None:
             by_uid[str(uid)] = rec
-    ctrl = _mail_controller(policy_path, accounts_path)
-    out: list[dict[str, Any]] = []
+    ctrl = mail_controller(policy_path, accounts_path)
+    jobs: list[tuple[Any, str, str]] = []
     for uid_str, rec in by_uid.items():
         uid = int(uid_str) if uid_str.isdigit() else uid_str
-        mailbox = rec.get("mailbox") or "INBOX"
-        target = rec.get("target_mailbox") or "LocalsetupAgentQ/Processed"
-        moved = ctrl.dispatch(
-            "mail_mutate",
-            {
-                "acct": account_id,
-                "mailbox": mailbox,
-                "mutate_action": "move_messages",
-                "uids": [uid],
-                "target_mailbox": target,
-                "count": 1,
-                "confirm_token": confirm_token,
-            },
+        jobs.append(
+            (
+                uid,
+                rec.get("mailbox") or "INBOX",
+                rec.get("target_mailbox") or "LocalsetupAgentQ/Processed",
+            )
         )
+    engine = mail_async_engine(ctrl, per_account=concurrency)
+    try:
+        results = engine.run_sweep(
+            (
+                "mail_mutate",
+                {
+                    "acct": account_id,
+                    "mailbox": mailbox,
+                    "mutate_action": "move_messages",
+                    "uids": [uid],
+                    "target_mailbox": target,
+                    "count": 1,
+                    "confirm_token": confirm_token,
+                },
+            )
+            for uid, mailbox, target in jobs
+        )
+    finally:
+        engine.close()
+        ctrl.close()
+    out: list[dict[str, Any]] = []
+    for (uid, mailbox, target), moved in zip(jobs, results):
         entry = {"uid": uid, "ok": moved.get("ok"), "code": moved.get("code")}
         if moved.get("ok"):
             append_event(
@@ -244,10 +519,12 @@ def mail_ship_agentq_outer(
     queue_root: Path | None = None,
     skip_pre_ship: bool = False,
     pre_ship_cwd: Path | None = None,
+    ctrl: Any = None,
 ) -> dict[str, Any]:
     """
     Build agentq_outer from manifest (same as file_drop seal inner), encrypt openpgp, send_encrypted.
     Caller must set env so account's openpgp_public_key is recipient pubkey.
+    ctrl: reuse a controller across a fan-out so every send rides one pooled SMTP session.
     """
     from agentq_transport_client.crypto_pipeline import CryptoPipelineError
     from agentq_transport_client.ledger import append_ship_event
@@ -280,18 +557,24 @@ def mail_ship_agentq_outer(
         "mode": "agentq_outer",
         "payload_b64": base64.b64encode(inner).decode("ascii"),
     }
-    ctrl = _mail_controller(policy_path, accounts_path)
-    result = ctrl.dispatch(
-        "mail_send_encrypted",
-        {
-            "acct": account_id,
-            "encryption_mode": "openpgp",
-            "envelope": envelope,
-            "from": from_addr,
-            "to": [to_addr],
-            "subject": subject,
-        },
-    )
+    owns_ctrl = ctrl is None
+    if ctrl is None:
+        ctrl = mail_controller(policy_path, accounts_path)
+    try:
+        result = ctrl.dispatch(
+            "mail_send_encrypted",
+            {
+                "acct": account_id,
+                "encryption_mode": "openpgp",
+                "envelope": envelope,
+                "from": from_addr,
+                "to": [to_addr],
+                "subject": subject,
+            },
+        )
+    finally:
+        if owns_ctrl:
+            ctrl.close()
     if queue_root:
         if result.get("ok"):
             append_ship_event(
@@ -324,10 +607,12 @@ def mail_ship_strict_gpg(
     queue_root: Path | None = None,
     skip_pre_ship: bool = False,
     pre_ship_cwd: Path | None = None,
+    ctrl: Any = None,
 ) -> dict[str, Any]:
     """
     Gpg sign-then-encrypt manifest JSON; send via preencrypted_openpgp_armored.
     Pull path: mail_get_decrypted + decrypt_openpgp must return dict (PGPy decrypt of gpg blob).
+    ctrl: as for mail_ship_agentq_outer.
     """
     from agentq_transport_client.crypto_pipeline import (
         CryptoPipelineError,
@@ -362,18 +647,24 @@ def mail_ship_strict_gpg(
         signer_uid=signer_uid or "",
         passphrase=signer_passphrase or "",
     )
-    ctrl = _mail_controller(policy_path, accounts_path)
-    result = ctrl.dispatch(
-        "mail_send_encrypted",
-        {
-            "acct": account_id,
-            "encryption_mode": "openpgp",
-            "preencrypted_openpgp_armored": armored,
-            "from": from_addr,
-            "to": [to_addr],
-            "subject": subject,
-        },
-    )
+    owns_ctrl = ctrl is None
+    if ctrl is None:
+        ctrl = mail_controller(policy_path, accounts_path)
+    try:
+        result = ctrl.dispatch(
+            "mail_send_encrypted",
+            {
+                "acct": account_id,
+                "encryption_mode": "openpgp",
+                "preencrypted_openpgp_armored": armored,
+                "from": from_addr,
+                "to": [to_addr],
+                "subject": subject,
+            },
+        )
+    finally:
+        if owns_ctrl:
+            ctrl.close()
     if queue_root:
         if result.get("ok"):
             append_ship_event(
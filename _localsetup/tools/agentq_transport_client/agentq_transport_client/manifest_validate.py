@@ -1,7 +1,7 @@
 #!/usr/bin/env python3
 # Purpose: Validate inner manifest bounds (manifest.schema.json rules without jsonschema dep).
 # Created: 2026-03-09
-# Last updated: 2026-03-09
+# Last updated: 2026-10-17
 
 from __future__ import annotations
 
@@ -28,9 +28,77 @@ def _schema_path() -> Path | None:
     return p if p.is_file() else None
 
 
-def validate_manifest(manifest: dict[str, Any]) -> None:
+# Process-level compiled validator: (schema path, mtime_ns, size) -> jsonschema validator.
+# None entry means jsonschema is not installed; the schema is re-read only when the file changes.
+_VALIDATOR_CACHE: tuple[tuple[str, int, int], Any] | None = None
+
+
+def compiled_schema_validator() -> Any | None:
+    """Validator for manifest.schema.json, built once per process (reloaded on mtime/size change)."""
+    global _VALIDATOR_CACHE
+    sp = _schema_path()
+    if sp is None:
+        return None
+    try:
+        st = sp.stat()
+    except OSError:
+        return None
+    stamp = (str(sp), st.st_mtime_ns, st.st_size)
+    if _VALIDATOR_CACHE is not None and _VALIDATOR_CACHE[0] == stamp:
+        return _VALIDATOR_CACHE[1]
+    try:
+        from jsonschema.validators import validator_for  # type: ignore
+    except ImportError:
+        _VALIDATOR_CACHE = (stamp, None)
+        return None
+    import json
+
+    try:
+        schema = json.loads(sp.read_text(encoding="utf-8"))
+        cls = validator_for(schema)
+        cls.check_schema(schema)
+    except Exception as exc:
+        raise CryptoPipelineError("MANIFEST_INVALID", f"jsonschema: bad schema {sp}: {exc}") from exc
+    validator = cls(schema)
+    _VALIDATOR_CACHE = (stamp, validator)
+    return validator
+
+
+def _validate_bundle(bundle: Any, att: Any) -> None:
+    """Streamed tar bundle part / index (see bundle.py)."""
+    from agentq_transport_client.bundle import BUNDLE_ID
+
+    if not isinstance(bundle, dict):
+        raise CryptoPipelineError("MANIFEST_INVALID", "bundle must be object.")
+    if not isinstance(bundle.get("id"), str) or not BUNDLE_ID.match(bundle["id"]):
+        raise CryptoPipelineError("MANIFEST_INVALID", "bundle.id must match [A-Za-z0-9_-]{1,64}.")
+    role = bundle.get("role")
+    if role == "part":
+        part = bundle.get("part")
+        if not isinstance(part, int) or part < 0:
+            raise CryptoPipelineError("MANIFEST_INVALID", "bundle.part must be integer >= 0.")
+        if not isinstance(att, list) or len(att) != 1 or not att[0].get("content_b64"):
+            raise CryptoPipelineError(
+                "MANIFEST_INVALID", "bundle part needs exactly one inline attachment."
+            )
+    elif role == "index":
+        parts = bundle.get("parts")
+        if not isinstance(parts, list) or not parts:
+            raise CryptoPipelineError("MANIFEST_INVALID", "bundle.parts must be non-empty array.")
+        for i, p in enumerate(parts):
+            if not isinstance(p, dict) or not _SHA256.match(str(p.get("sha256", "")).lower()):
+                raise CryptoPipelineError("MANIFEST_INVALID", f"bundle.parts[{i}].sha256 invalid.")
+        if not _SHA256.match(str(bundle.get("sha256", "")).lower()):
+            raise CryptoPipelineError("MANIFEST_INVALID", "bundle.sha256 must be 64 hex chars.")
+    else:
+        raise CryptoPipelineError("MANIFEST_INVALID", "bundle.role must be part or index.")
+
+
+def validate_manifest(manifest: dict[str, Any], *, trusted: bool = False) -> None:
     """
     Enforce manifest.schema.json bounds. Raises CryptoPipelineError MANIFEST_INVALID.
+    trusted: stop after the hand-written checks (signature-verified sender whose registry
+    entry sets schema_fast_path); everyone else also goes through jsonschema when installed.
     """
     if not isinstance(manifest, dict):
         raise CryptoPipelineError("MANIFEST_INVALID", "Manifest must be an object.")
@@ -73,20 +141,20 @@ def validate_manifest(manifest: dict[str, Any]) -> None:
                 if not isinstance(b, int) or b < 0 or b > 1073741824:
                     raise CryptoPipelineError("MANIFEST_INVALID", f"attachments[{i}].bytes out of range.")
 
+    bundle = manifest.get("bundle")
+    if bundle is not None:
+        _validate_bundle(bundle, att)
+
     it = manifest.get("iteration")
     if it is not None and (not isinstance(it, int) or it < 1):
         raise CryptoPipelineError("MANIFEST_INVALID", "iteration must be integer >= 1.")
 
-    sp = _schema_path()
-    if sp:
-        try:
-            import json
-
-            import jsonschema  # type: ignore
-
-            schema = json.loads(sp.read_text(encoding="utf-8"))
-            jsonschema.validate(instance=manifest, schema=schema)
-        except ImportError:
-            pass
-        except Exception as exc:
-            raise CryptoPipelineError("MANIFEST_INVALID", f"jsonschema: {exc}") from exc
+    if trusted:
+        return
+    validator = compiled_schema_validator()
+    if validator is not None:
+        from jsonschema.exceptions import best_match  # type: ignore
+
+        err = best_match(validator.iter_errors(manifest))
+        if err is not None:
+            raise CryptoPipelineError("MANIFEST_INVALID", f"jsonschema: {err}")
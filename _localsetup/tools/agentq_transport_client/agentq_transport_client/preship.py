@@ -1,50 +1,222 @@
 #!/usr/bin/env python3
 # Purpose: Run pre_ship_checks from manifest or CLI before ship (spec Part 12).
 # Created: 2026-03-09
-# Last updated: 2026-03-09
+# Last updated: 2026-10-17
+
+"""
+pre_ship_checks entries are shell commands (str) or {"cmd", "id"?, "after"?: [ids], "timeout"?}.
+A plain string runs after the entry before it, so legacy lists stay sequential and stop at the
+first failure. Object entries without "after" run concurrently; "after" waits for the named
+checks to pass. A passing
+check is cached under a key of (tracked-file content digest of cwd, command), so re-shipping the
+same tree (e.g. one PRD to several agents) does not re-run it. Failures are never cached.
+Outside a git work tree there is no digest and nothing is cached.
+"""
 
 from __future__ import annotations
 
+import hashlib
+import json
+import os
 import subprocess
 from pathlib import Path
 from typing import Any
 
+DEFAULT_TIMEOUT = 600
+
+
+def default_cache_dir() -> Path:
+    env = os.environ.get("AGENTQ_PRESHIP_CACHE")
+    if env:
+        return Path(env).expanduser()
+    base = os.environ.get("XDG_CACHE_HOME") or str(Path.home() / ".cache")
+    return Path(base) / "agentq" / "preship"
+
+
+def tree_digest(cwd: Path | None) -> str | None:
+    """
+    sha256 over the index (path, mode, blob id) plus the content of tracked files that differ
+    from it in the work tree. git's stat cache keeps this cheap; None when not a git work tree.
+    """
+    def _git(*args: str) -> bytes | None:
+        try:
+            r = subprocess.run(
+                ["git", *args], cwd=str(cwd) if cwd else None, capture_output=True, timeout=120
+            )
+        except (OSError, subprocess.TimeoutExpired):
+            return None
+        return r.stdout if r.returncode == 0 else None
+
+    top = _git("rev-parse", "--show-toplevel")
+    index = _git("ls-files", "-s", "-z")
+    dirty = _git("diff", "--name-only", "-z", "--no-renames")
+    if top is None or index is None or dirty is None:
+        return None
+    root = Path(top.decode("utf-8", errors="surrogateescape").strip())
+    h = hashlib.sha256()
+    h.update(str(Path(cwd or ".").resolve()).encode("utf-8", errors="surrogateescape") + b"\0")
+    h.update(index)
+    for rel in sorted(p for p in dirty.split(b"\0") if p):
+        h.update(b"\0dirty\0" + rel + b"\0")
+        try:
+            with open(root / os.fsdecode(rel), "rb") as f:
+                for chunk in iter(lambda: f.read(1 << 20), b""):
+                    h.update(chunk)
+        except OSError:
+            h.update(b"<missing>")
+    return h.hexdigest()
+
+
+def _normalize(checks: list[Any]) -> list[dict[str, Any]]:
+    """Entries -> [{id, cmd, after, timeout}]; raises ValueError on bad ids or cycles."""
+    nodes: list[dict[str, Any]] = []
+    for i, c in enumerate(checks):
+        if isinstance(c, str):
+            # Legacy string: implicit dependency on the previous entry (sequential semantics)
+            c = {"cmd": c, "after": [nodes[-1]["id"]] if nodes else []}
+        if not isinstance(c, dict) or not c.get("cmd") or not isinstance(c["cmd"], str):
+            continue
+        after = c.get("after") or []
+        if isinstance(after, str):
+            after = [after]
+        nodes.append(
+            {
+                "id": str(c.get("id") or f"#{i}"),
+                "cmd": c["cmd"],
+                "after": [str(a) for a in after],
+                "timeout": int(c.get("timeout") or DEFAULT_TIMEOUT),
+            }
+        )
+    ids = [n["id"] for n in nodes]
+    if len(set(ids)) != len(ids):
+        raise ValueError("pre_ship_checks ids must be unique")
+    for n in nodes:
+        for a in n["after"]:
+            if a not in ids:
+                raise ValueError(f"pre_ship_checks {n['id']!r} after unknown id {a!r}")
+    # cycle check (Kahn)
+    deps = {n["id"]: set(n["after"]) for n in nodes}
+    done: set[str] = set()
+    while True:
+        ready = [k for k, v in deps.items() if k not in done and v <= done]
+        if not ready:
+            break
+        done.update(ready)
+    if len(done) != len(nodes):
+        raise ValueError("pre_ship_checks after has a cycle")
+    return nodes
+
+
+def _cache_key(digest: str, cmd: str) -> str:
+    return hashlib.sha256(f"{digest}\0{cmd}".encode("utf-8", errors="surrogateescape")).hexdigest()
+
+
+def _cache_get(cache_dir: Path, key: str) -> dict[str, Any] | None:
+    try:
+        with open(cache_dir / f"{key}.json", encoding="utf-8") as f:
+            row = json.load(f)
+        return row if isinstance(row, dict) and row.get("returncode") == 0 else None
+    except (OSError, ValueError):
+        return None
+
+
+def _cache_put(cache_dir: Path, key: str, row: dict[str, Any]) -> None:
+    try:
+        cache_dir.mkdir(parents=True, exist_ok=True)
+        tmp = cache_dir / f"{key}.json.{os.getpid()}.tmp"
+        tmp.write_text(json.dumps(row), encoding="utf-8")
+        os.replace(tmp, cache_dir / f"{key}.json")
+    except OSError:
+        pass
+
+
+def _run_one(cmd: str, cwd: str | None, timeout: int) -> dict[str, Any]:
+    try:
+        r = subprocess.run(
+            cmd,
+            shell=True,
+            cwd=cwd,
+            capture_output=True,
+            text=True,
+            timeout=timeout,
+        )
+        rc, out, err = r.returncode, r.stdout or "", r.stderr or ""
+    except subprocess.TimeoutExpired as exc:
+        rc, out, err = -1, "", f"timeout after {timeout}s: {exc}"
+    return {
+        "cmd": cmd[:500],
+        "returncode": rc,
+        "stdout": out[:2000],
+        "stderr": err[:2000],
+    }
+
 
 def run_pre_ship_checks(
     manifest: dict[str, Any],
     *,
     cwd: Path | None = None,
+    workers: int = 4,
+    use_cache: bool | None = None,
+    cache_dir: Path | None = None,
 ) -> dict[str, Any]:
     """
-    If manifest has pre_ship_checks (list of shell commands), run each; all must exit 0.
-    Returns {ok: bool, results: [{cmd, returncode, stdout, stderr}]}.
+    If manifest has pre_ship_checks, run them (concurrently, honouring "after"); all must exit 0.
+    Returns {ok: bool, results: [{cmd, returncode, stdout, stderr, cached?}]} in manifest order;
+    on failure also failed_cmd, and checks waiting on a failed one are not started.
+    use_cache None: on unless AGENTQ_PRESHIP_NO_CACHE=1. Cache dir: AGENTQ_PRESHIP_CACHE or
+    $XDG_CACHE_HOME/agentq/preship.
     """
+    from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
     checks = manifest.get("pre_ship_checks")
     if not checks:
         return {"ok": True, "results": [], "skipped": True}
     if not isinstance(checks, list):
         return {"ok": False, "error": "pre_ship_checks must be a list"}
-    results = []
-    cwd = str(cwd) if cwd else None
-    for cmd in checks:
-        if not cmd or not isinstance(cmd, str):
-            continue
-        r = subprocess.run(
-            cmd,
-            shell=True,
-            cwd=cwd,
-            capture_output=True,
-            text=True,
-            timeout=600,
-        )
-        results.append(
-            {
-                "cmd": cmd[:500],
-                "returncode": r.returncode,
-                "stdout": (r.stdout or "")[:2000],
-                "stderr": (r.stderr or "")[:2000],
-            }
-        )
-        if r.returncode != 0:
-            return {"ok": False, "results": results, "failed_cmd": cmd[:500]}
-    return {"ok": True, "results": results}
+    try:
+        nodes = _normalize(checks)
+    except ValueError as exc:
+        return {"ok": False, "error": str(exc)}
+    if use_cache is None:
+        use_cache = os.environ.get("AGENTQ_PRESHIP_NO_CACHE", "").lower() not in ("1", "true", "yes")
+    run_cwd = str(cwd) if cwd else None
+    digest = tree_digest(cwd) if use_cache else None
+    cdir = Path(cache_dir) if cache_dir else default_cache_dir()
+
+    results: dict[str, dict[str, Any]] = {}
+    failed: list[str] = []
+    pending = {n["id"]: n for n in nodes}
+
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+        running: dict[Any, dict[str, Any]] = {}
+        while pending or running:
+            if not failed:
+                for nid, n in list(pending.items()):
+                    if not all(a in results and results[a]["returncode"] == 0 for a in n["after"]):
+                        continue
+                    del pending[nid]
+                    if digest:
+                        hit = _cache_get(cdir, _cache_key(digest, n["cmd"]))
+                        if hit is not None:
+                            results[nid] = dict(hit, cached=True)
+                            continue
+                    running[pool.submit(_run_one, n["cmd"], run_cwd, n["timeout"])] = n
+            if not running:
+                if failed or not pending:
+                    break
+                continue  # cache hits unblocked dependants; the graph is acyclic so this ends
+            done, _ = wait(list(running), return_when=FIRST_COMPLETED)
+            for fut in done:
+                n = running.pop(fut)
+                row = fut.result()
+                results[n["id"]] = row
+                if row["returncode"] == 0:
+                    if digest:
+                        _cache_put(cdir, _cache_key(digest, n["cmd"]), row)
+                else:
+                    failed.append(n["cmd"][:500])
+
+    ordered = [results[n["id"]] for n in nodes if n["id"] in results]
+    if failed:
+        return {"ok": False, "results": ordered, "failed_cmd": failed[0]}
+    return {"ok": True, "results": ordered}
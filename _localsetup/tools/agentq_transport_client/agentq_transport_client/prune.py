@@ -1,13 +1,14 @@
 #!/usr/bin/env python3
-# Purpose: Prune processed subdirs older than N days (spec M6).
+# Purpose: Prune processed subdirs and abandoned bundle parts older than N days (spec M6).
 # Created: 2026-03-09
-# Last updated: 2026-03-09
+# Last updated: 2026-10-17
 
 from __future__ import annotations
 
 import shutil
 import time
 from pathlib import Path
+from typing import Any
 
 
 def prune_processed(
@@ -42,3 +43,51 @@ def prune_processed(
                 shutil.rmtree(child, ignore_errors=True)
                 removed.append(str(child))
     return {"removed": removed, "skipped": skipped, "dry_run": dry_run}
+
+
+def prune_bundles(
+    queue_root: Path,
+    *,
+    older_than_days: float,
+    dry_run: bool = False,
+) -> dict[str, Any]:
+    """
+    Remove incomplete bundles under inbox/.bundles/ whose newest part arrived before cutoff.
+    Their held transport ids stay in the ledger: resend the bundle (new seal, new ids).
+    Returns {removed: [...], skipped: count, dry_run: bool}.
+    """
+    from agentq_transport_client.bundle import bundles_dir
+    from agentq_transport_client.ledger import _lock_exclusive
+
+    root = bundles_dir(queue_root)
+    if not root.is_dir():
+        return {"removed": [], "skipped": 0, "dry_run": dry_run}
+    cutoff = time.time() - (older_than_days * 86400)
+    removed: list[str] = []
+    skipped = 0
+
+    def _newest(d: Path) -> float:
+        # Held files date the last arrival; .lock (created by any visit, this one included)
+        # and the directory's own mtime do not.
+        held = [f.stat().st_mtime for f in d.rglob("*") if f.name != ".lock"]
+        return max(held) if held else d.stat().st_mtime
+
+    for child in root.iterdir():
+        if not child.is_dir():
+            skipped += 1
+            continue
+        try:
+            if _newest(child) >= cutoff:
+                continue
+            if dry_run:
+                removed.append(str(child))
+                continue
+            with open(child / ".lock", "a") as lock:
+                _lock_exclusive(lock)  # no part is being held or assembled meanwhile
+                if _newest(child) >= cutoff:
+                    continue
+                shutil.rmtree(child, ignore_errors=True)
+            removed.append(str(child))
+        except OSError:
+            skipped += 1
+    return {"removed": removed, "skipped": skipped, "dry_run": dry_run}
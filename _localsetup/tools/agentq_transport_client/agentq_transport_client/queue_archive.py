@@ -1,38 +1,67 @@
 #!/usr/bin/env python3
 # Purpose: Prune queue archive/ by age and total size (agent_queue.example.yaml).
 # Created: 2026-03-10
-# Last updated: 2026-03-10
+# Last updated: 2026-10-17
 
 from __future__ import annotations
 
+import json
 import os
 import shutil
 import time
 from pathlib import Path
 from typing import Any
 
+# Per-run size manifest; prune reads it instead of walking the run, writing it on first walk.
+SIZE_MANIFEST = ".agentq_archive_size.json"
 
-def _dir_age_days(path: Path) -> float:
-    try:
-        mtime = path.stat().st_mtime
-    except OSError:
-        return 0.0
+
+def _dir_age_days(mtime: float) -> float:
     return (time.time() - mtime) / 86400.0
 
 
-def _dir_size_bytes(path: Path) -> int:
+def _scan_size(path: Path) -> tuple[int, int]:
+    """(bytes, files) for a tree in one os.scandir pass; symlinks are not followed."""
     total = 0
-    try:
-        for root, _dirs, files in os.walk(path):
-            for f in files:
-                fp = Path(root) / f
+    files = 0
+    stack = [str(path)]
+    while stack:
+        try:
+            it = os.scandir(stack.pop())
+        except OSError:
+            continue
+        with it:
+            for e in it:
                 try:
-                    total += fp.stat().st_size
+                    if e.is_dir(follow_symlinks=False):
+                        stack.append(e.path)
+                    elif e.name != SIZE_MANIFEST:
+                        total += e.stat(follow_symlinks=False).st_size
+                        files += 1
                 except OSError:
                     pass
-    except OSError:
-        pass
-    return total
+    return total, files
+
+
+def read_size_manifest(run_dir: Path) -> int | None:
+    try:
+        with open(Path(run_dir) / SIZE_MANIFEST, encoding="utf-8") as f:
+            return int(json.load(f)["bytes"])
+    except (OSError, ValueError, KeyError, TypeError):
+        return None
+
+
+def write_size_manifest(run_dir: Path, size: tuple[int, int] | None = None) -> int:
+    """Record (bytes, files) for run_dir; keeps the dir mtime so age pruning is unaffected."""
+    run_dir = Path(run_dir)
+    nbytes, files = size if size is not None else _scan_size(run_dir)
+    st = run_dir.stat()
+    tmp = run_dir / (SIZE_MANIFEST + ".tmp")
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump({"bytes": nbytes, "files": files}, f)
+    os.replace(tmp, run_dir / SIZE_MANIFEST)
+    os.utime(run_dir, ns=(st.st_atime_ns, st.st_mtime_ns))
+    return nbytes
 
 
 def prune_archive(
@@ -45,6 +74,8 @@ def prune_archive(
     """
     archive_root: typically queue_root/archive. Deletes subdirs oldest first
     until under max_total_gb; also removes dirs older than older_than_days.
+    Sizes come from each run's size manifest; runs without one are walked once
+    (and, unless dry_run, get a manifest for next time).
     """
     archive_root = Path(archive_root)
     if not archive_root.is_dir():
@@ -52,54 +83,65 @@ def prune_archive(
 
     # Collect immediate subdirs with mtime
     dirs: list[tuple[float, Path]] = []
-    for p in archive_root.iterdir():
-        if p.is_dir():
+    with os.scandir(archive_root) as it:
+        for e in it:
             try:
-                dirs.append((p.stat().st_mtime, p))
+                if e.is_dir(follow_symlinks=False):
+                    dirs.append((e.stat(follow_symlinks=False).st_mtime, Path(e.path)))
             except OSError:
                 continue
     dirs.sort(key=lambda x: x[0])
 
+    sizes: dict[Path, int] = {}
+
+    def _size(p: Path) -> int:
+        if p not in sizes:
+            sz = read_size_manifest(p)
+            if sz is None:
+                scanned = _scan_size(p)
+                sz = scanned[0]
+                if not dry_run:
+                    try:
+                        write_size_manifest(p, scanned)
+                    except OSError:
+                        pass
+            sizes[p] = sz
+        return sizes[p]
+
     deleted: list[str] = []
     bytes_freed = 0
 
+    def _delete(p: Path) -> bool:
+        nonlocal bytes_freed
+        sz = _size(p)
+        if not dry_run:
+            try:
+                shutil.rmtree(p, ignore_errors=True)
+            except OSError:
+                return False
+        deleted.append(str(p))
+        bytes_freed += sz
+        return True
+
     # Age prune first
     if older_than_days is not None and older_than_days > 0:
-        for _mt, p in list(dirs):
-            if _dir_age_days(p) >= older_than_days:
-                sz = _dir_size_bytes(p)
-                if dry_run:
-                    deleted.append(str(p))
-                    bytes_freed += sz
-                else:
-                    try:
-                        shutil.rmtree(p, ignore_errors=True)
-                        deleted.append(str(p))
-                        bytes_freed += sz
-                    except OSError:
-                        pass
-                dirs = [d for d in dirs if d[1] != p]
+        keep: list[tuple[float, Path]] = []
+        for mt, p in dirs:
+            if _dir_age_days(mt) >= older_than_days:
+                _delete(p)
+            else:
+                keep.append((mt, p))
+        dirs = keep
 
     # Size prune: total remaining
     if max_total_gb is not None and max_total_gb > 0:
         max_bytes = int(max_total_gb * 1024**3)
-        total = sum(_dir_size_bytes(d[1]) for d in dirs)
+        total = sum(_size(d[1]) for d in dirs)
         for _mt, p in dirs:
             if total <= max_bytes:
                 break
-            sz = _dir_size_bytes(p)
-            if dry_run:
-                deleted.append(str(p))
-                bytes_freed += sz
-                total -= sz
-            else:
-                try:
-                    shutil.rmtree(p, ignore_errors=True)
-                    deleted.append(str(p))
-                    bytes_freed += sz
-                    total -= sz
-                except OSError:
-                    pass
+            if _delete(p):
+                total -= sizes[p]
 
     return {
         "status": "ok",
@@ -1,7 +1,7 @@
 #!/usr/bin/env python3
 # Purpose: Load and validate agent_trust_registry YAML fail-closed.
 # Created: 2026-03-09
-# Last updated: 2026-03-09
+# Last updated: 2026-10-17
 
 """Registry: map OpenPGP fingerprint -> agent_id; list allowed roots per agent."""
 
@@ -98,6 +98,44 @@ def validate_registry(raw: dict[str, Any], *, require_keys_exist: bool = True) -
     return {"raw": raw, "fp_to_agent": fp_to_agent}
 
 
+# Process-level cache: resolved registry path -> (stamp, validated). The stamp covers the YAML
+# and every key file it references, so edits or key rotation invalidate the entry.
+_VALIDATED_CACHE: dict[tuple[str, bool], tuple[tuple[Any, ...], dict[str, Any]]] = {}
+
+
+def _file_stamp(path: Path) -> tuple[str, int, int] | tuple[str, None, None]:
+    try:
+        st = path.stat()
+        return (str(path), st.st_mtime_ns, st.st_size)
+    except OSError:
+        return (str(path), None, None)
+
+
+def _registry_stamp(path: Path, validated: dict[str, Any]) -> tuple[Any, ...]:
+    stamps: list[Any] = [_file_stamp(path)]
+    for cfg in (validated["raw"].get("agents") or {}).values():
+        if isinstance(cfg, dict):
+            stamps.extend(_file_stamp(kp) for kp in _collect_public_key_paths(cfg))
+    return tuple(stamps)
+
+
+def load_validated_registry(path: Path, *, require_keys_exist: bool = True) -> dict[str, Any]:
+    """
+    load_registry_yaml + validate_registry, cached per process by path and file mtimes.
+    A poll over many blobs parses the YAML and key files once. Do not mutate the result.
+    """
+    path = Path(path).expanduser().resolve()
+    key = (str(path), require_keys_exist)
+    hit = _VALIDATED_CACHE.get(key)
+    if hit is not None and hit[0] == _registry_stamp(path, hit[1]):
+        return hit[1]
+    yaml_stamp = _file_stamp(path)  # before reading, so a concurrent edit is never masked
+    validated = validate_registry(load_registry_yaml(path), require_keys_exist=require_keys_exist)
+    stamp = (yaml_stamp,) + _registry_stamp(path, validated)[1:]
+    _VALIDATED_CACHE[key] = (stamp, validated)
+    return validated
+
+
 def agent_id_for_fingerprint(validated: dict[str, Any], fingerprint: str) -> str | None:
     return validated["fp_to_agent"].get(_normalize_fp(fingerprint))
 
@@ -113,6 +151,12 @@ def assert_sender_allowed(validated: dict[str, Any], from_agent_id: str) -> None
         )
 
 
+def schema_fast_path_allowed(validated: dict[str, Any], agent_id: str) -> bool:
+    """agents.<id>.schema_fast_path: true lets signature-verified manifests skip jsonschema."""
+    cfg = (validated["raw"].get("agents") or {}).get(agent_id)
+    return isinstance(cfg, dict) and cfg.get("schema_fast_path") is True
+
+
 def load_pubkey_armored_for_agent(validated: dict[str, Any], agent_id: str) -> str:
     """Read first available public key armored text for agent_id."""
     agents = validated["raw"].get("agents") or {}
@@ -126,6 +170,18 @@ def load_pubkey_armored_for_agent(validated: dict[str, Any], agent_id: str) -> s
     raise RegistryError(f"No public key file for agent_id: {agent_id}")
 
 
+def registry_pubkeys_armored(validated: dict[str, Any]) -> list[str]:
+    """Armored text of every public key file in the registry (missing files skipped)."""
+    out: list[str] = []
+    for cfg in (validated["raw"].get("agents") or {}).values():
+        if not isinstance(cfg, dict):
+            continue
+        for kp in _collect_public_key_paths(cfg):
+            if kp.is_file():
+                out.append(kp.read_text(encoding="utf-8", errors="replace"))
+    return out
+
+
 def file_drop_inbound_roots(validated: dict[str, Any], agent_id: str) -> list[Path]:
     raw = validated["raw"]["agents"].get(agent_id) or {}
     fd = raw.get("file_drop") or {}
@@ -1,7 +1,7 @@
 #!/usr/bin/env python3
 # Purpose: Ship agentq_outer to file_drop (armored + ready) or via mail_send_encrypted.
 # Created: 2026-03-09
-# Last updated: 2026-03-09
+# Last updated: 2026-10-17
 
 from __future__ import annotations
 
@@ -12,25 +12,16 @@ from pathlib import Path
 from typing import Any
 
 
-def ship_file_drop(
+def _ship_gate(
     manifest: dict[str, Any],
-    recipient_pubkey_path: Path,
-    out_dir: Path,
-    stem: str = "payload",
+    stem: str,
     *,
-    queue_root: Path | None = None,
-    skip_pre_ship: bool = False,
-    pre_ship_cwd: Path | None = None,
-    signer_gnupghome: Path | None = None,
-    signer_uid: str = "",
-    signer_passphrase: str = "",
-    write_ready_sha256: bool = False,
-) -> dict[str, Any]:
-    """
-    Seal manifest to recipient pubkey; write <stem>.agentq.asc then <stem>.agentq.ready last.
-    Optional pre_ship_checks from manifest; optional ship_log under queue_root/out.
-    """
-    from agentq_transport_client.crypto_pipeline import CryptoPipelineError, seal_inner_json
+    queue_root: Path | None,
+    skip_pre_ship: bool,
+    pre_ship_cwd: Path | None,
+) -> dict[str, Any] | None:
+    """Manifest validation + pre_ship_checks; error result, or None when clear to seal."""
+    from agentq_transport_client.crypto_pipeline import CryptoPipelineError
     from agentq_transport_client.ledger import append_ship_event
     from agentq_transport_client.manifest_validate import validate_manifest
     from agentq_transport_client.preship import run_pre_ship_checks
@@ -58,21 +49,47 @@ def ship_file_drop(
                     {"code": "PRE_SHIP_FAILED", "stem": stem, "detail": preship},
                 )
             return {"status": "error", "code": "PRE_SHIP_FAILED", "detail": preship}
+    return None
 
-    pubkey = Path(recipient_pubkey_path).read_text(encoding="utf-8", errors="replace")
+
+def _seal_manifest(
+    manifest: dict[str, Any],
+    pubkeys: str | list[str],
+    *,
+    signer_gnupghome: Path | None,
+    signer_uid: str,
+    signer_passphrase: str,
+) -> str:
+    """PGPy agentq_outer, or gpg sign-then-encrypt with a signer ring; list = all recipients."""
     if signer_gnupghome:
         from agentq_transport_client.crypto_pipeline import seal_bytes_strict_gpg
 
         inner = json.dumps(manifest, sort_keys=True, separators=(",", ":")).encode("utf-8")
-        armored = seal_bytes_strict_gpg(
+        return seal_bytes_strict_gpg(
             inner,
-            pubkey,
+            pubkeys,
             Path(signer_gnupghome),
             signer_uid=signer_uid or "",
             passphrase=signer_passphrase or "",
         )
-    else:
-        armored = seal_inner_json(manifest, pubkey)
+    from agentq_transport_client.crypto_pipeline import seal_inner_json, seal_inner_json_multi
+
+    if isinstance(pubkeys, str):
+        return seal_inner_json(manifest, pubkeys)
+    return seal_inner_json_multi(manifest, pubkeys)
+
+
+def _write_drop(
+    armored: str,
+    manifest: dict[str, Any],
+    out_dir: Path,
+    stem: str,
+    *,
+    queue_root: Path | None,
+    write_ready_sha256: bool,
+) -> dict[str, Any]:
+    """Write <stem>.agentq.asc atomically, then the .ready marker, sidecar and ship_log."""
+    from agentq_transport_client.ledger import append_ship_event
 
     out_dir = Path(out_dir)
     out_dir.mkdir(parents=True, exist_ok=True)
@@ -138,50 +155,138 @@ def ship_file_drop(
     return {"status": "ok", "sealed": str(sealed_path), "ready": str(ready_path)}
 
 
+def ship_file_drop(
+    manifest: dict[str, Any],
+    recipient_pubkey_path: Path,
+    out_dir: Path,
+    stem: str = "payload",
+    *,
+    queue_root: Path | None = None,
+    skip_pre_ship: bool = False,
+    pre_ship_cwd: Path | None = None,
+    signer_gnupghome: Path | None = None,
+    signer_uid: str = "",
+    signer_passphrase: str = "",
+    write_ready_sha256: bool = False,
+) -> dict[str, Any]:
+    """
+    Seal manifest to recipient pubkey; write <stem>.agentq.asc then <stem>.agentq.ready last.
+    Optional pre_ship_checks from manifest; optional ship_log under queue_root/out.
+    """
+    err = _ship_gate(
+        manifest,
+        stem,
+        queue_root=queue_root,
+        skip_pre_ship=skip_pre_ship,
+        pre_ship_cwd=pre_ship_cwd,
+    )
+    if err is not None:
+        return err
+    pubkey = Path(recipient_pubkey_path).read_text(encoding="utf-8", errors="replace")
+    armored = _seal_manifest(
+        manifest,
+        pubkey,
+        signer_gnupghome=signer_gnupghome,
+        signer_uid=signer_uid,
+        signer_passphrase=signer_passphrase,
+    )
+    return _write_drop(
+        armored,
+        manifest,
+        out_dir,
+        stem,
+        queue_root=queue_root,
+        write_ready_sha256=write_ready_sha256,
+    )
+
+
 def ship_file_drop_multi(
     manifest: dict[str, Any],
     registry_path: Path,
     out_dir: Path,
     stem: str = "payload",
-    **kwargs: Any,
+    *,
+    queue_root: Path | None = None,
+    skip_pre_ship: bool = False,
+    pre_ship_cwd: Path | None = None,
+    signer_gnupghome: Path | None = None,
+    signer_uid: str = "",
+    signer_passphrase: str = "",
+    write_ready_sha256: bool = False,
+    encrypt_once: bool = True,
+    workers: int = 8,
 ) -> list[dict[str, Any]]:
     """
-    Multi-recipient phase 2: manifest.to_agent_ids; one sealed blob per recipient using registry pubkeys.
+    Multi-recipient phase 2: manifest.to_agent_ids; one <stem>-<agent_id> drop per recipient.
+    Validation and pre-ship checks run once. encrypt_once (default): the manifest is encrypted
+    a single time into one OpenPGP message with a PKESK per recipient (every drop carries the
+    same blob, so recipients can see each other's key ids); False seals per recipient.
+    Drops are written by a thread pool of `workers`.
     """
-    from agentq_transport_client.registry import load_registry_yaml, validate_registry
+    from concurrent.futures import ThreadPoolExecutor
+
+    from agentq_transport_client.registry import _collect_public_key_paths, load_validated_registry
 
     ids = manifest.get("to_agent_ids")
     if not isinstance(ids, list) or not ids:
         raise ValueError("ship_file_drop_multi requires manifest.to_agent_ids non-empty")
-    raw = load_registry_yaml(Path(registry_path))
-    validated = validate_registry(raw, require_keys_exist=True)
+    validated = load_validated_registry(Path(registry_path), require_keys_exist=True)
     agents = validated["raw"].get("agents") or {}
-    results = []
+    results: list[dict[str, Any] | None] = [None] * len(ids)
+    targets: list[tuple[int, str, str]] = []
     for i, agent_id in enumerate(ids):
         cfg = agents.get(agent_id)
         if not isinstance(cfg, dict):
-            results.append(
-                {"status": "error", "code": "UNKNOWN_AGENT", "agent_id": agent_id}
-            )
+            results[i] = {"status": "error", "code": "UNKNOWN_AGENT", "agent_id": agent_id}
             continue
-        from agentq_transport_client.registry import _collect_public_key_paths as _paths
-
-        paths = _paths(cfg)
+        paths = _collect_public_key_paths(cfg)
         if not paths or not paths[0].is_file():
-            results.append(
-                {"status": "error", "code": "NO_PUBKEY", "agent_id": agent_id}
-            )
+            results[i] = {"status": "error", "code": "NO_PUBKEY", "agent_id": agent_id}
             continue
-        r = ship_file_drop(
+        targets.append((i, agent_id, paths[0].read_text(encoding="utf-8", errors="replace")))
+
+    if targets:
+        err = _ship_gate(
+            manifest,
+            stem,
+            queue_root=queue_root,
+            skip_pre_ship=skip_pre_ship,
+            pre_ship_cwd=pre_ship_cwd,
+        )
+        if err is not None:
+            for i, agent_id, _pub in targets:
+                results[i] = {**err, "agent_id": agent_id}
+            targets = []
+
+    seal_kw: dict[str, Any] = {
+        "signer_gnupghome": signer_gnupghome,
+        "signer_uid": signer_uid,
+        "signer_passphrase": signer_passphrase,
+    }
+    if targets and encrypt_once:
+        shared = _seal_manifest(manifest, [pub for _i, _a, pub in targets], **seal_kw)
+        sealed = {i: shared for i, _a, _pub in targets}
+    else:
+        sealed = {i: _seal_manifest(manifest, pub, **seal_kw) for i, _a, pub in targets}
+
+    def _write(target: tuple[int, str, str]) -> None:
+        i, agent_id, _pub = target
+        r = _write_drop(
+            sealed[i],
             manifest,
-            paths[0],
             out_dir,
-            stem=f"{stem}-{agent_id}",
-            **kwargs,
+            f"{stem}-{agent_id}",
+            queue_root=queue_root,
+            write_ready_sha256=write_ready_sha256,
         )
         r["agent_id"] = agent_id
-        results.append(r)
-    return results
+        results[i] = r
+
+    if targets:
+        Path(out_dir).mkdir(parents=True, exist_ok=True)
+        with ThreadPoolExecutor(max_workers=max(1, min(workers, len(targets)))) as pool:
+            list(pool.map(_write, targets))
+    return [r for r in results if r is not None]
 
 
 def load_manifest_from_path(path: Path) -> dict[str, Any]:
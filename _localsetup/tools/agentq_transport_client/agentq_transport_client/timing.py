@@ -0,0 +1,39 @@
+#!/usr/bin/env python3
+# Purpose: Process-local per-stage timing hooks for ingest/ledger (sampled by `agentq_cli bench`).
+# Created: 2026-10-17
+# Last updated: 2026-10-17
+
+"""
+Ingest/ledger code wraps work in stage("name"), which is a no-op unless a sink is installed
+(bench.run_bench does). With --workers > 1 the decrypt/validate/promote stages run in pool
+processes and are not sampled; throughput and claim still are.
+"""
+
+from __future__ import annotations
+
+import time
+from contextlib import contextmanager
+from typing import Callable, Iterator
+
+STAGES = ("claim", "verify_ready", "decrypt", "validate", "promote", "ledger")
+
+_SINK: Callable[[str, float], None] | None = None
+
+
+@contextmanager
+def stage(name: str) -> Iterator[None]:
+    """Time the block into the installed sink (seconds); free when no sink is set."""
+    sink = _SINK
+    if sink is None:
+        yield
+        return
+    t0 = time.perf_counter()
+    try:
+        yield
+    finally:
+        sink(name, time.perf_counter() - t0)
+
+
+def set_stage_sink(sink: Callable[[str, float], None] | None) -> None:
+    global _SINK
+    _SINK = sink
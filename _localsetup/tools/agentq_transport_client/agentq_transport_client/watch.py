@@ -0,0 +1,203 @@
+#!/usr/bin/env python3
+# Purpose: Long-running file_drop watcher: inotify on .ready markers, polling fallback.
+# Created: 2026-10-17
+# Last updated: 2026-10-17
+
+"""
+Linux inotify via ctypes (no extra deps). A ready marker closed-after-write or renamed into a
+root hands its sealed pair to run_file_drop_poll immediately. Periodic full rescans catch
+anything missed (startup backlog, IN_Q_OVERFLOW, roots created later). Where inotify is
+unavailable the watcher degrades to a plain poll loop.
+"""
+
+from __future__ import annotations
+
+import os
+import select
+import struct
+import time
+from pathlib import Path
+from typing import Any, Callable, Iterator
+
+from agentq_transport_client.file_drop import default_ignore_globs, ignored_path, sealed_for_ready
+
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_TO = 0x00000080
+IN_Q_OVERFLOW = 0x00004000
+IN_CLOEXEC = 0o2000000
+IN_NONBLOCK = 0o4000
+
+_EVENT = struct.Struct("iIII")
+
+
+class Inotify:
+    """Minimal inotify wrapper: watch dirs, read (wd_path, name, mask) tuples."""
+
+    def __init__(self) -> None:
+        import ctypes
+        import ctypes.util
+
+        libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+        self._add_watch = libc.inotify_add_watch
+        self._add_watch.argtypes = [ctypes.c_int, ctypes.c_char_p, ctypes.c_uint32]
+        fd = libc.inotify_init1(IN_CLOEXEC | IN_NONBLOCK)
+        if fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        self.fd = fd
+        self._wd_paths: dict[int, Path] = {}
+
+    def add_watch(self, path: Path, mask: int = IN_CLOSE_WRITE | IN_MOVED_TO) -> int:
+        import ctypes
+
+        wd = self._add_watch(self.fd, os.fsencode(str(path)), mask)
+        if wd < 0:
+            raise OSError(ctypes.get_errno(), f"inotify_add_watch failed: {path}")
+        self._wd_paths[wd] = Path(path)
+        return wd
+
+    def watched(self) -> set[Path]:
+        return set(self._wd_paths.values())
+
+    def read_events(self, timeout: float) -> Iterator[tuple[Path | None, str, int]]:
+        """Block up to timeout seconds; yield (dir, name, mask). dir None on queue overflow."""
+        ready, _, _ = select.select([self.fd], [], [], timeout)
+        if not ready:
+            return
+        try:
+            buf = os.read(self.fd, 64 * 1024)
+        except BlockingIOError:
+            return
+        i = 0
+        while i + _EVENT.size <= len(buf):
+            wd, mask, _cookie, length = _EVENT.unpack_from(buf, i)
+            i += _EVENT.size
+            name = buf[i : i + length].rstrip(b"\0").decode("utf-8", errors="replace")
+            i += length
+            if mask & IN_Q_OVERFLOW:
+                yield None, "", mask
+                continue
+            yield self._wd_paths.get(wd), name, mask
+
+    def close(self) -> None:
+        try:
+            os.close(self.fd)
+        except OSError:
+            pass
+
+
+def inotify_available() -> bool:
+    try:
+        Inotify().close()
+        return True
+    except (OSError, AttributeError):
+        return False
+
+
+def run_file_drop_watch(
+    roots: list[Path],
+    *,
+    queue_root: Path,
+    recipient_private_armored: str,
+    passphrase: str,
+    sealed_extension: str = ".agentq.asc",
+    registry_path: Path | None = None,
+    strict_gpg: bool = False,
+    use_lockfile: bool = False,
+    workers: int = 1,
+    ledger_fsync: str = "batch",
+    rescan_interval: float = 60.0,
+    use_inotify: bool = True,
+    on_result: Callable[[dict[str, Any]], None] | None = None,
+    stop: Any = None,
+) -> int:
+    """
+    Watch roots until stop.is_set() (threading.Event-like) or KeyboardInterrupt.
+    Ready-marker events ingest their pair right away; every rescan_interval (and on start)
+    a full run_file_drop_poll drains anything else. Returns number of blobs handled.
+    """
+    from agentq_transport_client.ingest import run_file_drop_poll
+
+    roots = [Path(r) for r in roots]
+    ready_suffix = sealed_extension.rsplit(".", 1)[0] + ".ready"
+    globs = default_ignore_globs()
+    poll_kw: dict[str, Any] = {
+        "queue_root": queue_root,
+        "recipient_private_armored": recipient_private_armored,
+        "passphrase": passphrase,
+        "sealed_extension": sealed_extension,
+        "registry_path": registry_path,
+        "strict_gpg": strict_gpg,
+        "use_lockfile": use_lockfile,
+        "workers": workers,
+        "ledger_fsync": ledger_fsync,
+    }
+    handled = 0
+
+    def _emit(results: list[dict[str, Any]]) -> None:
+        nonlocal handled
+        handled += len(results)
+        if on_result:
+            for r in results:
+                on_result(r)
+
+    ino: Inotify | None = None
+    if use_inotify:
+        try:
+            ino = Inotify()
+        except (OSError, AttributeError):
+            ino = None
+
+    def _watch_roots() -> None:
+        if ino is None:
+            return
+        have = ino.watched()
+        for root in roots:
+            if root not in have and root.is_dir():
+                try:
+                    ino.add_watch(root)
+                except OSError:
+                    pass
+
+    last_scan = float("-inf")
+    try:
+        while not (stop is not None and stop.is_set()):
+            now = time.monotonic()
+            if now - last_scan >= rescan_interval:
+                _watch_roots()
+                _emit(run_file_drop_poll(roots, max_per_poll=1 << 30, **poll_kw))
+                last_scan = time.monotonic()
+            wait = max(0.0, min(1.0, rescan_interval - (time.monotonic() - last_scan)))
+            if ino is None:
+                time.sleep(wait)
+                continue
+            pairs: dict[Path, Path] = {}
+            overflow = False
+            for parent, name, _mask in ino.read_events(wait):
+                if parent is None:
+                    overflow = True
+                    continue
+                if not name.endswith(ready_suffix):
+                    continue
+                ready = parent / name
+                sealed = sealed_for_ready(ready, sealed_extension)
+                if ignored_path(sealed, globs) or not sealed.is_file():
+                    continue
+                pairs[sealed] = ready
+            if overflow:
+                last_scan = float("-inf")
+                continue
+            if pairs:
+                _emit(
+                    run_file_drop_poll(
+                        roots,
+                        max_per_poll=len(pairs),
+                        candidates=sorted(pairs.items()),
+                        **poll_kw,
+                    )
+                )
+    except KeyboardInterrupt:
+        pass
+    finally:
+        if ino is not None:
+            ino.close()
+    return handled
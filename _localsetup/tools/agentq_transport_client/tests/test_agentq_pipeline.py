@@ -6,6 +6,7 @@ from __future__ import annotations
 
 import os
 import sys
+import time
 from pathlib import Path
 
 import pytest
@@ -42,6 +43,24 @@ def test_seal_unseal_roundtrip(keypair):
     assert "# Test PRD" in out.get("prd_body", "")
 
 
+def test_unseal_file_streams_and_caps(keypair, tmp_path, monkeypatch):
+    from agentq_transport_client import crypto_pipeline as cp
+
+    pub, priv = keypair
+    body = "x" * 200_000
+    sealed = tmp_path / "big.agentq.asc"
+    sealed.write_text(
+        cp.seal_inner_json({"manifest_version": "1", "from_agent_id": "a", "prd_body": body}, pub),
+        encoding="utf-8",
+    )
+    monkeypatch.setattr(cp, "_B64_CHUNK", 4 * 1024)  # force many de-armor / payload chunks
+    out = cp.unseal_file_to_manifest(sealed, priv)
+    assert out["prd_body"] == body
+    with pytest.raises(cp.CryptoPipelineError) as ex:
+        cp.unseal_file_to_manifest(sealed, priv, max_bytes=1024)
+    assert ex.value.code == "BLOB_TOO_LARGE"
+
+
 def test_ingest_promotes_to_in(keypair, tmp_path):
     from agentq_transport_client.crypto_pipeline import seal_inner_json
     from agentq_transport_client.ingest import ingest_file_drop_blob
@@ -72,6 +91,243 @@ def test_ingest_promotes_to_in(keypair, tmp_path):
     assert not blob.exists()  # moved to processed
 
 
+@pytest.mark.parametrize("workers", [1, 3])
+def test_file_drop_poll_drains_drop(keypair, tmp_path, workers):
+    from agentq_transport_client.ingest import run_file_drop_poll
+    from agentq_transport_client.ledger import iter_ingest_events
+    from agentq_transport_client.ship import ship_file_drop
+
+    pub, priv = keypair
+    pub_path = tmp_path / "r.pub.asc"
+    pub_path.write_text(pub, encoding="utf-8")
+    drop = tmp_path / "drop"
+    for i in range(4):
+        manifest = {"manifest_version": "1", "from_agent_id": "agent-test", "prd_body": f"# {i}\n"}
+        assert ship_file_drop(manifest, pub_path, drop, stem=f"p{i}")["status"] == "ok"
+    queue = tmp_path / "queue"
+    results = run_file_drop_poll(
+        [drop], queue_root=queue, recipient_private_armored=priv, passphrase="", workers=workers
+    )
+    assert [r["status"] for r in results] == ["ok"] * 4
+    assert len(list((queue / "in").iterdir())) == 4
+    assert len(list(iter_ingest_events(queue, "ingest_promote_ok"))) == 4
+    assert not list(drop.glob("*.agentq.asc"))
+    assert run_file_drop_poll(
+        [drop], queue_root=queue, recipient_private_armored=priv, passphrase="", workers=workers
+    ) == []
+
+
+def test_file_drop_poll_same_blob_in_two_roots_promotes_once(keypair, tmp_path):
+    import shutil
+
+    from agentq_transport_client.ingest import run_file_drop_poll
+    from agentq_transport_client.ledger import iter_ingest_events
+    from agentq_transport_client.ship import ship_file_drop
+
+    pub, priv = keypair
+    pub_path = tmp_path / "r.pub.asc"
+    pub_path.write_text(pub, encoding="utf-8")
+    first, second = tmp_path / "drop1", tmp_path / "drop2"
+    manifest = {"manifest_version": "1", "from_agent_id": "agent-test", "prd_body": "# dup\n"}
+    assert ship_file_drop(manifest, pub_path, first, stem="dup")["status"] == "ok"
+    shutil.copytree(first, second)
+    queue = tmp_path / "queue"
+    results = run_file_drop_poll(
+        [first, second], queue_root=queue, recipient_private_armored=priv, passphrase="", workers=3
+    )
+    assert sorted(r["status"] for r in results) == ["ok", "skipped"]
+    # The duplicate never reached the pool (where it could race the first to in/<tid>)
+    assert [r["reason"] for r in results if r["status"] == "skipped"] == ["already_ingested"]
+    (promoted,) = (queue / "in").iterdir()
+    assert all(not p.is_dir() for p in promoted.iterdir())  # no staging dir nested inside
+    assert len(list(iter_ingest_events(queue, "ingest_promote_ok"))) == 1
+
+
+@pytest.mark.parametrize("use_inotify", [True, False])
+def test_watch_ingests_on_ready(keypair, tmp_path, use_inotify):
+    import threading
+    import time
+
+    from agentq_transport_client.ship import ship_file_drop
+    from agentq_transport_client.watch import inotify_available, run_file_drop_watch
+
+    if use_inotify and not inotify_available():
+        pytest.skip("inotify not available")
+    pub, priv = keypair
+    pub_path = tmp_path / "r.pub.asc"
+    pub_path.write_text(pub, encoding="utf-8")
+    drop = tmp_path / "drop"
+    drop.mkdir()
+    queue = tmp_path / "queue"
+    results: list = []
+    stop = threading.Event()
+    t = threading.Thread(
+        target=run_file_drop_watch,
+        args=([drop],),
+        kwargs={
+            "queue_root": queue,
+            "recipient_private_armored": priv,
+            "passphrase": "",
+            "rescan_interval": 3600 if use_inotify else 0.2,
+            "use_inotify": use_inotify,
+            "on_result": results.append,
+            "stop": stop,
+        },
+        daemon=True,
+    )
+    t.start()
+    try:
+        time.sleep(0.3)
+        manifest = {"manifest_version": "1", "from_agent_id": "agent-test", "prd_body": "# w\n"}
+        assert ship_file_drop(manifest, pub_path, drop, stem="w1")["status"] == "ok"
+        deadline = time.monotonic() + 10
+        while not results and time.monotonic() < deadline:
+            time.sleep(0.05)
+    finally:
+        stop.set()
+        t.join(timeout=5)
+    assert [r["status"] for r in results] == ["ok"]
+
+
+def test_bench_reports_throughput_and_stages(keypair, tmp_path):
+    from agentq_transport_client.bench import run_bench
+
+    r = run_bench(
+        count=3,
+        body_bytes=256,
+        attachments=1,
+        attachment_bytes=512,
+        work_dir=tmp_path,
+        keypair=keypair,
+    )
+    assert r["status"] == "ok" and r["ok"] == 3
+    assert r["blobs_per_s"] > 0
+    for name in ("claim", "verify_ready", "decrypt", "validate", "promote", "ledger"):
+        assert r["stages"][name]["p50_ms"] <= r["stages"][name]["p99_ms"]
+    assert r["stages"]["decrypt"]["n"] == 3
+
+
+@pytest.mark.parametrize("encrypt_once", [True, False])
+def test_ship_file_drop_multi_encrypts_once(keypair, tmp_path, monkeypatch, encrypt_once):
+    import yaml
+
+    from agentq_transport_client import crypto_pipeline as cp
+    from agentq_transport_client import preship
+    from agentq_transport_client.keygen import generate_keypair_gnupg
+    from agentq_transport_client.ship import ship_file_drop_multi
+
+    keys = {"a1": keypair}
+    pub2, priv2, _fp = generate_keypair_gnupg(tmp_path / "k2")
+    keys["a2"] = (pub2.read_text(), priv2.read_text())
+    agents = {}
+    for agent_id, (pub, _priv) in keys.items():
+        p = tmp_path / f"{agent_id}.pub.asc"
+        p.write_text(pub, encoding="utf-8")
+        agents[agent_id] = {"public_key_path": str(p), "allowed_transports": ["file_drop"]}
+    reg = tmp_path / "registry.yaml"
+    reg.write_text(yaml.dump({"version": 1, "local_agent_id": "a1", "agents": agents}))
+
+    calls = {"seal": 0, "preship": 0}
+    real_seal, real_pre = cp.seal_bytes, preship.run_pre_ship_checks
+
+    def _seal(*a, **k):
+        calls["seal"] += 1
+        return real_seal(*a, **k)
+
+    def _pre(*a, **k):
+        calls["preship"] += 1
+        return real_pre(*a, **k)
+
+    monkeypatch.setattr(cp, "seal_bytes", _seal)
+    monkeypatch.setattr(preship, "run_pre_ship_checks", _pre)
+    manifest = {
+        "manifest_version": "1",
+        "from_agent_id": "a1",
+        "prd_body": "# multi\n",
+        "to_agent_ids": ["a1", "nobody", "a2"],
+    }
+    out = tmp_path / "out"
+    results = ship_file_drop_multi(manifest, reg, out, stem="m", encrypt_once=encrypt_once)
+    assert [(r["agent_id"], r["status"]) for r in results] == [
+        ("a1", "ok"),
+        ("nobody", "error"),
+        ("a2", "ok"),
+    ]
+    assert calls == {"seal": 1 if encrypt_once else 2, "preship": 1}
+    for agent_id, (_pub, priv) in keys.items():
+        sealed = out / f"m-{agent_id}.agentq.asc"
+        assert cp.unseal_file_to_manifest(sealed, priv)["prd_body"] == "# multi\n"
+
+
+def test_bundle_streams_parts_and_reassembles(keypair, tmp_path):
+    import hashlib
+    import random
+    import tarfile
+
+    from agentq_transport_client.bundle import bundles_dir, ship_bundle_file_drop
+    from agentq_transport_client.ingest import run_file_drop_poll
+
+    pub, priv = keypair
+    pub_path = tmp_path / "r.pub.asc"
+    pub_path.write_text(pub, encoding="utf-8")
+    src = tmp_path / "src"
+    src.mkdir()
+    rnd = random.Random(7)
+    for i in range(3):
+        (src / f"f{i}.bin").write_bytes(rnd.randbytes(40_000))  # incompressible
+    drop = tmp_path / "drop"
+
+    r = ship_bundle_file_drop(src, pub_path, drop, "big", from_agent_id="agent-test", part_bytes=32_000)
+    assert r["status"] == "ok" and r["parts"] >= 4
+    assert ship_bundle_file_drop(src, pub_path, tmp_path / "d2", "x", max_bytes=50_000, part_bytes=32_000)[
+        "code"
+    ] == "BUNDLE_TOO_LARGE"
+    assert not list((tmp_path / "d2").glob("*.agentq.asc"))  # aborted parts removed
+
+    # Index alone is held until every part has arrived
+    queue = tmp_path / "queue"
+    index_only = [(drop / "big.agentq.asc", drop / "big.agentq.ready")]
+    res = run_file_drop_poll([drop], queue_root=queue, recipient_private_armored=priv, passphrase="",
+                             candidates=index_only)
+    assert res[0]["bundle"] == "held"
+    res = run_file_drop_poll([drop], queue_root=queue, recipient_private_armored=priv, passphrase="",
+                             max_per_poll=100)
+    assert [x["bundle"] for x in res].count("promoted") == 1
+    promoted = Path(next(x["promoted_to"] for x in res if x.get("promoted_to")))
+    archive = promoted / "attachments" / "big.tar.gz"
+    with tarfile.open(archive) as tf:
+        names = sorted(m.name for m in tf.getmembers() if m.isfile())
+        assert names == ["src/f0.bin", "src/f1.bin", "src/f2.bin"]
+        data = tf.extractfile("src/f1.bin").read()
+    assert hashlib.sha256(data).hexdigest() == hashlib.sha256((src / "f1.bin").read_bytes()).hexdigest()
+    assert not list(bundles_dir(queue).iterdir())
+
+    # Small bundles keep the single-attachment manifest
+    small = tmp_path / "small"
+    small.mkdir()
+    (small / "a.txt").write_text("hi")
+    r = ship_bundle_file_drop(small, pub_path, tmp_path / "d3", "s", from_agent_id="agent-test")
+    assert r["status"] == "ok" and "parts" not in r
+
+
+def test_prune_bundles_drops_only_stale_incomplete_bundles(tmp_path):
+    from agentq_transport_client.bundle import bundles_dir
+    from agentq_transport_client.prune import prune_bundles
+
+    queue = tmp_path / "queue"
+    stale, fresh = bundles_dir(queue) / "stale", bundles_dir(queue) / "fresh"
+    for d in (stale, fresh):
+        d.mkdir(parents=True)
+        (d / "part00000.json").write_text("{}", encoding="utf-8")
+    old = time.time() - 10 * 86400
+    for p in (stale / "part00000.json", stale):
+        os.utime(p, (old, old))
+    assert prune_bundles(queue, older_than_days=7, dry_run=True)["removed"] == [str(stale)]
+    assert stale.is_dir()
+    assert prune_bundles(queue, older_than_days=7)["removed"] == [str(stale)]
+    assert sorted(p.name for p in bundles_dir(queue).iterdir()) == ["fresh"]
+
+
 def test_assert_sender_allowed_denies_unknown():
     from agentq_transport_client.registry import RegistryError, assert_sender_allowed
 
@@ -98,6 +354,79 @@ def test_manifest_validate_attachments_bounds():
     )
 
 
+def test_manifest_schema_validator_cached_and_trusted_fast_path(tmp_path, monkeypatch):
+    import os
+
+    from agentq_transport_client import manifest_validate as mv
+    from agentq_transport_client.crypto_pipeline import CryptoPipelineError
+
+    schema = tmp_path / "manifest.schema.json"
+    schema.write_bytes(mv._schema_path().read_bytes())
+    monkeypatch.setattr(mv, "_SCHEMA_PATH", schema)
+    monkeypatch.setattr(mv, "_VALIDATOR_CACHE", None)
+    v1 = mv.compiled_schema_validator()
+    assert v1 is not None and mv.compiled_schema_validator() is v1
+
+    bad_type = {"manifest_version": 1, "from_agent_id": "a"}  # schema says string
+    with pytest.raises(CryptoPipelineError):
+        mv.validate_manifest(bad_type)
+    mv.validate_manifest(bad_type, trusted=True)
+    with pytest.raises(CryptoPipelineError):
+        mv.validate_manifest({"manifest_version": "1"}, trusted=True)  # bounds still enforced
+
+    schema.write_text(schema.read_text().replace('"type": "string"', '"type": ["string", "integer"]', 1))
+    st = schema.stat()
+    os.utime(schema, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000_000))
+    assert mv.compiled_schema_validator() is not v1
+    mv.validate_manifest(bad_type)
+
+
+def test_pre_ship_checks_parallel_ordered_and_cached(tmp_path):
+    import subprocess
+
+    from agentq_transport_client.preship import run_pre_ship_checks
+
+    repo = tmp_path / "repo"
+    repo.mkdir()
+    subprocess.run(["git", "init", "-q"], cwd=repo, check=True)
+    (repo / "a.py").write_text("x = 1\n")
+    subprocess.run(["git", "add", "a.py"], cwd=repo, check=True)
+    log = tmp_path / "runs.log"
+    cache = tmp_path / "cache"
+    m = {
+        "pre_ship_checks": [
+            f"echo lint >> {log}",
+            {"id": "build", "cmd": f"echo build >> {log} && touch {tmp_path}/built"},
+            {"id": "test", "after": ["build"], "cmd": f"test -f {tmp_path}/built && echo test >> {log}"},
+        ]
+    }
+
+    def runs() -> list[str]:
+        return sorted(log.read_text().split()) if log.exists() else []
+
+    r = run_pre_ship_checks(m, cwd=repo, cache_dir=cache)
+    assert r["ok"] and [x["returncode"] for x in r["results"]] == [0, 0, 0]
+    assert runs() == ["build", "lint", "test"]
+    r = run_pre_ship_checks(m, cwd=repo, cache_dir=cache)  # same tree: nothing re-runs
+    assert r["ok"] and all(x.get("cached") for x in r["results"]) and len(runs()) == 3
+    (repo / "a.py").write_text("x = 2\n")  # dirty tracked file changes the digest
+    assert run_pre_ship_checks(m, cwd=repo, cache_dir=cache)["ok"] and len(runs()) == 6
+
+    bad = {"pre_ship_checks": [{"id": "a", "cmd": "false"}, {"id": "b", "after": "a", "cmd": f"echo b >> {log}"}]}
+    r = run_pre_ship_checks(bad, cwd=repo, cache_dir=cache)
+    assert not r["ok"] and r["failed_cmd"] == "false" and len(r["results"]) == 1
+    assert not run_pre_ship_checks(bad, cwd=repo, cache_dir=cache)["ok"]  # failures not cached
+    cyc = {"pre_ship_checks": [{"id": "a", "after": "b", "cmd": "true"}, {"id": "b", "after": "a", "cmd": "true"}]}
+    assert "cycle" in run_pre_ship_checks(cyc, cwd=repo, cache_dir=cache)["error"]
+
+    # Legacy string lists keep sequential, stop-at-first-failure semantics
+    out = tmp_path / "dep.txt"
+    seq = {"pre_ship_checks": [f"sleep 0.2 && echo ok > {out}", f"grep -q ok {out}", "false", f"touch {tmp_path}/never"]}
+    r = run_pre_ship_checks(seq, cwd=repo, use_cache=False)
+    assert [x["returncode"] for x in r["results"]] == [0, 0, 1] and r["failed_cmd"] == "false"
+    assert not (tmp_path / "never").exists()
+
+
 def test_extract_attachments_checksum_fail(tmp_path):
     import base64
     import hashlib
@@ -122,6 +451,34 @@ def test_extract_attachments_checksum_fail(tmp_path):
     with pytest.raises(CryptoPipelineError) as ex:
         extract_attachments_to_staging(staging, manifest)
     assert ex.value.code == "ingest_checksum_fail"
+    assert not list((staging / "attachments").iterdir())
+
+
+def test_extract_attachments_spills_and_references(tmp_path, monkeypatch):
+    import base64
+    import hashlib
+
+    from agentq_transport_client import attachments_extract as ae
+
+    monkeypatch.setattr(ae, "_B64_CHUNK", 8)  # many chunks
+    data = bytes(range(256)) * 50
+    manifest = {
+        "manifest_version": "1",
+        "from_agent_id": "a",
+        "attachments": [
+            {
+                "path": "sub/f.bin",
+                "sha256": hashlib.sha256(data).hexdigest(),
+                "content_b64": base64.b64encode(data).decode(),
+            }
+        ],
+    }
+    ae.extract_attachments_to_staging(tmp_path, manifest)
+    assert (tmp_path / "attachments" / "sub" / "f.bin").read_bytes() == data
+    row = manifest["attachments"][0]
+    assert "content_b64" not in row
+    assert row["stored_path"] == "attachments/sub/f.bin"
+    assert row["bytes"] == len(data)
 
 
 def _gpg_batch_gen(home: Path, name: str, email: str) -> None:
@@ -235,6 +592,76 @@ def test_gpg_strict_ship_ingest(tmp_path):
     assert r.get("status") == "ok", r
 
 
+@pytest.mark.skipif(os.system("which gpg >/dev/null 2>&1") != 0, reason="gpg missing")
+def test_gpg_session_reuses_keyring(tmp_path):
+    import subprocess
+
+    from agentq_transport_client.gpg_crypto import GpgCryptoError, GpgSession
+
+    gpg_a = tmp_path / "gpg_a"
+    gpg_b = tmp_path / "gpg_b"
+    _gpg_batch_gen(gpg_a, "Alice", "alice@agentq.test")
+    _gpg_batch_gen(gpg_b, "Bob", "bob@agentq.test")
+
+    def _export(home, uid, secret=False):
+        flag = "--export-secret-keys" if secret else "--export"
+        return subprocess.run(
+            ["gpg", "--homedir", str(home), "-a", flag, uid], capture_output=True, check=True
+        ).stdout.decode()
+
+    alice_pub = _export(gpg_a, "alice@agentq.test")
+    with GpgSession(gpg_a) as signer:
+        blob = signer.sign_encrypt(
+            b"payload",
+            recipient_pubkey_armored=_export(gpg_b, "bob@agentq.test"),
+            signer_uid="alice@agentq.test",
+        )
+    with GpgSession() as recipient:
+        recipient.import_key(_export(gpg_b, "bob@agentq.test", secret=True))
+        with pytest.raises(GpgCryptoError) as ex:
+            recipient.decrypt_verify(blob, require_signature=True)  # signer key not imported yet
+        assert ex.value.code == "SIGNATURE_VERIFY_FAILED"
+        fprs = recipient.import_key(alice_pub)
+        calls = []
+        real_run = recipient._run
+        recipient._run = lambda *a, **k: calls.append(a) or real_run(*a, **k)
+        assert recipient.import_key(alice_pub) == fprs  # cached, no gpg spawn
+        plain, fp = recipient.decrypt_verify(blob, require_signature=True)
+        assert plain == b"payload" and fp == fprs[0]
+        assert len(calls) == 1
+
+        # Signed but never encrypted: the strict path must not accept it
+        signed_only = subprocess.run(
+            ["gpg", "--homedir", str(gpg_a), "--batch", "-a", "--sign", "-u", "alice@agentq.test"],
+            input=b"payload", capture_output=True, check=True,
+        ).stdout
+        with pytest.raises(GpgCryptoError) as ex:
+            recipient.decrypt_verify(signed_only, require_signature=True)
+        assert ex.value.code == "DECRYPT_FAILED"
+
+        # Encrypted fine, but the signed literal was altered: BADSIG (gpg rc 1) must fail
+        signed = subprocess.run(
+            ["gpg", "--homedir", str(gpg_a), "--batch", "--sign", "--compress-algo", "none",
+             "-u", "alice@agentq.test"],
+            input=b"payload", capture_output=True, check=True,
+        ).stdout
+        subprocess.run(
+            ["gpg", "--homedir", str(gpg_a), "--import"],
+            input=_export(gpg_b, "bob@agentq.test").encode(), capture_output=True, check=True,
+        )
+        tampered = subprocess.run(
+            ["gpg", "--homedir", str(gpg_a), "--batch", "-a", "--trust-model", "always",
+             "--no-literal", "--compress-algo", "none", "--encrypt", "-r", "bob@agentq.test"],
+            input=signed.replace(b"payload", b"paYload"), capture_output=True, check=True,
+        ).stdout
+        for strict in (True, False):
+            with pytest.raises(GpgCryptoError) as ex:
+                recipient.decrypt_verify(tampered, require_signature=strict)
+            assert ex.value.code == "SIGNATURE_VERIFY_FAILED"
+        home = recipient.home
+    assert not home.exists()
+
+
 def test_ready_marker_sha256_mismatch_rejects(keypair, tmp_path):
     from agentq_transport_client.crypto_pipeline import seal_inner_json
     from agentq_transport_client.ingest import ingest_file_drop_blob
@@ -261,6 +688,165 @@ def test_ready_marker_sha256_mismatch_rejects(keypair, tmp_path):
     assert r.get("code") == "READY_SHA256_MISMATCH"
 
 
+def test_ledger_index_lookup_and_rebuild(tmp_path):
+    from agentq_transport_client.ledger import (
+        already_ingested,
+        append_event,
+        ledger_index_path,
+        ledger_path,
+    )
+
+    queue = tmp_path / "queue"
+    append_event(queue, "ingest_decrypt_fail", {"code": "X"}, transport_id="t-fail")
+    append_event(queue, "ingest_promote_ok", {}, transport_id="t-ok")
+    assert already_ingested(queue, "t-ok")
+    assert not already_ingested(queue, "t-fail")
+    assert ledger_index_path(queue).is_file()
+
+    # Lost index is rebuilt from the JSONL
+    ledger_index_path(queue).unlink()
+    assert already_ingested(queue, "t-ok")
+
+    # Lines appended without the index (other writer, crash) are caught up on lookup
+    with open(ledger_path(queue), "a", encoding="utf-8") as f:
+        f.write('{"event": "ingest_forced", "transport_id": "t-late"}\n')
+    assert already_ingested(queue, "t-late")
+
+    # Replaced (shorter) ledger triggers a full rebuild
+    ledger_path(queue).write_text(
+        '{"event": "ingest_promote_ok", "transport_id": "t-new"}\n', encoding="utf-8"
+    )
+    assert already_ingested(queue, "t-new")
+    assert not already_ingested(queue, "t-ok")
+
+    # Replaced by a longer file (rename over it, or rewritten in place) also rebuilds
+    longer = "".join(
+        '{"event": "ingest_promote_ok", "transport_id": "t-a-%d"}\n' % i for i in range(3)
+    )
+    tmp = ledger_path(queue).with_suffix(".tmp")
+    tmp.write_text(longer, encoding="utf-8")
+    os.replace(tmp, ledger_path(queue))
+    assert already_ingested(queue, "t-a-2")
+    assert not already_ingested(queue, "t-new")
+    with open(ledger_path(queue), "r+", encoding="utf-8") as f:
+        f.write(longer.replace("t-a-", "t-b-") + longer)
+    assert already_ingested(queue, "t-b-0")
+
+
+def test_ledger_batch_buffers_until_flush(tmp_path):
+    from agentq_transport_client.ledger import (
+        LedgerWriter,
+        already_ingested,
+        append_event,
+        iter_ingest_events,
+        ledger_batch,
+        ledger_path,
+    )
+
+    queue = tmp_path / "queue"
+    with ledger_batch(queue, fsync="none", batch_size=3) as writer:
+        append_event(queue, "ingest_start", {}, transport_id="t-1")
+        append_event(queue, "ingest_promote_ok", {}, transport_id="t-1")
+        assert not ledger_path(queue).exists()
+        # Buffered records still count for idempotency
+        assert already_ingested(queue, "t-1")
+        with ledger_batch(queue) as inner:
+            assert inner is writer
+        append_event(queue, "ingest_start", {}, transport_id="t-2")  # third record flushes
+        assert len(ledger_path(queue).read_text().splitlines()) == 3
+        append_event(queue, "ingest_promote_ok", {}, transport_id="t-2")
+    assert already_ingested(queue, "t-2")
+    assert [e["transport_id"] for e in iter_ingest_events(queue, "ingest_promote_ok")] == [
+        "t-1",
+        "t-2",
+    ]
+
+    with pytest.raises(ValueError):
+        LedgerWriter(ledger_path(queue), fsync="sometimes")
+
+
+def test_ledger_compact_segments_and_snapshot(tmp_path):
+    from agentq_transport_client.ledger import (
+        already_ingested,
+        append_event,
+        append_ship_event,
+        compact_ledger,
+        iter_ingest_events,
+        ledger_index_path,
+        ledger_path,
+        ledger_segments_dir,
+        pending_processed_moves,
+    )
+
+    queue = tmp_path / "queue"
+    append_event(queue, "ingest_promote_ok", {}, transport_id="t-old")
+    append_event(queue, "pending_processed_move", {"uid": 7}, transport_id="mail-7")
+    append_event(queue, "pending_processed_move", {"uid": 8}, transport_id="mail-8")
+    append_event(queue, "mail_move_ok", {"uid": 8}, transport_id="mail-8")
+    append_ship_event(queue, "ship_push_ok", {"transport_id": "s-1"})
+
+    r = compact_ledger(queue)
+    assert r["ingest"]["lines"] == 4 and r["ship"]["lines"] == 1
+    assert r["ingest"]["segment"].endswith(".jsonl.gz")
+    assert ledger_path(queue).stat().st_size == 0
+    assert already_ingested(queue, "t-old")
+    assert [m["uid"] for m in pending_processed_moves(queue)] == [7]
+
+    append_event(queue, "ingest_promote_ok", {}, transport_id="t-new")
+    compact_ledger(queue, compress=False)
+    append_event(queue, "ingest_start", {}, transport_id="t-live")
+    assert len(list(ledger_segments_dir(queue).iterdir())) == 2
+    # Live file first, then segments newest-first
+    assert [e["transport_id"] for e in iter_ingest_events(queue)] == [
+        "t-live",
+        "t-new",
+        "t-old",
+        "mail-7",
+        "mail-8",
+        "mail-8",
+    ]
+
+    # A lost index reseeds from the snapshot
+    ledger_index_path(queue).unlink()
+    assert already_ingested(queue, "t-old") and already_ingested(queue, "t-new")
+    assert compact_ledger(queue, min_bytes=1 << 20)["ingest"]["segment"] is None
+
+
+def test_prune_archive_uses_size_manifest(tmp_path):
+    from agentq_transport_client.queue_archive import (
+        SIZE_MANIFEST,
+        prune_archive,
+        read_size_manifest,
+        write_size_manifest,
+    )
+
+    archive = tmp_path / "archive"
+    now = time.time()
+    for i, age_days in enumerate((30, 20, 10)):
+        run = archive / f"run{i}"
+        (run / "sub").mkdir(parents=True)
+        (run / "sub" / "blob.bin").write_bytes(b"x" * 1000)
+        os.utime(run, (now - age_days * 86400, now - age_days * 86400))
+        assert write_size_manifest(run) == 1000
+        assert read_size_manifest(run) == 1000
+        assert round((now - run.stat().st_mtime) / 86400) == age_days  # mtime kept
+    # Legacy run without a manifest is walked once and backfilled
+    legacy = archive / "legacy"
+    legacy.mkdir()
+    (legacy / "a.bin").write_bytes(b"y" * 500)
+    os.utime(legacy, (now - 5 * 86400, now - 5 * 86400))
+
+    r = prune_archive(archive, older_than_days=25, max_total_gb=1500 / 1024**3, dry_run=True)
+    assert [Path(p).name for p in r["deleted"]] == ["run0", "run1"]
+    assert r["bytes_freed"] == 2000
+    assert not (legacy / SIZE_MANIFEST).exists()
+
+    r = prune_archive(archive, older_than_days=25, max_total_gb=1500 / 1024**3)
+    assert r["bytes_freed"] == 2000
+    assert sorted(p.name for p in archive.iterdir()) == ["legacy", "run2"]
+    assert read_size_manifest(legacy) == 500
+
+
 def test_registry_validate_example():
     from agentq_transport_client.registry import RegistryError, load_registry_yaml, validate_registry
 
@@ -272,3 +858,112 @@ def test_registry_validate_example():
         validate_registry(raw, require_keys_exist=True)
     v = validate_registry(raw, require_keys_exist=False)
     assert "agent-b" in v["raw"]["agents"]
+
+
+def test_load_validated_registry_cached_until_changed(tmp_path):
+    import os
+    import shutil
+
+    from agentq_transport_client.registry import load_validated_registry
+
+    example = _ENGINE / "config" / "agent_trust_registry.example.yaml"
+    if not example.is_file():
+        pytest.skip("example registry missing")
+    reg = tmp_path / "registry.yaml"
+    shutil.copy(example, reg)
+    first = load_validated_registry(reg, require_keys_exist=False)
+    assert load_validated_registry(reg, require_keys_exist=False) is first
+    st = reg.stat()
+    os.utime(reg, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000_000))
+    second = load_validated_registry(reg, require_keys_exist=False)
+    assert second is not first
+    assert second["raw"] == first["raw"]
+
+
+def test_mail_entrypoints_close_controllers_they_open(tmp_path, monkeypatch):
+    from agentq_transport_client import mail_adapter
+
+    class Ctrl:
+        closed = 0
+
+        def dispatch(self, tool, payload):
+            return {"ok": True}
+
+        def close(self):
+            self.closed += 1
+
+    opened: list[Ctrl] = []
+
+    def fake_controller(*args, **kwargs):
+        opened.append(Ctrl())
+        return opened[-1]
+
+    async def fake_pull(engine, **kwargs):
+        return []
+
+    monkeypatch.setattr(mail_adapter, "mail_controller", fake_controller)
+    monkeypatch.setattr(mail_adapter, "_pull_and_promote", fake_pull)
+    paths = {"policy_path": tmp_path / "p.yaml", "accounts_path": tmp_path / "a.json"}
+    mail_adapter.mail_pull_and_promote(queue_root=tmp_path, account_id="acct1", **paths)
+    shared = Ctrl()
+    mail_adapter.mail_pull_and_promote(
+        queue_root=tmp_path, account_id="acct1", ctrl=shared, **paths
+    )
+    manifest = {"manifest_version": "1", "from_agent_id": "agent-test", "prd_body": "# x\n"}
+    r = mail_adapter.mail_ship_agentq_outer(
+        account_id="acct1",
+        manifest=manifest,
+        to_addr="peer@example.com",
+        subject="s",
+        from_addr="me@example.com",
+        skip_pre_ship=True,
+        **paths,
+    )
+    assert r["ok"]
+    assert [c.closed for c in opened] == [1, 1] and shared.closed == 0
+
+
+def test_mail_watch_backs_off_failed_pages_and_survives_errors(tmp_path, monkeypatch):
+    import threading
+
+    from agentq_transport_client import mail_adapter
+
+    calls: list[float] = []
+    opened: list[object] = []
+    stop = threading.Event()
+
+    class Ctrl:
+        def dispatch(self, tool, payload):
+            return {"ok": False, "code": "IMAP_IDLE_UNSUPPORTED"}
+
+        def close(self):
+            pass
+
+    def fake_controller(*args, **kwargs):
+        opened.append(Ctrl())
+        return opened[-1]
+
+    def fake_pull(**kwargs):
+        calls.append(time.monotonic())
+        if len(calls) == 1:
+            raise OSError("connection reset")
+        return [{"status": "skip", "uid": "1", "code": "IMAP_FETCH_FAILED"}] * kwargs["lim"]
+
+    monkeypatch.setattr(mail_adapter, "mail_controller", fake_controller)
+    monkeypatch.setattr(mail_adapter, "mail_pull_and_promote", fake_pull)
+    timer = threading.Timer(0.5, stop.set)
+    timer.start()
+    handled = mail_adapter.mail_watch(
+        queue_root=tmp_path,
+        account_ids=["acct1"],
+        policy_path=tmp_path / "p.yaml",
+        accounts_path=tmp_path / "a.json",
+        lim=2,
+        poll_seconds=0.1,
+        stop=stop,
+    )
+    timer.cancel()
+    # The exception reopened the controller instead of killing the thread; failed full
+    # pages waited between pulls instead of spinning.
+    assert len(opened) == 2 and 3 <= len(calls) <= 7
+    assert handled == 2 * (len(calls) - 1)